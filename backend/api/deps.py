@@ -4,7 +4,7 @@ from collections import defaultdict
 from fastapi import Depends, HTTPException
 from auth.security import get_current_user
 from config.settings import settings
-from models.user import User
+from models.user import User, UserRole
 
 _request_counts = defaultdict(list)
 
@@ -18,3 +18,8 @@ async def rate_limit(user: User = Depends(get_current_user)) -> User:
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     _request_counts[uid].append(now)
     return user
+
+async def require_admin(user: User = Depends(get_current_user)) -> User:
+    if user.role != UserRole.ADMIN:
+        raise HTTPException(403, "Admin access required")
+    return user
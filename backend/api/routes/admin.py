@@ -0,0 +1,48 @@
+# api/routes/admin.py
+from fastapi import APIRouter, Depends, Query
+from models.user import User
+from api.deps import require_admin
+from services.analytics_service import rebuild_rollups, summary_from_rollups, summary_live
+from services.llm_usage import prompt_size_report, usage_report
+
+router = APIRouter()
+
+
+@router.get("/analytics")
+async def analytics_summary(
+    days: int = Query(default=7, ge=1, le=366),
+    live: bool = False,
+    user: User = Depends(require_admin),
+):
+    """Finished analyses by status and user, duration percentiles, failure rate and top errors.
+
+    Served from the daily rollups; `live=true` aggregates the documents collection instead.
+    """
+    return await (summary_live(days) if live else summary_from_rollups(days))
+
+
+@router.post("/analytics/rebuild")
+async def rebuild_analytics(
+    days: int = Query(default=30, ge=1, le=366),
+    user: User = Depends(require_admin),
+):
+    return {"rebuilt_days": await rebuild_rollups(days)}
+
+
+@router.get("/usage")
+async def llm_usage_summary(
+    days: int = Query(default=7, ge=1, le=366),
+    user: User = Depends(require_admin),
+):
+    """LLM tokens, cost, calls and retries by stage and by user, from the daily rollups."""
+    return await usage_report(days)
+
+
+@router.get("/usage/prompt-sizes")
+async def prompt_size_summary(
+    days: int = Query(default=7, ge=1, le=183),
+    threshold: float = Query(default=0.2, ge=0.0),
+    user: User = Depends(require_admin),
+):
+    """Mean prompt tokens per stage against the previous window; growth above `threshold` is flagged."""
+    return await prompt_size_report(days, threshold)
@@ -1,10 +1,16 @@
 # api/routes/analysis.py
+import time
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Form
 from beanie import PydanticObjectId
 from models.document import Document, DocumentStatus
 from models.user import User
-from services.analysis_service import process_financial_document
+from database.repositories import STARTABLE, DocumentRepository
+from services import analysis_cache
+from services.analysis_service import finalize_analysis, index_analysis, process_financial_document
 from api.deps import rate_limit
+from observability.metrics import ANALYSES_QUEUED
+from services.analysis_control import request_cancel
 
 router = APIRouter()
 
@@ -13,6 +19,7 @@ async def analyze_document_endpoint(
     doc_id: str,
     background_tasks: BackgroundTasks,
     query: str = Form(default="Provide comprehensive financial analysis"),
+    force: bool = False,
     user: User = Depends(rate_limit),
 ):
     try:
@@ -26,15 +33,60 @@ async def analyze_document_endpoint(
     if doc.uploaded_by != str(user.id):
         raise HTTPException(403, "Access denied")
 
-    doc.status = DocumentStatus.PROCESSING
-    await doc.save()
+    query = query.strip()[:2000]
+    if not force:
+        key = analysis_cache.cache_key(await analysis_cache.ensure_content_hash(doc), query)
+        cached = await analysis_cache.lookup(key)
+        if cached is not None:
+            if not await finalize_analysis(doc, cached.stages, query, cached=True, allowed_from=STARTABLE):
+                raise HTTPException(409, "Analysis is already queued or running")
+            background_tasks.add_task(index_analysis, doc)
+            return {"status": "completed", "document_id": str(doc.id), "cached": True}
 
+    # Conditional on the stored status, so two concurrent requests cannot both queue a run.
+    queued = await DocumentRepository.transition(
+        doc, DocumentStatus.PROCESSING, STARTABLE,
+        inc={"analysis_attempts": 1}, queued_date=datetime.utcnow(), error=None,
+    )
+    if not queued:
+        raise HTTPException(409, "Analysis is already queued or running")
+
+    ANALYSES_QUEUED.inc()
     background_tasks.add_task(
         process_financial_document,
-        query=query.strip()[:2000],
+        query=query,
         file_path=doc.file_path,
         user_id=str(user.id),
         document_id=str(doc.id),
+        queued_at=time.time(),
+        force=force,
     )
 
     return {"status": "queued", "document_id": str(doc.id)}
+
+
+@router.delete("/analyze/{doc_id}")
+async def cancel_analysis_endpoint(doc_id: str, user: User = Depends(rate_limit)):
+    try:
+        oid = PydanticObjectId(doc_id)
+    except Exception:
+        raise HTTPException(400, "Invalid document id")
+
+    doc = await Document.get(oid)
+    if not doc:
+        raise HTTPException(404, "Document not found")
+    if doc.uploaded_by != str(user.id):
+        raise HTTPException(403, "Access denied")
+    cancelled = await DocumentRepository.transition(
+        doc, DocumentStatus.CANCELLED, (DocumentStatus.PROCESSING,),
+        processed_date=datetime.utcnow(), error="Cancelled by user",
+    )
+    if not cancelled:
+        current = await Document.get(oid)
+        status = current.status.value if current else doc.status.value
+        raise HTTPException(409, f"Analysis is not running (status: {status})")
+
+    # Signal a run in this worker right away; the recorded status reaches runs on other workers.
+    signalled = request_cancel(str(doc.id))
+
+    return {"status": "cancelled", "document_id": str(doc.id), "signalled": signalled}
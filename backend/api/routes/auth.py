@@ -1,8 +1,9 @@
 # api/routes/auth.py
-from datetime import datetime, timedelta
+from datetime import timedelta
 from fastapi import APIRouter, Form, HTTPException, Depends
 from auth.security import get_password_hash, verify_password, create_access_token
 from models.user import User, UserRole
+from database.repositories import UserRepository
 from config.settings import settings
 
 router = APIRouter()
@@ -24,7 +25,7 @@ async def register_user(
         hashed_password=get_password_hash(password),
         role=UserRole.USER,
     )
-    await user.save()
+    await user.insert()
     return {"message": "User registered successfully", "user_id": str(user.id)}
 
 @router.post("/login")
@@ -37,8 +38,7 @@ async def login_user(
         raise HTTPException(401, "Incorrect username or password")
     if not user.is_active:
         raise HTTPException(401, "Account is inactive")
-    user.last_login = datetime.utcnow()
-    await user.save()
+    await UserRepository.record_login(user)
     token = create_access_token(data={"sub": str(user.id)},
                                 expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     return {
@@ -1,12 +1,22 @@
 # api/routes/documents.py
 import os
+import re
+import hashlib
+from datetime import datetime
 from pathlib import Path
-import aiofiles
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from typing import Literal, Optional
+from urllib.parse import quote
+from fastapi import APIRouter, BackgroundTasks, Header, UploadFile, File, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from auth.security import get_current_user
 from models.document import Document, DocumentStatus
 from models.user import User, UserRole
 from api.deps import rate_limit
 from config.settings import settings
+from services import blob_storage
+from services.preprocessing import preprocess_document
+from services.search_service import search_documents
+from services.export_service import build_filter, csv_chunks, gzip_chunks, iter_rows, ndjson_chunks
 from beanie import PydanticObjectId
 from fastapi import HTTPException, Depends
 from models.user import User, UserRole
@@ -21,6 +31,11 @@ _ALLOWED_TYPES = {
     "text/plain",
 }
 
+def _attachment(filename: str) -> str:
+    """Content-Disposition with an ASCII fallback and the exact name (RFC 5987); headers go out as latin-1."""
+    fallback = re.sub(r'[^\x20-\x7e]|["\\]', "_", filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
 def _validate_file(file: UploadFile) -> None:
     if not file.filename:
         raise HTTPException(400, "No file provided")
@@ -54,33 +69,83 @@ async def list_user_documents(
 
 @router.post("/upload")
 async def upload_document(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     user: User = Depends(rate_limit),
 ):
     _validate_file(file)
-    content = await file.read()
-    if len(content) > settings.MAX_FILE_SIZE:
-        raise HTTPException(413, "File too large")
+    content_type = file.content_type or "application/octet-stream"
+    store = blob_storage.get_store()
+    key = blob_storage.new_key(file.filename)
+    digest = hashlib.sha256()
+
+    # Streamed into the store chunk by chunk; the size cap is enforced as the bytes arrive.
+    async def chunks():
+        size = 0
+        while chunk := await file.read(blob_storage.CHUNK_SIZE):
+            size += len(chunk)
+            if size > settings.MAX_FILE_SIZE:
+                raise HTTPException(413, "File too large")
+            digest.update(chunk)
+            yield chunk
 
-    uploads = Path(settings.UPLOAD_DIR); uploads.mkdir(exist_ok=True)
-    # store with a generated name
-    dst = uploads / file.filename  # or include a UUID prefix
-    async with aiofiles.open(dst, "wb") as f:
-        await f.write(content)
+    size = await store.write(key, chunks(), content_type)
 
     doc = Document(
         original_filename=file.filename,
-        filename=dst.name,
-        file_path=str(dst),
-        file_size=len(content),
-        content_type=file.content_type or "application/octet-stream",
+        filename=Path(key).name,
+        file_path=store.local_path(key) or store.uri(key),
+        file_size=size,
+        content_hash=digest.hexdigest(),
+        content_type=content_type,
+        storage_backend=store.name,
+        storage_key=key,
         uploaded_by=str(user.id),
         status=DocumentStatus.UPLOADED,
     )
-    await doc.save()
+    await doc.insert()
+    if settings.EAGER_EXTRACTION_ENABLED:
+        background_tasks.add_task(preprocess_document, str(doc.id))
     return {"message": "Uploaded", "id": str(doc.id)}
 
 
+@router.get("/search")
+async def search_user_documents(
+    q: str,
+    skip: int = 0,
+    limit: int = 20,
+    user: User = Depends(rate_limit),
+):
+    q = q.strip()[:500]
+    if not q:
+        raise HTTPException(400, "Empty search query")
+    return await search_documents(str(user.id), q, limit=max(1, min(limit, 100)), skip=max(0, skip))
+
+
+@router.get("/export")
+async def export_documents(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    status: Optional[DocumentStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    gzip: bool = False,
+    user: User = Depends(get_current_user),
+):
+    # One request streams any number of rows, so it is authenticated but not counted against rate_limit.
+    owner = None if user.role == UserRole.ADMIN else str(user.id)
+    chunks = (ndjson_chunks if format == "ndjson" else csv_chunks)(
+        iter_rows(build_filter(owner, status, date_from, date_to))
+    )
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    filename = f"documents-{datetime.utcnow():%Y%m%dT%H%M%SZ}.{format}"
+    if gzip:
+        chunks, media_type, filename = gzip_chunks(chunks), "application/gzip", filename + ".gz"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 
 @router.get("/{doc_id}")
 async def get_document_detail(doc_id: str, user: User = Depends(rate_limit)):
@@ -104,6 +169,61 @@ async def get_document_detail(doc_id: str, user: User = Depends(rate_limit)):
         "upload_date": doc.upload_date,
         "processed_date": doc.processed_date,
         "file_size": doc.file_size,
+        "extracted_date": doc.extracted_date,
+        "metrics": doc.metrics,
         "analysis": doc.analysis,
+        "llm_usage": (doc.llm_usage or {}).get("total"),
         "error": doc.error,
-    }
\ No newline at end of file
+    }
+
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+@router.get("/{doc_id}/file")
+async def download_document_file(
+    doc_id: str,
+    range_header: Optional[str] = Header(default=None, alias="Range"),
+    user: User = Depends(rate_limit),
+):
+    """The uploaded file, streamed from its store; a single `Range: bytes=` range gets a 206."""
+    try:
+        oid = PydanticObjectId(doc_id)
+    except Exception:
+        raise HTTPException(400, "Invalid document id")
+
+    doc = await Document.get(oid)
+    if not doc:
+        raise HTTPException(404, "Document not found")
+    if doc.uploaded_by != str(user.id) and user.role != UserRole.ADMIN:
+        raise HTTPException(403, "Access denied")
+
+    try:
+        size = await blob_storage.document_size(doc)
+    except blob_storage.BlobNotFound:
+        raise HTTPException(410, "File is no longer stored")
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": _attachment(doc.filename),
+    }
+    start, length, status = 0, size, 200
+    match = _RANGE.match(range_header.strip()) if range_header else None
+    if match and (match.group(1) or match.group(2)):
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:  # suffix range: the last N bytes
+            start = max(0, size - int(last))
+            end = size - 1
+        if start >= size or end < start:
+            raise HTTPException(416, "Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+        length, status = end - start + 1, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        blob_storage.read_document(doc, start, length),
+        status_code=status,
+        media_type=doc.content_type,
+        headers=headers,
+    )
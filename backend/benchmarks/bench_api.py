@@ -0,0 +1,56 @@
+# benchmarks/bench_api.py
+"""API endpoint latency against the in-process app and a mongomock database."""
+import io
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.harness import init_mongo_standin, summarize
+
+
+async def _noop_pipeline(**kwargs) -> str:
+    return "OK"
+
+
+async def run(requests: int) -> Dict[str, Any]:
+    import api.routes.analysis as analysis_routes
+    from main import create_app
+
+    await init_mongo_standin()
+    # Queued analyses are measured by the pipeline benchmark, not here.
+    analysis_routes.process_financial_document = _noop_pipeline
+
+    app = create_app()
+    samples: Dict[str, List[float]] = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def call(route: str, method: str, url: str, **kwargs) -> httpx.Response:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            samples.setdefault(route, []).append(time.perf_counter() - start)
+            response.raise_for_status()
+            return response
+
+        form = {"email": "bench@example.com", "username": "bench", "full_name": "Bench", "password": "bench-pass"}
+        await call("POST /auth/register", "POST", "/auth/register", data=form)
+        login = await call("POST /auth/login", "POST", "/auth/login",
+                           data={"username": "bench", "password": "bench-pass"})
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+
+        body = b"Total revenues $ 4,200 million\nNet income $ 310 million\n" * 200
+        doc_ids = []
+        for i in range(requests):
+            files = {"file": (f"report-{i}.txt", io.BytesIO(body), "text/plain")}
+            upload = await call("POST /api/v1/documents/upload", "POST", "/api/v1/documents/upload", files=files)
+            doc_ids.append(upload.json()["id"])
+
+        for i in range(requests):
+            doc_id = doc_ids[i % len(doc_ids)]
+            await call("GET /api/v1/documents", "GET", "/api/v1/documents", params={"limit": 50})
+            await call("GET /api/v1/documents/{doc_id}", "GET", f"/api/v1/documents/{doc_id}")
+            await call("POST /api/v1/analyze/{doc_id}", "POST", f"/api/v1/analyze/{doc_id}")
+
+    return {route: summarize(values) for route, values in samples.items()}
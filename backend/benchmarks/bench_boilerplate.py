@@ -0,0 +1,110 @@
+# benchmarks/bench_boilerplate.py
+"""Prompt size with and without cross-page boilerplate removal, and a no-loss check.
+
+Extracts synthetic 10-K style PDFs (with and without running heads/footers,
+and with per-page segment figures closing every page) twice, with and without
+`BoilerplateFilter`, and reports characters, tokens, extraction time and time
+to the first page (the filter holds back only its BOILERPLATE_WINDOW_PAGES
+decision window, so this must not grow with the page count).
+Every distinct line of the unfiltered text must still appear in the filtered
+text, except running lines that differ only in standalone integers (page
+numbers, already given by the `[Page N]` markers), whose masked form must
+appear. Amounts ($, commas, decimals) are never masked, so a dropped figure
+fails the run.
+
+Usage (from backend/):  python -m benchmarks.bench_boilerplate [--pages 40 120] [--density 0.2]
+"""
+import argparse
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Set, Tuple
+
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+from benchmarks.corpus import make_pdf
+from crew.metering import count_tokens
+from tools.boilerplate import BoilerplateFilter
+from tools.document_extraction import FinancialDocumentTool
+from tools.text_normalizer import normalize_chunks
+
+
+def _extract(path: str, strip: bool) -> Tuple[str, float]:
+    start = time.perf_counter()
+    pages = FinancialDocumentTool.iter_pages(path)
+    if strip:
+        pages = BoilerplateFilter().filter(pages)
+    text = normalize_chunks(FinancialDocumentTool.join_pages([page]) for page in pages)
+    return text, time.perf_counter() - start
+
+
+def _first_page(path: str, strip: bool) -> float:
+    start = time.perf_counter()
+    pages = FinancialDocumentTool.iter_pages(path)
+    if strip:
+        pages = BoilerplateFilter().filter(pages)
+    next(pages)
+    pages.close()
+    return time.perf_counter() - start
+
+
+_INTEGER = re.compile(r'(?<![$\d,.])(?<!\$ )\d+(?![\d%]|[,.]\d)')
+
+
+def _lines(text: str) -> Set[str]:
+    return {" ".join(line.split()) for line in text.split("\n") if line.strip()}
+
+
+def _masked(lines: Set[str]) -> Set[str]:
+    return {_INTEGER.sub("#", line) for line in lines}
+
+
+def _row(label: str, path: Path, tokens: Callable[[str], int]) -> None:
+    raw, t_raw = _extract(str(path), strip=False)
+    stripped, t_stripped = _extract(str(path), strip=True)
+    kept = _lines(stripped)
+    dropped = _lines(raw) - kept
+    missing = _masked(dropped) - _masked(kept)
+    raw_tokens, stripped_tokens = tokens(raw), tokens(stripped)
+    first_raw, first_stripped = _first_page(str(path), strip=False), _first_page(str(path), strip=True)
+    print(
+        f"{label}: chars {len(raw)} -> {len(stripped)} ({1 - len(stripped) / len(raw):.1%} less), "
+        f"tokens {raw_tokens} -> {stripped_tokens} ({1 - stripped_tokens / raw_tokens:.1%} less), "
+        f"extract {t_raw:.3f}s -> {t_stripped:.3f}s, first page {first_raw:.3f}s -> {first_stripped:.3f}s, "
+        f"page-number variants dropped {len(dropped)}, lines lost {len(missing)}"
+    )
+    if missing:
+        raise SystemExit(f"Boilerplate removal lost lines from {label}: {sorted(missing)[:5]}")
+
+
+def main() -> None:
+    logging.getLogger("pdfminer").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[40, 120])
+    parser.add_argument("--density", type=float, default=0.2)
+    parser.add_argument("--model", default="gpt-4o-mini", help="Tokenizer model (tiktoken if installed)")
+    args = parser.parse_args()
+
+    def tokens(text: str) -> int:
+        return count_tokens(args.model, text)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            variants = (
+                ("10-K running text", True, False),
+                ("no running text", False, False),
+                ("running text + per-page figures", True, True),
+            )
+            for name, running_text, edge_figures in variants:
+                pdf = make_pdf(
+                    Path(tmp) / f"bp_{pages}_{running_text}_{edge_figures}.pdf", pages, args.density,
+                    running_text=running_text, edge_figures=edge_figures,
+                )
+                _row(f"pages={pages} {name}", pdf, tokens)
+
+
+if __name__ == "__main__":
+    main()
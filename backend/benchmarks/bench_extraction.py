@@ -0,0 +1,87 @@
+# benchmarks/bench_extraction.py
+"""Extraction, cleaning and metric-extraction throughput over synthetic PDF/DOCX/TXT files.
+
+Metric extraction is first checked against `METRIC_CASES`; the run fails on a mismatch.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from docx import Document as DocxDocument
+
+from benchmarks.corpus import MAKERS
+from benchmarks.harness import measure
+from tools.boilerplate import BoilerplateFilter
+from tools.document_extraction import FinancialDocumentTool
+
+
+# (text, metric, first (value, unit) expected; None when the metric must not be reported)
+METRIC_CASES: List[Tuple[str, str, Optional[Tuple[str, str]]]] = [
+    ("Total revenue for fiscal 2024 was $4.5 billion", "revenue", ("4.5", "billion")),
+    ("Revenue grew 12% to $4.5 billion", "revenue", ("4.5", "billion")),
+    ("Revenue grew 12% year over year", "revenue", None),
+    ("Net income for the year ended December 31, 2024 was $1.1 billion.", "net_income", ("1.1", "billion")),
+    ("Net income 2024 2023\nNet income | 1,234 | 999", "net_income", ("1,234", "")),
+    ("Total assets | 12,345 | 11,870", "total_assets", ("12,345", "")),
+    ("Total assets | $ 12,345 | $ 11,870", "total_assets", ("12,345", "")),
+    ("Revenues were 3.2 billion in 2024.", "revenue", ("3.2", "billion")),
+    ("Total liabilities and equity $ 50\nTotal liabilities $ 40 million", "total_liabilities", ("40", "million")),
+]
+
+
+def check_metrics() -> None:
+    for text, metric, expected in METRIC_CASES:
+        values = FinancialDocumentTool.extract_financial_metrics(text).get(metric)
+        got = tuple(values[0]) if values else None
+        if got != expected:
+            raise SystemExit(f"extract_financial_metrics({text!r})[{metric!r}]: expected {expected}, got {got}")
+
+
+def run(workdir: Path, pages: int, density: float, repeat: int) -> Dict[str, Any]:
+    check_metrics()
+    results: Dict[str, Any] = {}
+    for ext, make in MAKERS.items():
+        path = make(workdir / f"extraction{ext}", pages, density)
+        text = FinancialDocumentTool.read_document(str(path))
+        raw = path.read_text(encoding="utf-8") if ext == ".txt" else text
+        size = path.stat().st_size
+
+        extract = measure(lambda: FinancialDocumentTool.read_document(str(path)), repeat=repeat)
+        clean = measure(lambda: FinancialDocumentTool._clean_financial_text(raw), repeat=repeat)
+        metrics = measure(lambda: FinancialDocumentTool.extract_financial_metrics(text), repeat=repeat)
+
+        results[ext.lstrip(".")] = {
+            "file_bytes": size,
+            "text_chars": len(text),
+            "extract": {**extract, "mb_per_s": size / extract["median"] / 1e6},
+            "clean": {**clean, "mchars_per_s": len(raw) / clean["median"] / 1e6},
+            "metrics": {**metrics, "mchars_per_s": len(text) / metrics["median"] / 1e6},
+        }
+
+    pdf = workdir / "extraction.pdf"
+    results["pdf"]["extract_pdfplumber_only"] = measure(
+        lambda: FinancialDocumentTool.join_pages(FinancialDocumentTool._iter_with_pdfplumber(str(pdf))),
+        repeat=max(1, repeat // 2),
+    )
+    results["pdf"]["first_page"] = measure(lambda: _first_page(str(pdf)), repeat=repeat)
+    results["pdf"]["first_page_boilerplate"] = measure(lambda: _first_page(str(pdf), strip=True), repeat=repeat)
+    docx = workdir / "extraction.docx"
+    results["docx"]["extract_dom"] = measure(lambda: _docx_dom(str(docx)), repeat=repeat)
+    return results
+
+
+def _docx_dom(path: str) -> None:
+    """The python-docx DOM path the streaming extractor replaced, with tables read too for parity."""
+    doc = DocxDocument(path)
+    for paragraph in doc.paragraphs:
+        paragraph.text
+    for table in doc.tables:
+        for row in table.rows:
+            [cell.text for cell in row.cells]
+
+
+def _first_page(path: str, strip: bool = False) -> None:
+    pages = FinancialDocumentTool.iter_pages(path)
+    if strip:
+        pages = BoilerplateFilter().filter(pages)
+    next(pages)
+    pages.close()
@@ -0,0 +1,69 @@
+# benchmarks/bench_normalizer.py
+"""Throughput and peak allocation of the single-pass text normaliser.
+
+Compares `normalize_financial_text` (whole text) and `normalize_chunks` (page-sized
+chunks) with the legacy seven-pass cleaner on the synthetic corpus. Their outputs
+are checked for equivalence by tests/test_text_normalizer.py.
+
+Usage (from backend/):  python -m benchmarks.bench_normalizer [--pages 200]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+from benchmarks.corpus import MAKERS
+from benchmarks.harness import measure
+from tools.document_extraction import FinancialDocumentTool
+from tests.test_text_normalizer import legacy_clean
+from tools.text_normalizer import normalize_chunks, normalize_financial_text
+
+_CHUNK_CHARS = 8192  # roughly one extracted page
+
+
+def _peak(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    logging.getLogger("pdfminer").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus: Dict[str, str] = {}
+        for ext, make in MAKERS.items():
+            path = make(Path(tmp) / f"normalizer{ext}", args.pages, 0.2)
+            pages = list(FinancialDocumentTool.iter_pages(str(path)))
+            corpus[ext.lstrip(".")] = FinancialDocumentTool.join_pages(pages)
+
+    for name, text in corpus.items():
+        # Repeat the text so the timings are not dominated by call overhead.
+        text = text * max(1, 2_000_000 // max(1, len(text)))
+        chunks = [text[i:i + _CHUNK_CHARS] for i in range(0, len(text), _CHUNK_CHARS)]
+        legacy = measure(lambda: legacy_clean(text), repeat=args.repeat)
+        single = measure(lambda: normalize_financial_text(text), repeat=args.repeat)
+        chunked = measure(lambda: normalize_chunks(chunks), repeat=args.repeat)
+        print(
+            f"{name:<5} {len(text) / 1e6:5.1f} Mchars  "
+            f"legacy={len(text) / legacy['median'] / 1e6:6.1f} Mchars/s peak={_peak(lambda: legacy_clean(text)) / 1e6:6.1f} MB  "
+            f"single-pass={len(text) / single['median'] / 1e6:6.1f} Mchars/s "
+            f"peak={_peak(lambda: normalize_financial_text(text)) / 1e6:6.1f} MB  "
+            f"chunked={len(text) / chunked['median'] / 1e6:6.1f} Mchars/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
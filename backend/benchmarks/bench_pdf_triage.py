@@ -0,0 +1,49 @@
+# benchmarks/bench_pdf_triage.py
+"""Compare full pdfplumber extraction against triaged extraction on a synthetic corpus.
+
+Usage (from backend/):  python -m benchmarks.bench_pdf_triage [--pages 40] [--density 0.2]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+from benchmarks.corpus import make_pdf
+from tools.document_extraction import FinancialDocumentTool
+
+
+def _timed(extractor, path):
+    start = time.perf_counter()
+    out = FinancialDocumentTool.join_pages(extractor(path))
+    return out, time.perf_counter() - start
+
+
+def main() -> None:
+    logging.getLogger("pdfminer").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--density", type=float, nargs="+", default=[0.05, 0.2, 0.5])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for density in args.density:
+            pdf = make_pdf(Path(tmp) / f"corpus_{density}.pdf", pages=args.pages, table_density=density)
+            legacy, t_legacy = _timed(FinancialDocumentTool._iter_with_pdfplumber, str(pdf))
+            triaged, t_triaged = _timed(FinancialDocumentTool._iter_with_triage, str(pdf))
+            tables_legacy = legacy.count("[Table ")
+            tables_triaged = triaged.count("[Table ")
+            print(
+                f"density={density:.2f} pages={args.pages} "
+                f"pdfplumber={t_legacy:.3f}s triage={t_triaged:.3f}s "
+                f"speedup={t_legacy / t_triaged:.1f}x tables={tables_legacy}->{tables_triaged}"
+            )
+            if tables_triaged < tables_legacy:
+                raise SystemExit(f"Triage lost tables at density {density}")
+
+
+if __name__ == "__main__":
+    main()
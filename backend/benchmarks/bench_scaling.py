@@ -0,0 +1,76 @@
+# benchmarks/bench_scaling.py
+"""Analysis throughput as the number of concurrent workers grows, fully offline.
+
+With --replay-dir the crew runs on recorded LLM/search exchanges (see crew/replay.py,
+REPLAY_LATENCY_SCALE / REPLAY_EXTRA_LATENCY_MS / REPLAY_ERROR_RATE); otherwise on the stub LLM.
+"""
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.corpus import make_pdf
+from benchmarks.harness import init_mongo_standin, install_pipeline_stubs
+
+
+async def run(
+    workdir: Path,
+    pages: int,
+    density: float,
+    analyses: int,
+    workers: List[int],
+    llm_latency: float,
+    replay_dir: Optional[str],
+) -> Dict[str, Any]:
+    await init_mongo_standin()
+
+    from config.settings import settings
+    from crew.replay import Cassette, ReplayLLM
+    from models.document import Document, DocumentStatus
+    from services.analysis_service import process_financial_document
+
+    llm = ReplayLLM(Cassette(replay_dir, "llm"), settings.LLM_MODEL) if replay_dir else None
+    install_pipeline_stubs(llm_latency, llm=llm, replay_search=bool(replay_dir))
+    pdf = make_pdf(workdir / "scaling.pdf", pages, density)
+
+    results: Dict[str, Any] = {"analyses": analyses, "replay": bool(replay_dir), "levels": {}}
+    for level in workers:
+        docs = []
+        for _ in range(analyses):
+            doc = Document(
+                original_filename=pdf.name,
+                filename=pdf.name,
+                file_path=str(pdf),
+                file_size=pdf.stat().st_size,
+                content_type="application/pdf",
+                uploaded_by="bench",
+                status=DocumentStatus.PROCESSING,
+            )
+            await doc.insert()
+            docs.append(doc)
+
+        gate = asyncio.Semaphore(level)
+        failures = 0
+
+        async def one(doc: Document) -> None:
+            nonlocal failures
+            async with gate:
+                try:
+                    await process_financial_document(
+                        query="Provide comprehensive financial analysis",
+                        file_path=str(pdf),
+                        user_id="bench",
+                        document_id=str(doc.id),
+                    )
+                except Exception:
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(d) for d in docs))
+        elapsed = time.perf_counter() - start
+        results["levels"][str(level)] = {
+            "elapsed": elapsed,
+            "analyses_per_s": analyses / elapsed,
+            "failures": failures,
+        }
+    return results
@@ -0,0 +1,94 @@
+# benchmarks/bench_storage.py
+"""Blob storage backends: streaming writes, ranged reads and the node-local read-through cache.
+
+For each backend (local disk, GridFS on the mongomock stand-in, S3 on an
+in-memory stand-in) a synthetic PDF of `--pages` is written as an upload, read
+back in random `--range-kb` ranges, and materialised with `local_path` twice:
+cold (fetched into BLOB_CACHE_DIR) and warm (served from the cache). The bytes
+read back and the cached copy must match the upload; the run fails otherwise.
+
+Usage (from backend/):  python -m benchmarks.bench_storage [--pages 200] [--ranges 50] [--range-kb 64]
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import AsyncIterator
+
+from benchmarks.harness import init_mongo_standin, install_s3_standin, summarize
+from benchmarks.corpus import make_pdf
+
+
+async def _chunks(data: bytes, size: int) -> AsyncIterator[bytes]:
+    for offset in range(0, len(data), size):
+        yield data[offset:offset + size]
+
+
+async def _bench(backend: str, data: bytes, ranges: int, range_bytes: int) -> None:
+    from models.document import Document, DocumentStatus
+    from services import blob_storage
+
+    store = blob_storage.get_store(backend)
+    key = blob_storage.new_key("bench.pdf")
+    start = time.perf_counter()
+    size = await store.write(key, _chunks(data, blob_storage.CHUNK_SIZE), "application/pdf")
+    write_s = time.perf_counter() - start
+
+    rng = random.Random(0)
+    samples = []
+    for _ in range(ranges):
+        offset = rng.randrange(0, max(1, len(data) - range_bytes))
+        start = time.perf_counter()
+        got = b"".join([chunk async for chunk in store.read(key, offset, range_bytes)])
+        samples.append(time.perf_counter() - start)
+        if got != data[offset:offset + range_bytes]:
+            raise SystemExit(f"{backend}: range {offset}+{range_bytes} does not match the upload")
+
+    doc = Document(
+        original_filename="bench.pdf", filename="bench.pdf", file_path=store.local_path(key) or store.uri(key),
+        file_size=size, content_type="application/pdf", content_hash=hashlib.sha256(data).hexdigest(),
+        storage_backend=store.name, storage_key=key, uploaded_by="bench", status=DocumentStatus.UPLOADED,
+    )
+    start = time.perf_counter()
+    path = await blob_storage.local_path(doc)
+    cold_s = time.perf_counter() - start
+    start = time.perf_counter()
+    await blob_storage.local_path(doc)
+    warm_s = time.perf_counter() - start
+    if Path(path).read_bytes() != data:
+        raise SystemExit(f"{backend}: local copy does not match the upload")
+    await store.delete(key)
+
+    ranged = summarize(samples)
+    print(
+        f"{backend}: write {size / 1e6:.1f} MB in {write_s * 1e3:.1f} ms ({size / 1e6 / write_s:.0f} MB/s), "
+        f"{range_bytes // 1024} KB range p50 {ranged['median'] * 1e3:.2f} ms p95 {ranged['p95'] * 1e3:.2f} ms, "
+        f"local_path cold {cold_s * 1e3:.1f} ms warm {warm_s * 1e3:.2f} ms"
+    )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    await init_mongo_standin()
+    standin = install_s3_standin()
+    with tempfile.TemporaryDirectory() as tmp:
+        data = make_pdf(Path(tmp) / "storage.pdf", args.pages, 0.2).read_bytes()
+    for backend in ("local", "gridfs", "s3"):
+        await _bench(backend, data, args.ranges, args.range_kb * 1024)
+    print(f"s3 stand-in requests: {standin.requests}")
+
+
+def main() -> None:
+    logging.getLogger("pdfminer").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--ranges", type=int, default=50)
+    parser.add_argument("--range-kb", type=int, default=64)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# benchmarks/compare.py
+"""Compare two benchmark result files and flag median regressions.
+
+Usage (from backend/):  python -m benchmarks.compare BASE.json HEAD.json [--threshold 0.10]
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, Tuple
+
+
+def _medians(node: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(node, dict):
+        if "median" in node and isinstance(node["median"], (int, float)):
+            yield prefix, float(node["median"])
+        for key, value in node.items():
+            yield from _medians(value, f"{prefix}.{key}" if prefix else key)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    base_medians: Dict[str, float] = dict(_medians(base["results"]))
+    regressions = 0
+
+    print(f"{'benchmark':<70} {base['commit']:>10} {head['commit']:>10} {'change':>8}")
+    for name, value in _medians(head["results"]):
+        if name not in base_medians or not base_medians[name]:
+            continue
+        change = value / base_medians[name] - 1
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<70} {base_medians[name]:>10.4f} {value:>10.4f} {change:>+8.1%}{flag}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# benchmarks/corpus.py
+"""Synthetic financial documents for offline benchmarks."""
+import random
+from pathlib import Path
+from typing import List
+
+import fitz  # PyMuPDF
+from docx import Document as DocxDocument
+
+_NARRATIVE = [
+    "Management believes the Company is well positioned to execute on its long-term strategy.",
+    "Revenue growth was driven by higher volumes across our core segments and improved pricing.",
+    "We continue to invest in research and development to expand our product portfolio.",
+    "Operating expenses increased primarily due to headcount growth and marketing programs.",
+    "Forward-looking statements involve risks and uncertainties that could cause actual results to differ.",
+    "Liquidity remains strong, supported by cash generated from operations and available credit facilities.",
+    "The Board of Directors approved a share repurchase program during the period.",
+    "Supply chain constraints eased during the second half of the fiscal year.",
+]
+
+_STATEMENT_ROWS = [
+    "Total revenues", "Cost of revenues", "Gross profit", "Research and development",
+    "Selling, general and administrative", "Total operating expenses", "Income from operations",
+    "Interest income", "Other income (expense), net", "Income before income taxes",
+    "Provision for income taxes", "Net income", "Cash and cash equivalents", "Accounts receivable",
+    "Inventory", "Total current assets", "Total assets", "Total liabilities",
+]
+
+# Running heads and footers of a typical 10-K, repeated on every page when `running_text` is set.
+_RUNNING_HEAD = [
+    "ACME HOLDINGS, INC.",
+    "Annual Report on Form 10-K for the Fiscal Year Ended December 31, 2024",
+    "Table of Contents",
+]
+_RUNNING_FOOT = [
+    "The accompanying notes are an integral part of these consolidated financial statements. This report contains",
+    "forward-looking statements; see \"Cautionary Note Regarding Forward-Looking Statements\" in Part I, Item 1A.",
+    "Acme Holdings, Inc. | 2024 Form 10-K | {page}",
+]
+
+# Per-page segment figures closing each page when `edge_figures` is set: content, not boilerplate.
+_EDGE_FIGURES = ["Total segment revenue $ {revenue} million", "Operating income $ {income} million"]
+
+_PAGE_W, _PAGE_H = 612, 792
+_MARGIN = 54
+
+
+def _running_text(page: fitz.Page, page_num: int) -> None:
+    for i, line in enumerate(_RUNNING_HEAD):
+        page.insert_text((_MARGIN, 14 + 11 * i), line, fontsize=7)
+    for i, line in enumerate(_RUNNING_FOOT):
+        page.insert_text((_MARGIN, _PAGE_H - 36 + 11 * i), line.format(page=page_num), fontsize=7)
+
+
+def _edge_figures(page: fitz.Page, rng: random.Random) -> None:
+    values = {"revenue": rng.randint(100, 999), "income": rng.randint(10, 99)}
+    for i, line in enumerate(_EDGE_FIGURES):
+        page.insert_text((_MARGIN, _PAGE_H - 14 + 7 * i), line.format(**values), fontsize=6)
+
+
+def _narrative_page(doc: fitz.Document, rng: random.Random, page_num: int, total: int) -> None:
+    page = doc.new_page(width=_PAGE_W, height=_PAGE_H)
+    body = " ".join(rng.choice(_NARRATIVE) for _ in range(28))
+    rect = fitz.Rect(_MARGIN, _MARGIN, _PAGE_W - _MARGIN, _PAGE_H - _MARGIN - 20)
+    page.insert_textbox(rect, body, fontsize=10)
+    page.insert_text((_MARGIN, _PAGE_H - _MARGIN), f"Page {page_num} of {total}", fontsize=8)
+
+
+def _table_page(doc: fitz.Document, rng: random.Random, page_num: int, total: int) -> None:
+    page = doc.new_page(width=_PAGE_W, height=_PAGE_H)
+    page.insert_text((_MARGIN, _MARGIN), "CONSOLIDATED STATEMENTS OF OPERATIONS", fontsize=12)
+    page.insert_text((_MARGIN, _MARGIN + 16), "(in millions, except per share data)", fontsize=9)
+    cols = [_MARGIN, 330, 420, 510]
+    y = _MARGIN + 40
+    header = ["", "2024", "2023", "2022"]
+    for x, label in zip(cols, header):
+        page.insert_text((x + 4, y), label, fontsize=9)
+    y += 6
+    row_h = 18
+    rows = rng.sample(_STATEMENT_ROWS, k=min(len(_STATEMENT_ROWS), 16))
+    top = y
+    for label in rows:
+        page.draw_line((cols[0], y), (_PAGE_W - _MARGIN + 20, y), width=0.5)
+        y += row_h
+        page.insert_text((cols[0] + 4, y - 5), label, fontsize=9)
+        for x in cols[1:]:
+            page.insert_text((x + 4, y - 5), f"{rng.randint(100, 99999):,}", fontsize=9)
+    page.draw_line((cols[0], y), (_PAGE_W - _MARGIN + 20, y), width=0.5)
+    for x in cols + [_PAGE_W - _MARGIN + 20]:
+        page.draw_line((x, top), (x, y), width=0.5)
+    page.insert_text((_MARGIN, _PAGE_H - _MARGIN), f"Page {page_num} of {total}", fontsize=8)
+
+
+def make_pdf(
+    path: Path, pages: int = 40, table_density: float = 0.2, seed: int = 0, running_text: bool = False,
+    edge_figures: bool = False,
+) -> Path:
+    """Write a PDF where roughly `table_density` of pages are ruled financial statements.
+
+    `running_text` adds a 10-K style running head and footer to every page;
+    `edge_figures` ends every page with segment figures that differ per page.
+    """
+    rng = random.Random(seed)
+    kinds = _page_kinds(rng, pages, table_density)
+    doc = fitz.open()
+    try:
+        for i, is_table in enumerate(kinds, start=1):
+            if is_table:
+                _table_page(doc, rng, i, pages)
+            else:
+                _narrative_page(doc, rng, i, pages)
+            if running_text:
+                _running_text(doc[-1], i)
+            if edge_figures:
+                _edge_figures(doc[-1], rng)
+        doc.save(str(path))
+    finally:
+        doc.close()
+    return path
+
+
+def _page_kinds(rng: random.Random, pages: int, table_density: float) -> List[bool]:
+    n_tables = round(pages * table_density)
+    kinds = [True] * n_tables + [False] * (pages - n_tables)
+    rng.shuffle(kinds)
+    return kinds
+
+
+def make_docx(path: Path, sections: int = 40, table_density: float = 0.2, seed: int = 0) -> Path:
+    """Write a DOCX of `sections` narrative blocks, a share of them followed by a statement table."""
+    rng = random.Random(seed)
+    doc = DocxDocument()
+    for is_table in _page_kinds(rng, sections, table_density):
+        for _ in range(6):
+            doc.add_paragraph(" ".join(rng.choice(_NARRATIVE) for _ in range(4)))
+        if is_table:
+            doc.add_paragraph("CONSOLIDATED BALANCE SHEETS (in millions)")
+            rows = rng.sample(_STATEMENT_ROWS, k=12)
+            table = doc.add_table(rows=len(rows) + 1, cols=4)
+            for col, label in enumerate(["", "2024", "2023", "2022"]):
+                table.cell(0, col).text = label
+            for r, label in enumerate(rows, start=1):
+                table.cell(r, 0).text = label
+                for col in range(1, 4):
+                    table.cell(r, col).text = f"{rng.randint(100, 99999):,}"
+    doc.save(str(path))
+    return path
+
+
+def make_txt(path: Path, pages: int = 40, table_density: float = 0.2, seed: int = 0) -> Path:
+    """Write a plain-text filing with page footers and whitespace-aligned statements."""
+    rng = random.Random(seed)
+    lines: List[str] = []
+    for page_num, is_table in enumerate(_page_kinds(rng, pages, table_density), start=1):
+        if is_table:
+            lines.append("CONSOLIDATED STATEMENTS OF OPERATIONS  (in thousands)")
+            for label in rng.sample(_STATEMENT_ROWS, k=16):
+                values = "   ".join(f"$ {rng.randint(100, 99999):,}" for _ in range(3))
+                lines.append(f"{label:<40}\t{values}")
+        else:
+            for _ in range(12):
+                lines.append(" ".join(rng.choice(_NARRATIVE) for _ in range(3)))
+                lines.append("")
+        lines.append(f"Page {page_num} of {pages}\r\n\r\n\r\n")
+    path.write_text("\n".join(lines), encoding="utf-8")
+    return path
+
+
+MAKERS = {".pdf": make_pdf, ".docx": make_docx, ".txt": make_txt}
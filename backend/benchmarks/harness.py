@@ -0,0 +1,208 @@
+# benchmarks/harness.py
+"""Shared plumbing for the offline benchmarks: timing, Mongo and S3 stand-ins, stubbed LLM and search.
+
+Import this module before any application module so the environment defaults below
+are in place when `config.settings` is first loaded.
+"""
+import os
+import re
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("RATE_LIMIT_CALLS", "1000000000")
+os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="bench-uploads-"))
+os.environ.setdefault("BLOB_CACHE_DIR", tempfile.mkdtemp(prefix="bench-blob-cache-"))
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in seconds."""
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "n": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": pct(95),
+        "p99": pct(99),
+        "max": ordered[-1],
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def measure_async(fn: Callable[[], Awaitable[Any]], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+_gridfs_patch: Any = None
+
+
+async def init_mongo_standin(database: str = "bench") -> None:
+    """Initialise Beanie against an in-process mongomock database (GridFS included)."""
+    global _gridfs_patch
+    from beanie import init_beanie
+    from mongomock_motor import AsyncMongoMockClient, enabled_gridfs_integration
+    from models.document import AnalysisCacheEntry, AnalyticsRollup, Document, DocumentPage
+    from models.user import User
+
+    if _gridfs_patch is None:
+        # Patches motor's GridFS for mongomock for the rest of the process.
+        _gridfs_patch = enabled_gridfs_integration()
+        _gridfs_patch.__enter__()
+    client = AsyncMongoMockClient()
+    await init_beanie(database=client[database], document_models=[User, Document, DocumentPage, AnalysisCacheEntry, AnalyticsRollup])
+
+
+class S3StandIn:
+    """In-memory S3 for an httpx MockTransport: PUT/GET (with Range)/HEAD/DELETE and multipart uploads.
+
+    Signatures are not checked; `requests` counts calls by method.
+    """
+
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+        self.uploads: Dict[str, Dict[int, bytes]] = {}
+        self.requests: Dict[str, int] = {}
+
+    def transport(self):
+        import httpx
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request):
+        import httpx
+        method, params = request.method, request.url.params
+        self.requests[method] = self.requests.get(method, 0) + 1
+        key = request.url.path
+        if method == "POST" and "uploads" in params:
+            upload_id = uuid.uuid4().hex
+            self.uploads[upload_id] = {}
+            return httpx.Response(200, text=f"<InitiateMultipartUploadResult><UploadId>{upload_id}</UploadId>"
+                                             "</InitiateMultipartUploadResult>")
+        if method == "PUT" and "uploadId" in params:
+            body = request.read()
+            self.uploads[params["uploadId"]][int(params["partNumber"])] = body
+            return httpx.Response(200, headers={"ETag": f'"{uuid.uuid4().hex}"'})
+        if method == "POST" and "uploadId" in params:
+            parts = self.uploads.pop(params["uploadId"])
+            self.objects[key] = b"".join(parts[number] for number in sorted(parts))
+            return httpx.Response(200, text="<CompleteMultipartUploadResult/>")
+        if method == "DELETE" and "uploadId" in params:
+            self.uploads.pop(params["uploadId"], None)
+            return httpx.Response(204)
+        if method == "PUT":
+            self.objects[key] = request.read()
+            return httpx.Response(200, headers={"ETag": '"single"'})
+        if key not in self.objects:
+            return httpx.Response(404, text="<Error><Code>NoSuchKey</Code></Error>")
+        data = self.objects[key]
+        if method == "DELETE":
+            del self.objects[key]
+            return httpx.Response(204)
+        if method == "HEAD":
+            return httpx.Response(200, headers={"Content-Length": str(len(data))})
+        match = re.match(r'bytes=(\d+)-(\d*)$', request.headers.get("range", ""))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), len(data) - 1) if match.group(2) else len(data) - 1
+            return httpx.Response(206, content=data[start:end + 1],
+                                  headers={"Content-Range": f"bytes {start}-{end}/{len(data)}"})
+        return httpx.Response(200, content=data)
+
+
+def install_s3_standin() -> S3StandIn:
+    """Serve the "s3" storage backend from an in-memory stand-in."""
+    from config.settings import settings
+    from services.blob_storage import S3BlobStore, use_store
+
+    standin = S3StandIn()
+    use_store(S3BlobStore(
+        "http://s3.standin", "bench", settings.S3_REGION, "bench", "bench-secret",
+        settings.S3_PART_SIZE_MB * 1024 * 1024, transport=standin.transport(),
+    ))
+    return standin
+
+
+_CANNED_ANSWER = (
+    "Thought: I now know the final answer\n"
+    "Final Answer: Status: VERIFIED. Revenue grew 12% to $4,200 million with stable margins; "
+    "liquidity is adequate and leverage moderate. Overall risk MEDIUM. Recommendation: HOLD."
+)
+
+
+def make_stub_llm(latency: float = 0.0):
+    """A crewai BaseLLM that answers immediately (after `latency` seconds) without network."""
+    from crewai import BaseLLM
+
+    class StubLLM(BaseLLM):
+        def __init__(self):
+            super().__init__(model="stub-llm", temperature=0.0)
+            self.calls = 0
+
+        def call(
+            self,
+            messages: Union[str, List[Dict[str, str]]],
+            tools: Optional[List[dict]] = None,
+            callbacks: Optional[List[Any]] = None,
+            available_functions: Optional[Dict[str, Any]] = None,
+        ) -> str:
+            self.calls += 1
+            if latency:
+                time.sleep(latency)
+            return _CANNED_ANSWER
+
+    return StubLLM()
+
+
+def install_pipeline_stubs(llm_latency: float = 0.0, llm: Any = None, replay_search: bool = False):
+    """Point every crew agent at `llm` (default: a stub LLM) and take search off the network.
+
+    With `replay_search` the Serper tool serves recordings from REPLAY_DIR, otherwise canned results.
+    """
+    from crew.factory import PIPELINE, reset_warm_pool
+    from crew.metering import metered
+    from crew.replay import ReplaySearchTool
+    from crew.routing import routed
+    from tools.search_tool import SerperSearchTool
+
+    stub = llm or make_stub_llm(llm_latency)
+    clients: Dict[str, Any] = {}
+
+    def client(model: str) -> Any:
+        # One stand-in answers for every model; metering and routing still see the routed model names.
+        if model not in clients:
+            clients[model] = metered(stub)
+            clients[model].model = model
+        return clients[model]
+
+    for stage in PIPELINE:
+        stage.agent.llm = routed(stage.name, client)
+    if replay_search:
+        SerperSearchTool._search = ReplaySearchTool._search
+    else:
+        SerperSearchTool._search = lambda self, **kwargs: {"organic": [], "searchParameters": {"q": kwargs.get("query")}}
+    reset_warm_pool()
+    return stub
@@ -0,0 +1,306 @@
+# benchmarks/loadtest.py
+"""HTTP load generator replaying a realistic user mix against the API.
+
+Each virtual user registers, logs in, then loops over a weighted mix of upload,
+analyze, poll-detail and list calls. Runs one or more concurrency levels and
+reports throughput, p50/p95/p99 per route and event-loop lag.
+
+In-process (default): the app is served by uvicorn on this event loop with its
+real startup and shutdown (CPU process pool, crew listeners, stale-run expiry),
+against a mongomock database with the stub crew, so loop lag is sampled directly.
+Against a server (--base-url): lag comes from the server's event_loop_lag_seconds
+histogram on /metrics.
+
+Usage (from backend/):
+    python -m benchmarks.loadtest --users 1 8 32 --duration 20 \\
+        --budget "POST /api/v1/documents/upload:p95=0.5" --budget "*:p99=2.0"
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import socket
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.harness import init_mongo_standin, install_pipeline_stubs, summarize
+
+QUERY = "Provide comprehensive financial analysis"
+MIX = (
+    ("upload", 2),
+    ("analyze", 1),
+    ("detail", 4),
+    ("list", 3),
+)
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, route: str, seconds: float, ok: bool) -> None:
+        self.samples.setdefault(route, []).append(seconds)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, body: bytes, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.body = body
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+        self.doc_ids: List[str] = []
+        self.unanalyzed: List[str] = []  # a document already queued would get 409
+
+    async def call(self, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.add(route, time.perf_counter() - start, ok=False)
+            return None
+        self.recorder.add(route, time.perf_counter() - start, ok=response.status_code < 400)
+        return response
+
+    async def sign_in(self) -> bool:
+        name = f"load-{uuid.uuid4().hex[:12]}"
+        form = {"email": f"{name}@example.com", "username": name, "full_name": name, "password": "load-pass"}
+        await self.call("POST /auth/register", "POST", "/auth/register", data=form)
+        login = await self.call("POST /auth/login", "POST", "/auth/login",
+                                data={"username": name, "password": "load-pass"})
+        if login is None or login.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        return True
+
+    async def step(self) -> None:
+        action = self.rng.choices([a for a, _ in MIX], weights=[w for _, w in MIX])[0]
+        if action == "upload" or not self.doc_ids or (action == "analyze" and not self.unanalyzed):
+            files = {"file": (f"{uuid.uuid4().hex[:8]}.txt", self.body, "text/plain")}
+            response = await self.call("POST /api/v1/documents/upload", "POST", "/api/v1/documents/upload", files=files)
+            if response is not None and response.status_code == 200:
+                self.doc_ids.append(response.json()["id"])
+                self.unanalyzed.append(response.json()["id"])
+        elif action == "analyze":
+            doc_id = self.unanalyzed.pop(self.rng.randrange(len(self.unanalyzed)))
+            await self.call("POST /api/v1/analyze/{doc_id}", "POST", f"/api/v1/analyze/{doc_id}", data={"query": QUERY})
+        elif action == "detail":
+            doc_id = self.rng.choice(self.doc_ids)
+            await self.call("GET /api/v1/documents/{doc_id}", "GET", f"/api/v1/documents/{doc_id}")
+        else:
+            await self.call("GET /api/v1/documents", "GET", "/api/v1/documents", params={"limit": 50})
+
+
+class LagSampler:
+    """Samples scheduling delay of the loop this coroutine runs on."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples: List[float] = []
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+
+async def _scrape_lag(client: httpx.AsyncClient) -> Optional[Tuple[float, float, Dict[float, float]]]:
+    from prometheus_client.parser import text_string_to_metric_families
+
+    try:
+        text = (await client.get("/metrics")).text
+    except httpx.HTTPError:
+        return None
+    for family in text_string_to_metric_families(text):
+        if family.name != "event_loop_lag_seconds":
+            continue
+        total = count = 0.0
+        buckets: Dict[float, float] = {}
+        for sample in family.samples:
+            if sample.name.endswith("_sum"):
+                total = sample.value
+            elif sample.name.endswith("_count"):
+                count = sample.value
+            elif sample.name.endswith("_bucket"):
+                buckets[float(sample.labels["le"])] = sample.value
+        return total, count, buckets
+    return None
+
+
+def _lag_from_scrapes(before, after) -> Dict[str, Any]:
+    if not before or not after or after[1] <= before[1]:
+        return {"source": "server", "available": False}
+    count = after[1] - before[1]
+    p99 = next(
+        (le for le in sorted(after[2]) if after[2][le] - before[2].get(le, 0.0) >= 0.99 * count),
+        float("inf"),
+    )
+    return {"source": "server", "samples": count, "mean": (after[0] - before[0]) / count, "p99_upper_bound": p99}
+
+
+async def run_level(base_url: str, users: int, duration: float, body: bytes, seed: int,
+                    in_process: bool) -> Dict[str, Any]:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=users * 2, max_keepalive_connections=users * 2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        sampler = LagSampler()
+        sampler_task = asyncio.create_task(sampler.run()) if in_process else None
+        before = None if in_process else await _scrape_lag(client)
+
+        async def user_loop(i: int) -> None:
+            user = VirtualUser(client, recorder, body, random.Random(seed + i))
+            if not await user.sign_in():
+                return
+            # The mix runs for `duration` after sign-in, so slow logins do not starve it.
+            deadline = time.perf_counter() + duration
+            while time.perf_counter() < deadline:
+                await user.step()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user_loop(i) for i in range(users)))
+        elapsed = time.perf_counter() - start
+
+        if sampler_task:
+            sampler_task.cancel()
+            lag = {"source": "client", **summarize(sampler.samples)} if sampler.samples else {}
+        else:
+            lag = _lag_from_scrapes(before, await _scrape_lag(client))
+
+    total = sum(len(v) for v in recorder.samples.values())
+    return {
+        "users": users,
+        "elapsed": elapsed,
+        "requests": total,
+        "throughput_rps": total / elapsed,
+        "routes": {
+            route: {
+                **summarize(values),
+                "rps": len(values) / elapsed,
+                "errors": recorder.errors.get(route, 0),
+            }
+            for route, values in sorted(recorder.samples.items())
+        },
+        "event_loop_lag": lag,
+    }
+
+
+def _parse_budget(spec: str) -> Tuple[str, str, float]:
+    """'ROUTE:pNN=SECONDS' (ROUTE may be '*')."""
+    route, _, rest = spec.rpartition(":")
+    pct, _, seconds = rest.partition("=")
+    if not route or pct not in ("p50", "p95", "p99", "median", "max") or not seconds:
+        raise argparse.ArgumentTypeError(f"Invalid budget {spec!r}; expected ROUTE:p95=SECONDS")
+    return route, "median" if pct == "p50" else pct, float(seconds)
+
+
+def check_budgets(levels: List[Dict[str, Any]], budgets: List[Tuple[str, str, float]]) -> List[str]:
+    violations = []
+    for level in levels:
+        for route, stats in level["routes"].items():
+            for b_route, pct, limit in budgets:
+                if b_route in ("*", route) and stats[pct] > limit:
+                    violations.append(
+                        f"users={level['users']} {route} {pct}={stats[pct]:.3f}s > budget {limit:.3f}s"
+                    )
+    return violations
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    from benchmarks.corpus import make_txt
+
+    tmp_body = Path(args.workdir) / "load.txt"
+    body = make_txt(tmp_body, pages=args.pages).read_bytes()
+    server = serve_task = None
+    base_url = args.base_url
+
+    if not base_url:
+        import uvicorn
+        import main as app_main
+        from config.settings import settings
+
+        async def connect_standin() -> None:
+            await init_mongo_standin("loadtest")
+
+        async def close_standin() -> None:
+            pass
+
+        # The app's own startup runs (process pool, listeners, expiry); only Mongo is the stand-in.
+        app_main.connect_to_mongo, app_main.close_mongo_connection = connect_standin, close_standin
+        install_pipeline_stubs(args.llm_latency)
+        port = _free_port()
+        server = uvicorn.Server(uvicorn.Config(app_main.create_app(), host="127.0.0.1", port=port,
+                                               lifespan="on", log_level="warning"))
+        serve_task = asyncio.create_task(server.serve())
+        while not server.started:
+            if serve_task.done():
+                serve_task.result()
+                raise SystemExit("In-process server failed to start")
+            await asyncio.sleep(0.01)
+        base_url = f"http://127.0.0.1:{port}"
+        print(f"in-process: app lifespan on, CPU pool workers={settings.CPU_POOL_WORKERS}, Mongo stand-in")
+
+    levels = []
+    try:
+        for users in args.users:
+            level = await run_level(base_url, users, args.duration, body, args.seed, in_process=server is not None)
+            levels.append(level)
+            print(f"users={users:<4} {level['throughput_rps']:8.1f} req/s  loop lag: {level['event_loop_lag']}")
+            for route, stats in level["routes"].items():
+                print(f"    {route:<36} n={stats['n']:<6} p50={stats['median'] * 1e3:8.1f}ms "
+                      f"p95={stats['p95'] * 1e3:8.1f}ms p99={stats['p99'] * 1e3:8.1f}ms errors={stats['errors']}")
+    finally:
+        if server is not None:
+            server.should_exit = True
+            await serve_task
+
+    report = {"base_url": args.base_url or "in-process", "duration": args.duration, "levels": levels}
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    violations = check_budgets(levels, args.budget)
+    for v in violations:
+        print(f"BUDGET EXCEEDED: {v}")
+    return 1 if violations else 0
+
+
+def main() -> None:
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="HTTP load test")
+    parser.add_argument("--base-url", default=None, help="Target server; default serves the app in-process")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 8, 32], help="Concurrency levels")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per level")
+    parser.add_argument("--pages", type=int, default=20, help="Pages in the uploaded synthetic TXT")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub LLM seconds per call (in-process)")
+    parser.add_argument("--budget", type=_parse_budget, action="append", default=[],
+                        help="Latency budget ROUTE:p95=SECONDS (ROUTE may be '*'); repeatable")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as workdir:
+        args.workdir = workdir
+        sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
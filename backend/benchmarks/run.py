@@ -0,0 +1,86 @@
+# benchmarks/run.py
+"""Run the offline benchmark suite and write the results as JSON.
+
+Usage (from backend/):
+    python -m benchmarks.run --suite extraction api pipeline --output benchmarks/results/HEAD.json
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/HEAD.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+from benchmarks import harness  # noqa: F401  (sets the offline environment first)
+
+SUITES = ("extraction", "api", "pipeline", "scaling")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES[:3]))
+    parser.add_argument("--pages", type=int, default=40, help="Pages (or DOCX sections) per synthetic document")
+    parser.add_argument("--density", type=float, default=0.2, help="Share of pages holding financial tables")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=50, help="Requests per API route")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Synthetic seconds per stub LLM call")
+    parser.add_argument("--analyses", type=int, default=16, help="Analyses per worker level (scaling)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker levels (scaling)")
+    parser.add_argument("--replay-dir", default=None, help="Recorded LLM/search exchanges (scaling)")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    if args.replay_dir:
+        os.environ["REPLAY_DIR"] = args.replay_dir
+
+    logging.getLogger("pdfminer").setLevel(logging.ERROR)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    report: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        if "extraction" in args.suite:
+            from benchmarks import bench_extraction
+            report["results"]["extraction"] = bench_extraction.run(workdir, args.pages, args.density, args.repeat)
+        if "api" in args.suite:
+            from benchmarks import bench_api
+            report["results"]["api"] = asyncio.run(bench_api.run(args.requests))
+        if "pipeline" in args.suite:
+            from benchmarks import bench_pipeline
+            report["results"]["pipeline"] = asyncio.run(
+                bench_pipeline.run(workdir, args.pages, args.density, args.repeat, args.llm_latency)
+            )
+        if "scaling" in args.suite:
+            from benchmarks import bench_scaling
+            report["results"]["scaling"] = asyncio.run(bench_scaling.run(
+                workdir, args.pages, args.density, args.analyses, args.workers, args.llm_latency, args.replay_dir
+            ))
+
+    output = args.output or Path(__file__).parent / "results" / f"{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import Dict, List
 from pydantic import Field, validator
 from pydantic_settings import BaseSettings
 
@@ -50,12 +50,111 @@ class Settings(BaseSettings):
         description="LLM temperature"
     )
     
+    LLM_REQUEST_TIMEOUT: int = Field(
+        default=120,
+        description="Per-request LLM timeout in seconds"
+    )
+    LLM_PRICING: Dict[str, Dict[str, float]] = Field(
+        default={
+            "gpt-4.1-nano": {"prompt": 0.10, "completion": 0.40},
+            "gpt-4o-mini": {"prompt": 0.15, "completion": 0.60},
+            "gpt-4o": {"prompt": 2.50, "completion": 10.00},
+        },
+        description="USD per million prompt/completion tokens by model; unlisted models are costed at 0"
+    )
+    LLM_STAGE_MODELS: Dict[str, List[str]] = Field(
+        # Only verification has a low-confidence check (crew/routing.py); a cheap-first chain for another
+        # stage would accept any parseable answer from its first model.
+        default={"verification": ["gpt-4.1-nano", "gpt-4o-mini"]},
+        description="Per-stage model fallback chains, fastest first; unlisted stages use LLM_MODEL"
+    )
+    LLM_STAGE_LATENCY_BUDGETS: Dict[str, float] = Field(
+        default={"verification": 20},
+        description="Seconds a call may take on any but the last model of a stage's chain before it escalates"
+    )
+    
+    # Analysis deadlines
+    ANALYSIS_TIMEOUT_SECONDS: int = Field(
+        default=900,
+        description="Overall deadline for one analysis, counted from when it was queued"
+    )
+    STAGE_TIMEOUT_SECONDS: Dict[str, float] = Field(
+        default={"verification": 120, "analysis": 300, "risk": 240, "recommendation": 240},
+        description="Per-stage deadlines in seconds"
+    )
+    ANALYSIS_CACHE_TTL_SECONDS: int = Field(
+        default=7 * 24 * 3600,
+        ge=0,
+        description="How long a completed analysis is reused for the same file, query and model (0 disables)"
+    )
+    
+    # Verification stage
+    LOCAL_VERIFIER_ENABLED: bool = Field(
+        default=True,
+        description="Try the deterministic verifier before the LLM verifier agent"
+    )
+    VERIFIER_MIN_CONFIDENCE: float = Field(
+        default=0.8,
+        ge=0.0,
+        le=1.0,
+        description="Local verdicts at or above this confidence replace the LLM verification stage"
+    )
+    
+    # Crew construction
+    CREW_MEMORY_BACKEND: str = Field(
+        default="none",
+        description="none | local (per-run short-term, entity and long-term stores under CREW_MEMORY_DIR)"
+    )
+    CREW_MEMORY_DIR: str = Field(
+        default="crew_memory",
+        description="Directory for per-run crew memory stores"
+    )
+    CREW_WARM_POOL_SIZE: int = Field(
+        default=2,
+        ge=0,
+        description="Isolated agent sets prebuilt in the background for upcoming runs (0 builds on demand)"
+    )
+    
     # Search API
     SERPER_API_KEY: str = Field(
         default="",
         description="Serper.dev API key for web search"
     )
     
+    # LLM/search record & replay (offline load testing)
+    REPLAY_MODE: str = Field(
+        default="off",
+        description="off | record | replay"
+    )
+    REPLAY_DIR: str = Field(
+        default="replays",
+        description="Directory holding recorded LLM/search exchanges"
+    )
+    REPLAY_STRICT: bool = Field(
+        default=False,
+        description="Fail on unrecorded requests instead of serving a deterministic stand-in"
+    )
+    REPLAY_LATENCY_SCALE: float = Field(
+        default=1.0,
+        ge=0.0,
+        description="Multiplier applied to recorded latency during replay"
+    )
+    REPLAY_EXTRA_LATENCY_MS: float = Field(
+        default=0.0,
+        ge=0.0,
+        description="Fixed latency added to every replayed call"
+    )
+    REPLAY_ERROR_RATE: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=1.0,
+        description="Probability that a replayed call raises an injected error"
+    )
+    REPLAY_SEED: int = Field(
+        default=0,
+        description="Seed for replay error injection"
+    )
+    
     # File Upload Configuration
     MAX_FILE_SIZE: int = Field(
         default=100 * 1024 * 1024,  # 100MB
@@ -67,7 +166,116 @@ class Settings(BaseSettings):
     )
     UPLOAD_DIR: str = Field(
         default="uploads",
-        description="Upload directory path"
+        description="Upload directory path (local storage backend)"
+    )
+    
+    # Blob storage for uploaded files
+    STORAGE_BACKEND: str = Field(
+        default="local",
+        description="local (UPLOAD_DIR) | gridfs (GRIDFS_BUCKET) | s3 (S3_* settings) for new uploads"
+    )
+    GRIDFS_BUCKET: str = Field(
+        default="uploads",
+        description="GridFS bucket name"
+    )
+    S3_ENDPOINT_URL: str = Field(
+        default="https://s3.amazonaws.com",
+        description="S3-compatible endpoint; buckets are addressed path-style"
+    )
+    S3_BUCKET: str = Field(
+        default="",
+        description="S3 bucket for uploads"
+    )
+    S3_REGION: str = Field(
+        default="us-east-1",
+        description="S3 signing region"
+    )
+    S3_ACCESS_KEY_ID: str = Field(
+        default="",
+        description="S3 access key id"
+    )
+    S3_SECRET_ACCESS_KEY: str = Field(
+        default="",
+        description="S3 secret access key"
+    )
+    S3_PART_SIZE_MB: int = Field(
+        default=8,
+        ge=5,
+        description="Multipart upload part size in MB (S3 requires at least 5)"
+    )
+    S3_TIMEOUT_SECONDS: float = Field(
+        default=60.0,
+        gt=0,
+        description="Timeout of one S3 request"
+    )
+    BLOB_CACHE_DIR: str = Field(
+        default="blob_cache",
+        description="Node-local read-through cache of files kept in GridFS or S3"
+    )
+    BLOB_CACHE_MAX_MB: int = Field(
+        default=2048,
+        ge=0,
+        description="Size past which the least recently used cached files are evicted (0 never evicts)"
+    )
+    PDF_TRIAGE_ENABLED: bool = Field(
+        default=True,
+        description="Classify PDF pages first and run table extraction only on table pages"
+    )
+    BOILERPLATE_MIN_PAGE_SHARE: float = Field(
+        default=0.5,
+        gt=0.0,
+        le=1.0,
+        description="Share of PDF pages a header/footer/disclaimer line must recur on to be dropped after its first copy"
+    )
+    BOILERPLATE_MIN_PAGES: int = Field(
+        default=4,
+        ge=0,
+        description="PDFs with fewer pages keep every line (0 disables boilerplate removal)"
+    )
+    BOILERPLATE_WINDOW_PAGES: int = Field(
+        default=16,
+        ge=1,
+        description="Leading PDF pages buffered to decide which lines repeat; later pages stream through"
+    )
+    EAGER_EXTRACTION_ENABLED: bool = Field(
+        default=True,
+        description="Parse, index and extract metrics in the background as soon as a document is uploaded"
+    )
+    PARSE_CACHE_DIR: str = Field(
+        default="parse_cache",
+        description="Directory for cached extracted text, keyed by file path, size and mtime (empty disables)"
+    )
+    
+    # CPU-bound work (parsing, cleaning, metric extraction)
+    CPU_POOL_WORKERS: int = Field(
+        default=max(1, min(4, (os.cpu_count() or 2) - 1)),
+        ge=0,
+        description="Worker processes for CPU-bound work (0 runs it on threads in the API process)"
+    )
+    CPU_POOL_MAX_QUEUED: int = Field(
+        default=16,
+        ge=0,
+        description="Tasks allowed to wait for a free worker before further callers block"
+    )
+    CPU_TASK_TIMEOUT_SECONDS: float = Field(
+        default=300.0,
+        gt=0,
+        description="Per-task timeout; also bounds how long a caller waits for a pool slot"
+    )
+    CPU_POOL_MAX_TASKS_PER_CHILD: int = Field(
+        default=50,
+        ge=0,
+        description="Tasks a worker process runs before it is replaced (0 never recycles)"
+    )
+    CPU_WORKER_MEMORY_MB: int = Field(
+        default=2048,
+        ge=0,
+        description="Address-space limit (RLIMIT_AS) of each worker process in MB (0 leaves it unlimited)"
+    )
+    CPU_TASK_CPU_SECONDS: float = Field(
+        default=120.0,
+        ge=0,
+        description="CPU time one task may use in its worker (RLIMIT_CPU; 0 leaves it unlimited)"
     )
     
     # Rate Limiting
@@ -79,6 +287,17 @@ class Settings(BaseSettings):
         default=3600,  # 1 hour
         description="Rate limit period in seconds"
     )
+    EXPORT_BATCH_SIZE: int = Field(
+        default=500,
+        ge=1,
+        description="Documents fetched per cursor batch when streaming an export"
+    )
+    
+    # Observability
+    METRICS_ENABLED: bool = Field(
+        default=True,
+        description="Expose Prometheus metrics at /metrics"
+    )
     
     # CORS Configuration
     BACKEND_CORS_ORIGINS: List[str] = Field(
@@ -101,12 +320,41 @@ class Settings(BaseSettings):
     def DEBUG(self) -> bool:
         return self.ENVIRONMENT.lower() in ["development", "dev", "debug"]
     
+    def models_for(self, stage: str) -> List[str]:
+        """Model fallback chain of a crew stage."""
+        return list(self.LLM_STAGE_MODELS.get(stage) or [self.LLM_MODEL])
+    
     @validator("SECRET_KEY")
     def validate_secret_key(cls, v):
         if not v or len(v) < 32:
             raise ValueError("SECRET_KEY must be at least 32 characters long")
         return v
     
+    @validator("REPLAY_MODE")
+    def validate_replay_mode(cls, v):
+        if v not in ("off", "record", "replay"):
+            raise ValueError("REPLAY_MODE must be one of: off, record, replay")
+        return v
+    
+    @validator("STORAGE_BACKEND")
+    def validate_storage_backend(cls, v):
+        if v not in ("local", "gridfs", "s3"):
+            raise ValueError("STORAGE_BACKEND must be one of: local, gridfs, s3")
+        return v
+    
+    @validator("CREW_MEMORY_BACKEND")
+    def validate_crew_memory_backend(cls, v):
+        if v not in ("none", "local"):
+            raise ValueError("CREW_MEMORY_BACKEND must be one of: none, local")
+        return v
+    
+    @validator("LLM_STAGE_MODELS")
+    def validate_llm_stage_models(cls, v):
+        for stage, chain in v.items():
+            if not chain or not all(chain):
+                raise ValueError(f"LLM_STAGE_MODELS[{stage!r}] must list at least one model")
+        return v
+    
     @validator("OPENAI_API_KEY")
     def validate_openai_key(cls, v):
         if not v:
@@ -1,85 +1,94 @@
 import logging
+from functools import lru_cache
 from dotenv import load_dotenv
 load_dotenv()
 
-from crewai import Agent
-from langchain_openai import ChatOpenAI
+from crewai import LLM, Agent
 from tools.financial_tools import ParseDocTool,ExtractMetricsTool
-from tools.search_tool import SerperSearchTool
+from crew.metering import MeteredLLM, metered
+from crew.replay import build_llm, build_search_tool
+from crew.routing import routed
 from config.settings import settings
+from services.analysis_control import checkpoint
 
 logger = logging.getLogger(__name__)
 
 parse_financial_doc = ParseDocTool()
 extract_financial_metrics_tool = ExtractMetricsTool()
-search_tool = SerperSearchTool()
+search_tool = build_search_tool()
+
+
+# One client per model (wrapped by the record/replay stand-in when REPLAY_MODE is set, then metered),
+# shared by every stage whose fallback chain lists it. Built as a crewai LLM directly: converting a
+# LangChain ChatOpenAI drops its request_timeout, leaving calls without a time limit.
+@lru_cache(maxsize=None)
+def llm_client(model: str) -> MeteredLLM:
+    return metered(build_llm(LLM(
+        model=model,
+        temperature=settings.LLM_TEMPERATURE,
+        api_key=settings.OPENAI_API_KEY,
+        max_retries=3,
+        timeout=settings.LLM_REQUEST_TIMEOUT,
+    ), model))
 
-# Initialize LLM
-llm = ChatOpenAI(
-    model=settings.LLM_MODEL,
-    temperature=settings.LLM_TEMPERATURE,
-    api_key=settings.OPENAI_API_KEY,
-    max_retries=3,
-    request_timeout=120,
-)
 
 financial_analyst = Agent(
     role="Senior Financial Analyst",
     goal="Provide accurate, comprehensive financial analysis based on the query: {query}",
     verbose=True,
-    memory=True,
     backstory=(
         "Experienced financial analyst with 15+ years in banking and equity research. "
         "Analyze statements, compute ratios, and provide balanced insights with risks."
     ),
     tools=[parse_financial_doc, extract_financial_metrics_tool, search_tool],
-    llm=llm,
+    llm=routed("analysis", llm_client),
     max_iter=3,
     max_rpm=60,
     allow_delegation=False,
+    step_callback=checkpoint,
 )
 
 document_verifier = Agent(
     role="Financial Document Validator",
     goal="Verify document authenticity and extract key financial data with high accuracy",
     verbose=True,
-    memory=True,
     backstory=(
         "Specialist in GAAP/IFRS/SEC reporting. Validate integrity and extract accurate data."
     ),
     tools=[parse_financial_doc, search_tool],
-    llm=llm,
+    llm=routed("verification", llm_client),
     max_iter=2,
     max_rpm=60,
     allow_delegation=False,
+    step_callback=checkpoint,
 )
 
 investment_advisor = Agent(
     role="Investment Strategy Advisor",
     goal="Provide strategic investment recommendations based on comprehensive financial analysis",
     verbose=True,
-    memory=True,
     backstory=(
         "CFA charterholder focused on portfolio management, risk, and allocation."
     ),
     tools=[search_tool],
-    llm=llm,
+    llm=routed("recommendation", llm_client),
     max_iter=3,
     max_rpm=60,
     allow_delegation=False,
+    step_callback=checkpoint,
 )
 
 risk_assessor = Agent(
     role="Financial Risk Assessment Expert",
     goal="Conduct thorough risk analysis and provide comprehensive risk management strategies",
     verbose=True,
-    memory=True,
     backstory=(
         "Risk professional in liquidity/credit/market risk, stress testing, and compliance."
     ),
     tools=[parse_financial_doc, extract_financial_metrics_tool],
-    llm=llm,
+    llm=routed("risk", llm_client),
     max_iter=3,
     max_rpm=60,
     allow_delegation=False,
+    step_callback=checkpoint,
 )
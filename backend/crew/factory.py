@@ -0,0 +1,163 @@
+# crew/factory.py
+"""Isolated per-run crews built from the pipeline templates.
+
+The agents in `crew.agents` and the tasks in `crew.task` are templates: built
+once at import and never run. crewai mutates agents and tools while a crew
+executes (executor, crew back-reference, usage counters), so every analysis
+gets its own shallow copies. A copy costs a handful of pydantic constructions;
+CREW_WARM_POOL_SIZE sets are kept ready on a background thread so a run does
+not pay even that.
+
+Memory is configured per crew (CREW_MEMORY_BACKEND): "none", or "local", which
+gives the run its own short-term, entity and long-term stores under
+CREW_MEMORY_DIR, removed when the run closes.
+"""
+import copy
+import logging
+import os
+import shutil
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from crewai import Agent, Crew, Process, Task
+
+from config.settings import settings
+from crew.agents import financial_analyst, document_verifier, investment_advisor, risk_assessor
+from crew.task import (
+    verification_task,
+    financial_analysis_task,
+    risk_analysis_task,
+    investment_recommendation_task,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StageTemplate:
+    name: str
+    task: Task
+    agent: Agent
+
+
+PIPELINE: Tuple[StageTemplate, ...] = (
+    StageTemplate("verification", verification_task, document_verifier),
+    StageTemplate("analysis", financial_analysis_task, financial_analyst),
+    StageTemplate("risk", risk_analysis_task, risk_assessor),
+    StageTemplate("recommendation", investment_recommendation_task, investment_advisor),
+)
+STAGES = tuple(stage.name for stage in PIPELINE)
+_TEMPLATES = {stage.name: stage for stage in PIPELINE}
+
+
+def _isolated_agent(template: Agent) -> Agent:
+    agent = template.copy()
+    agent.tools = [copy.copy(tool) for tool in template.tools or []]
+    return agent
+
+
+def _build_agents() -> Dict[str, Agent]:
+    return {stage.name: _isolated_agent(stage.agent) for stage in PIPELINE}
+
+
+class CrewRun:
+    """One analysis' private agents, and the memory store of the crew built from them."""
+
+    def __init__(self, agents: Dict[str, Agent]):
+        self.agents = agents
+        self.run_id = uuid.uuid4().hex
+        self._memory_path: Optional[str] = None
+
+    def task(self, stage: str, callback: Optional[Callable[[Any], None]] = None) -> Task:
+        template = _TEMPLATES[stage].task
+        return Task(
+            name=stage,
+            description=template.description,
+            expected_output=template.expected_output,
+            agent=self.agents[stage],
+            callback=callback,
+        )
+
+    def crew(self, tasks: List[Task]) -> Crew:
+        return Crew(
+            agents=[task.agent for task in tasks],
+            tasks=tasks,
+            process=Process.sequential,
+            verbose=False,
+            **self._memory(),
+        )
+
+    def _memory(self) -> Dict[str, Any]:
+        if settings.CREW_MEMORY_BACKEND == "none":
+            return {"memory": False}
+        from crewai.memory import EntityMemory, LongTermMemory, ShortTermMemory
+        from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
+
+        self._memory_path = os.path.join(settings.CREW_MEMORY_DIR, self.run_id)
+        os.makedirs(self._memory_path, exist_ok=True)
+        return {
+            "memory": True,
+            "short_term_memory": ShortTermMemory(path=self._memory_path),
+            "entity_memory": EntityMemory(path=self._memory_path),
+            "long_term_memory": LongTermMemory(
+                LTMSQLiteStorage(db_path=os.path.join(self._memory_path, "long_term_memory.db"))
+            ),
+        }
+
+    def close(self) -> None:
+        if self._memory_path:
+            shutil.rmtree(self._memory_path, ignore_errors=True)
+            self._memory_path = None
+
+
+_warm: Deque[Dict[str, Agent]] = deque()
+_lock = threading.Lock()
+_refilling = False
+_generation = 0
+
+
+def _refill(generation: int) -> None:
+    global _refilling
+    try:
+        while len(_warm) < settings.CREW_WARM_POOL_SIZE and generation == _generation:
+            agents = _build_agents()
+            with _lock:
+                if generation == _generation:
+                    _warm.append(agents)
+    except Exception as e:
+        logger.warning(f"Could not prebuild crew agents: {e}")
+    finally:
+        with _lock:
+            _refilling = False
+
+
+def _schedule_refill() -> None:
+    global _refilling
+    with _lock:
+        if _refilling or len(_warm) >= settings.CREW_WARM_POOL_SIZE:
+            return
+        _refilling = True
+        generation = _generation
+    threading.Thread(target=_refill, args=(generation,), name="crew-warm-pool", daemon=True).start()
+
+
+def new_run() -> CrewRun:
+    """Isolated agents for one analysis, from the warm pool when one is ready."""
+    try:
+        agents = _warm.popleft()
+    except IndexError:
+        agents = _build_agents()
+    if settings.CREW_WARM_POOL_SIZE > 0:
+        _schedule_refill()
+    return CrewRun(agents)
+
+
+def reset_warm_pool() -> None:
+    """Drop prebuilt agents, e.g. after the templates' LLM or tools were swapped."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _warm.clear()
@@ -0,0 +1,124 @@
+# crew/metering.py
+"""Per-call token, latency and cost metering for the crew LLM.
+
+`MeteredLLM` wraps whatever `build_llm` returns (the real client or its
+record/replay stand-in) and attributes every call to the stage, document and
+user of the run in progress (the RunControl visible on the crew's worker
+thread; see services.analysis_control), recording it in Prometheus and the
+run's UsageLedger.
+
+Tokens are counted client-side: crewai's LLM only keeps a cumulative usage
+total per client, which cannot be split between concurrent runs. With
+tiktoken installed the count uses the model's encoding and OpenAI's chat
+framing (a few tokens per message); without it, four characters per token.
+"""
+import json
+import logging
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union
+
+from crewai import BaseLLM
+
+from observability.metrics import LLM_COST, LLM_TOKENS
+from services.analysis_control import current_run
+from services.llm_usage import call_cost
+
+logger = logging.getLogger(__name__)
+
+_TOKENS_PER_MESSAGE = 3
+_TOKENS_PER_REPLY = 3
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: str) -> Any:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model.split("/")[-1])
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(model: str, text: str) -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_prompt_tokens(model: str, messages: Union[str, List[Dict[str, Any]]]) -> int:
+    if isinstance(messages, str):
+        return count_tokens(model, messages) + _TOKENS_PER_MESSAGE + _TOKENS_PER_REPLY
+    tokens = _TOKENS_PER_REPLY
+    for message in messages:
+        content = message.get("content")
+        if not isinstance(content, str):
+            content = json.dumps(content, default=str)
+        tokens += _TOKENS_PER_MESSAGE + count_tokens(model, content) + count_tokens(model, message.get("role", ""))
+    return tokens
+
+
+class MeteredLLM(BaseLLM):
+    """Delegates to a crewai LLM and accounts for each call."""
+
+    def __init__(self, inner: BaseLLM):
+        super().__init__(model=inner.model, temperature=inner.temperature)
+        self.inner = inner
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+    ) -> Union[str, Any]:
+        self.inner.stop = self.stop
+        start = time.perf_counter()
+        ok = False
+        response: Any = None
+        try:
+            response = self.inner.call(
+                messages, tools=tools, callbacks=callbacks, available_functions=available_functions
+            )
+            ok = True
+            return response
+        finally:
+            self._account(messages, response, time.perf_counter() - start, ok)
+
+    def _account(self, messages: Any, response: Any, latency: float, ok: bool) -> None:
+        try:
+            model = self.model or "unknown"
+            prompt_tokens = count_prompt_tokens(model, messages)
+            completion_tokens = count_tokens(model, response if isinstance(response, str) else "") if ok else 0
+            control = current_run()
+            stage = (control.stage if control else None) or "unknown"
+            LLM_TOKENS.labels(model, stage, "prompt").inc(prompt_tokens)
+            LLM_TOKENS.labels(model, stage, "completion").inc(completion_tokens)
+            LLM_COST.labels(model, stage).inc(call_cost(model, prompt_tokens, completion_tokens))
+            if control is not None:
+                control.usage.record(stage, model, prompt_tokens, completion_tokens, latency, ok)
+        except Exception as e:
+            # Accounting must never fail the call it measures.
+            logger.warning(f"Could not account for LLM call: {e}")
+
+    def supports_stop_words(self) -> bool:
+        return getattr(self.inner, "supports_stop_words", lambda: True)()
+
+    def supports_function_calling(self) -> bool:
+        return getattr(self.inner, "supports_function_calling", lambda: False)()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+
+def metered(llm: Any) -> MeteredLLM:
+    """Wrap `llm` (a crewai LLM, or a LangChain chat model crewai can convert) for accounting."""
+    if isinstance(llm, MeteredLLM):
+        return llm
+    if not isinstance(llm, BaseLLM):
+        from crewai.utilities.llm_utils import create_llm
+        llm = create_llm(llm)
+    return MeteredLLM(llm)
@@ -0,0 +1,228 @@
+# crew/replay.py
+"""Record/replay stand-ins for the crew LLM and the Serper search tool.
+
+REPLAY_MODE=record wraps the real clients and writes every request/response pair
+to REPLAY_DIR; REPLAY_MODE=replay serves those pairs back without network access,
+with synthetic latency and error injection for load testing.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from crewai import BaseLLM
+
+from config.settings import settings
+from tools.search_tool import SerperSearchTool
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayMissError(RuntimeError):
+    """No recording matches the request (strict replay only)."""
+
+
+class ReplayInjectedError(RuntimeError):
+    """Synthetic failure raised by replay error injection."""
+
+
+def _request_key(kind: str, request: Dict[str, Any]) -> str:
+    blob = json.dumps({"kind": kind, **request}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Directory of recorded exchanges, one JSON file per request key."""
+
+    def __init__(self, root: Union[str, Path], kind: str):
+        self.kind = kind
+        self.path = Path(root) / kind
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._keys: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, request: Dict[str, Any], response: Any, latency: float) -> None:
+        key = _request_key(self.kind, request)
+        entry = {
+            "kind": self.kind,
+            "key": key,
+            "request": request,
+            "response": response,
+            "latency": latency,
+            "recorded_at": datetime.utcnow().isoformat() + "Z",
+        }
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self.path / f".{key}.{threading.get_ident()}.tmp"
+        tmp.write_text(json.dumps(entry, default=str))
+        os.replace(tmp, self.path / f"{key}.json")
+
+    def lookup(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Exact match, else (non-strict) a deterministic pick among recordings of this kind."""
+        self._load()
+        key = _request_key(self.kind, request)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        if settings.REPLAY_STRICT or not self._keys:
+            raise ReplayMissError(f"No {self.kind} recording for key {key[:12]} in {self.path}")
+        return self._entries[self._keys[int(key, 16) % len(self._keys)]]
+
+    def _load(self) -> None:
+        if self._entries is not None:
+            return
+        with self._lock:
+            if self._entries is not None:
+                return
+            entries: Dict[str, Dict[str, Any]] = {}
+            for file in sorted(self.path.glob("*.json")):
+                try:
+                    entry = json.loads(file.read_text())
+                    entries[entry["key"]] = entry
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable recording {file}: {e}")
+            self._keys = sorted(entries)
+            self._entries = entries
+            logger.info(f"Loaded {len(entries)} {self.kind} recordings from {self.path}")
+
+
+class _ReplayTiming:
+    """Synthetic latency and error injection shared by the replay stand-ins."""
+
+    def __init__(self):
+        self._rng = random.Random(settings.REPLAY_SEED)
+        self._lock = threading.Lock()
+
+    def apply(self, recorded_latency: float, what: str) -> None:
+        with self._lock:
+            fail = self._rng.random() < settings.REPLAY_ERROR_RATE
+        delay = recorded_latency * settings.REPLAY_LATENCY_SCALE + settings.REPLAY_EXTRA_LATENCY_MS / 1000
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise ReplayInjectedError(f"Injected {what} failure")
+
+
+class RecordingLLM(BaseLLM):
+    """Delegates to a real crewai LLM and records each text exchange."""
+
+    def __init__(self, inner: BaseLLM, cassette: Cassette):
+        super().__init__(model=inner.model, temperature=inner.temperature)
+        self.inner = inner
+        self.cassette = cassette
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+    ) -> Union[str, Any]:
+        self.inner.stop = self.stop
+        start = time.perf_counter()
+        response = self.inner.call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions)
+        if isinstance(response, str):
+            self.cassette.record({"model": self.model, "messages": messages}, response, time.perf_counter() - start)
+        return response
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def supports_function_calling(self) -> bool:
+        return getattr(self.inner, "supports_function_calling", lambda: False)()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+
+class ReplayLLM(BaseLLM):
+    """Serves recorded LLM responses without network access."""
+
+    def __init__(self, cassette: Cassette, model: str):
+        super().__init__(model=model, temperature=settings.LLM_TEMPERATURE)
+        self.cassette = cassette
+        self.timing = _ReplayTiming()
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+    ) -> Union[str, Any]:
+        entry = self.cassette.lookup({"model": self.model, "messages": messages})
+        self.timing.apply(entry.get("latency", 0.0), "LLM")
+        return entry["response"]
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 96_000
+
+
+class RecordingSearchTool(SerperSearchTool):
+    """Serper search that records each successful request/response pair."""
+
+    def _search(self, **kwargs) -> dict[str, Any]:
+        start = time.perf_counter()
+        result = super()._search(**kwargs)
+        if result is not None:
+            _search_cassette().record({"args": kwargs}, result, time.perf_counter() - start)
+        return result
+
+
+class ReplaySearchTool(SerperSearchTool):
+    """Serves recorded Serper results without network access."""
+
+    def _search(self, **kwargs) -> dict[str, Any]:
+        entry = _search_cassette().lookup({"args": kwargs})
+        _search_timing().apply(entry.get("latency", 0.0), "search")
+        return entry["response"]
+
+
+_cassettes: Dict[str, Cassette] = {}
+_timing: Optional[_ReplayTiming] = None
+
+
+def _cassette(kind: str) -> Cassette:
+    if kind not in _cassettes:
+        _cassettes[kind] = Cassette(settings.REPLAY_DIR, kind)
+    return _cassettes[kind]
+
+
+def _search_cassette() -> Cassette:
+    return _cassette("search")
+
+
+def _search_timing() -> _ReplayTiming:
+    global _timing
+    if _timing is None:
+        _timing = _ReplayTiming()
+    return _timing
+
+
+def build_llm(llm: Any, model: Optional[str] = None) -> Any:
+    """Return `llm` (a client for `model`, default LLM_MODEL), or its record/replay stand-in per REPLAY_MODE."""
+    mode = settings.REPLAY_MODE
+    if mode == "record":
+        from crewai.utilities.llm_utils import create_llm
+        return RecordingLLM(create_llm(llm), _cassette("llm"))
+    if mode == "replay":
+        return ReplayLLM(_cassette("llm"), model or settings.LLM_MODEL)
+    return llm
+
+
+def build_search_tool() -> SerperSearchTool:
+    """Return the Serper tool, or its recording/replay stand-in depending on REPLAY_MODE."""
+    mode = settings.REPLAY_MODE
+    if mode == "record":
+        return RecordingSearchTool()
+    if mode == "replay":
+        return ReplaySearchTool()
+    return SerperSearchTool()
@@ -0,0 +1,212 @@
+# crew/routing.py
+"""Per-stage model routing along fallback chains with latency budgets.
+
+Each crew stage has a chain of models (`settings.models_for`, from
+LLM_STAGE_MODELS), fastest first. `RoutedLLM` sends a call to the first model
+and escalates to the next one when the call:
+
+- fails (after the client's own retries): "error";
+- takes longer than the stage's LLM_STAGE_LATENCY_BUDGETS: "over_budget". A
+  call still queued for a budget thread is cancelled; one already running is
+  abandoned and still metered when it returns. Only time spent running counts
+  towards the model's latency, not time waiting for a thread;
+- returns text crewai cannot parse, neither an Action nor a Final Answer:
+  "unparseable" (or "empty");
+- gives a low-confidence final answer: "low_confidence". For verification that
+  means a Status other than VERIFIED or REJECTED.
+
+The last model in a chain has no budget and is not second-guessed; its answer,
+or its error, is the call's. Once a run escalates past a model, the rest of
+that stage's calls in the run start further down the chain. A model whose
+moving-average latency for the stage is over budget is skipped up front
+("skipped_slow"), except for one probe call in every `_PROBE_EVERY`, so it can
+come back when it speeds up.
+
+Every decision is recorded in the run's UsageLedger (stored with `llm_usage`
+and rolled up daily) and counted in Prometheus (`llm_route_decisions_total`).
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from crewai import BaseLLM
+
+from config.settings import settings
+from observability.metrics import LLM_ROUTES
+from services.analysis_control import AnalysisAborted, current_run
+from tools.document_verifier import verdict_of
+
+logger = logging.getLogger(__name__)
+
+_FINAL_ANSWER = re.compile(r'Final Answer\s*:', re.IGNORECASE)
+_ACTION = re.compile(r'^\s*Action\s*:', re.IGNORECASE | re.MULTILINE)
+_LATENCY_SMOOTHING = 0.3
+_PROBE_EVERY = 20
+_BUDGET_WORKERS = 32
+
+
+def _unsure_verification(answer: str) -> bool:
+    return verdict_of(answer) not in ("VERIFIED", "REJECTED")
+
+
+# Stage -> predicate flagging a final answer to escalate.
+_LOW_CONFIDENCE: Dict[str, Callable[[str], bool]] = {
+    "verification": _unsure_verification,
+}
+
+
+def rejection(stage: str, response: Any) -> Optional[str]:
+    """Why `response` should be escalated, or None to accept it."""
+    if not isinstance(response, str):
+        return None  # native tool calls are crewai's to handle
+    if not response.strip():
+        return "empty"
+    final = _FINAL_ANSWER.search(response)
+    if final is None:
+        return None if _ACTION.search(response) else "unparseable"
+    unsure = _LOW_CONFIDENCE.get(stage)
+    if unsure is not None and unsure(response[final.end():]):
+        return "low_confidence"
+    return None
+
+
+class _OverBudget(Exception):
+    def __init__(self, running: Optional[float]):
+        super().__init__()
+        self.running = running  # seconds the call had been running; None if it never started
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _budget_pool() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_BUDGET_WORKERS, thread_name_prefix="llm-budget")
+        return _executor
+
+
+class RoutedLLM(BaseLLM):
+    """Sends each call of one stage along that stage's model chain."""
+
+    def __init__(self, stage: str, chain: List[BaseLLM]):
+        super().__init__(model=chain[0].model, temperature=chain[0].temperature)
+        self.stage = stage
+        self.chain = chain
+        self._latency: Dict[str, float] = {}  # model -> moving average for this stage
+        self._skips: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+    ) -> Union[str, Any]:
+        control = current_run()
+        ledger = control.usage if control is not None else None
+        budget = settings.LLM_STAGE_LATENCY_BUDGETS.get(self.stage)
+        last = len(self.chain) - 1
+        start = min(ledger.chain_start(self.stage), last) if ledger is not None else 0
+        for position in range(start, last + 1):
+            llm = self.chain[position]
+            llm.stop = self.stop
+            final = position == last
+            if not final and budget and self._too_slow(llm.model, budget):
+                self._decide(ledger, llm.model, "skipped_slow", None, position)
+                continue
+            if control is not None and position > start:
+                control.check()
+            began = time.perf_counter()
+            try:
+                response, latency = self._invoke(
+                    llm, None if final else budget, messages, tools, callbacks, available_functions
+                )
+            except AnalysisAborted:
+                raise
+            except _OverBudget as e:
+                if e.running is not None:
+                    self._observe(llm.model, e.running)
+                self._decide(ledger, llm.model, "over_budget", e.running, position)
+                continue
+            except Exception as e:
+                self._decide(ledger, llm.model, "error", time.perf_counter() - began, position)
+                if final:
+                    raise
+                logger.warning(f"{self.stage}: {llm.model} failed ({e}); escalating")
+                continue
+            self._observe(llm.model, latency)
+            outcome = None if final else rejection(self.stage, response)
+            self._decide(ledger, llm.model, outcome or "accepted", latency, position)
+            if outcome is None:
+                return response
+        raise RuntimeError(f"No model left in the {self.stage} chain")  # unreachable: the last model answers
+
+    @staticmethod
+    def _invoke(
+        llm: BaseLLM, budget: Optional[float], messages, tools, callbacks, available_functions
+    ) -> Tuple[Any, float]:
+        """The response and how long the call ran, excluding any wait for a budget thread."""
+        started: List[float] = []
+
+        def run() -> Any:
+            started.append(time.perf_counter())
+            return llm.call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions)
+
+        if not budget:
+            return run(), time.perf_counter() - started[0]
+        # Run on a pool thread under this thread's context, so the RunControl and metering still apply.
+        future = _budget_pool().submit(contextvars.copy_context().run, run)
+        try:
+            return future.result(timeout=budget), time.perf_counter() - started[0]
+        except TimeoutError:
+            if future.done():
+                raise  # the call itself timed out
+            if future.cancel():
+                raise _OverBudget(None)  # never left the queue, so it spends nothing
+            raise _OverBudget(time.perf_counter() - started[0] if started else None)
+
+    def _too_slow(self, model: str, budget: float) -> bool:
+        with self._lock:
+            if self._latency.get(model, 0.0) <= budget:
+                return False
+            self._skips[model] = self._skips.get(model, 0) + 1
+            if self._skips[model] >= _PROBE_EVERY:
+                self._skips[model] = 0
+                return False
+            return True
+
+    def _observe(self, model: str, latency: float) -> None:
+        with self._lock:
+            previous = self._latency.get(model)
+            self._latency[model] = latency if previous is None else (
+                _LATENCY_SMOOTHING * latency + (1 - _LATENCY_SMOOTHING) * previous
+            )
+
+    def _decide(self, ledger: Any, model: str, outcome: str, latency: Optional[float], position: int) -> None:
+        LLM_ROUTES.labels(self.stage, model, outcome).inc()
+        if ledger is not None:
+            ledger.route(self.stage, model, outcome, latency, position)
+        if outcome != "accepted":
+            logger.info(f"{self.stage}: {outcome} on {model}")
+
+    def supports_stop_words(self) -> bool:
+        return all(llm.supports_stop_words() for llm in self.chain)
+
+    def supports_function_calling(self) -> bool:
+        return all(llm.supports_function_calling() for llm in self.chain)
+
+    def get_context_window_size(self) -> int:
+        return min(llm.get_context_window_size() for llm in self.chain)
+
+
+def routed(stage: str, client: Callable[[str], BaseLLM]) -> RoutedLLM:
+    """The routed LLM of `stage`; `client(model)` builds (or reuses) the metered client of one model."""
+    return RoutedLLM(stage, [client(model) for model in settings.models_for(stage)])
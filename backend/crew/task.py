@@ -1,8 +1,8 @@
 from crewai import Task
 from crew.agents import financial_analyst, document_verifier, investment_advisor, risk_assessor
 from tools.financial_tools import ParseDocTool
-from tools.search_tool import SerperSearchTool
-search_tool = SerperSearchTool()
+from crew.replay import build_search_tool
+search_tool = build_search_tool()
 read_tool=ParseDocTool()
 
 verification_task = Task(
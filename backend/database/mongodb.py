@@ -3,7 +3,8 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 from config.settings import settings
 from models.user import User
-from models.document import Document
+from models.document import AnalysisCacheEntry, AnalyticsRollup, Document, DocumentPage
+from observability.metrics import MongoCommandMetrics
 
 
 logger = logging.getLogger(__name__)
@@ -18,10 +19,11 @@ db = Database()
 
 async def connect_to_mongo():
     try:
-        db.client = AsyncIOMotorClient(settings.MONGODB_URL)
+        listeners = [MongoCommandMetrics()] if settings.METRICS_ENABLED else []
+        db.client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=listeners)
         await init_beanie(
         database=db.client[settings.DATABASE_NAME],
-        document_models=[User, Document],
+        document_models=[User, Document, DocumentPage, AnalysisCacheEntry, AnalyticsRollup],
         )
         logger.info("Connected to MongoDB")
         print("Connected to MongoDB %s", settings.MONGODB_URL)
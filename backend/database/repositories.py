@@ -0,0 +1,116 @@
+# database/repositories.py
+"""Partial, atomic writes for Document and User.
+
+`Document.save()` replaces the whole record, including the analysis payload,
+and two writers that loaded the same document silently overwrite each other.
+These helpers only send the changed fields (`$set` / `$inc`), make status
+changes conditional on the current status, and mirror a successful write onto
+the in-memory model so callers can keep using it.
+"""
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, Iterable, Optional
+
+from models.document import Document, DocumentStatus
+from models.user import User
+from services.analytics_service import TERMINAL, record_finished
+
+# Statuses a new analysis may start from; PROCESSING is excluded so a document is never queued twice.
+STARTABLE = (
+    DocumentStatus.UPLOADED,
+    DocumentStatus.EXTRACTED,
+    DocumentStatus.COMPLETED,
+    DocumentStatus.FAILED,
+    DocumentStatus.CANCELLED,
+    DocumentStatus.TIMED_OUT,
+)
+
+
+def _encode(fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v.value if isinstance(v, Enum) else v for k, v in fields.items()}
+
+
+def _apply(model: Any, set_fields: Dict[str, Any], inc: Optional[Dict[str, int]] = None) -> None:
+    for name, value in set_fields.items():
+        setattr(model, name, value)
+    for name, delta in (inc or {}).items():
+        setattr(model, name, (getattr(model, name) or 0) + delta)
+
+
+class DocumentRepository:
+    @staticmethod
+    async def update(doc: Document, inc: Optional[Dict[str, int]] = None, **fields: Any) -> None:
+        """Unconditional `$set` of `fields` (and `$inc` of `inc`) on one document."""
+        update: Dict[str, Any] = {}
+        if fields:
+            update["$set"] = _encode(fields)
+        if inc:
+            update["$inc"] = inc
+        if update:
+            await Document.find_one({"_id": doc.id}).update(update)
+            _apply(doc, fields, inc)
+
+    @staticmethod
+    async def transition(
+        doc: Document,
+        to: DocumentStatus,
+        allowed_from: Iterable[DocumentStatus],
+        inc: Optional[Dict[str, int]] = None,
+        **fields: Any,
+    ) -> bool:
+        """Move `doc` to status `to` only if its stored status is in `allowed_from`.
+
+        Returns False, leaving the document untouched, when another writer got there
+        first (e.g. the run was cancelled, or the analysis is already queued).
+        """
+        set_fields = {"status": to, **fields}
+        update: Dict[str, Any] = {"$set": _encode(set_fields)}
+        if inc:
+            update["$inc"] = inc
+        result = await Document.find_one(
+            {"_id": doc.id, "status": {"$in": [s.value for s in allowed_from]}}
+        ).update(update)
+        if not result.matched_count:
+            return False
+        _apply(doc, set_fields, inc)
+        if to in TERMINAL:
+            await record_finished(doc)
+        return True
+
+    @staticmethod
+    async def expire_stale_processing(older_than: timedelta) -> int:
+        """Mark analyses queued before `older_than` ago and never finished as TIMED_OUT.
+
+        A worker that died mid-run leaves its documents in PROCESSING, which would
+        otherwise block any new analysis of them. One bulk update, so it is cheap to
+        run at every startup; each expired run is also counted in the analytics rollups.
+        """
+        now = datetime.utcnow()
+        stale = await Document.find(
+            {
+                "status": DocumentStatus.PROCESSING.value,
+                "$or": [{"queued_date": {"$lt": now - older_than}}, {"queued_date": None}],
+            }
+        ).to_list()
+        if not stale:
+            return 0
+        fields = {
+            "status": DocumentStatus.TIMED_OUT,
+            "processed_date": now,
+            "error": "Analysis did not finish before its worker stopped",
+        }
+        await Document.find(
+            {"_id": {"$in": [doc.id for doc in stale]}, "status": DocumentStatus.PROCESSING.value}
+        ).update_many({"$set": _encode(fields)})
+        for doc in stale:
+            _apply(doc, fields)
+            await record_finished(doc)
+        return len(stale)
+
+
+class UserRepository:
+    @staticmethod
+    async def record_login(user: User) -> None:
+        now = datetime.utcnow()
+        await User.find_one({"_id": user.id}).update({"$set": {"last_login": now}, "$inc": {"login_count": 1}})
+        _apply(user, {"last_login": now}, {"login_count": 1})
@@ -1,14 +1,18 @@
 # main.py
 import os
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 from config.settings import settings
 from database.mongodb import connect_to_mongo, close_mongo_connection
+from database.repositories import DocumentRepository
+from services.process_pool import start_process_pool, stop_process_pool
 from api.routes import api_router  # aggregated router
+from observability.metrics import instrument_app, monitor_event_loop_lag, register_crew_listeners
 
 logging.basicConfig(
     level=logging.INFO,
@@ -36,15 +40,30 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    if settings.METRICS_ENABLED:
+        instrument_app(app)
+
     # Startup / Shutdown
     @app.on_event("startup")
     async def _startup():
         await connect_to_mongo()
+        # Runs past their deadline were abandoned by a stopped worker; free them for a new analysis.
+        expired = await DocumentRepository.expire_stale_processing(timedelta(seconds=settings.ANALYSIS_TIMEOUT_SECONDS))
+        if expired:
+            logger.info(f"Marked {expired} abandoned analyses as timed out")
+        start_process_pool()
+        if settings.METRICS_ENABLED:
+            register_crew_listeners()
+            app.state.loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag())
         os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
         logger.info("Startup complete")
 
     @app.on_event("shutdown")
     async def _shutdown():
+        monitor = getattr(app.state, "loop_lag_monitor", None)
+        if monitor:
+            monitor.cancel()
+        await stop_process_pool()
         await close_mongo_connection()
         logger.info("Shutdown complete")
 
@@ -7,6 +7,7 @@ import uuid
 
 from beanie import Document as BeanieDocument, PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, TEXT, IndexModel
 from typing import Optional, Dict, Any
 
 # -------- API Schemas (never use Beanie Document as request body) --------
@@ -26,9 +27,12 @@ class DocumentOut(BaseModel):
 # ----------------------------- DB Model -----------------------------------
 class DocumentStatus(str, Enum):
     UPLOADED = "uploaded"
+    EXTRACTED = "extracted"  # parsed, indexed and metrics extracted at upload; no analysis yet
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+    TIMED_OUT = "timed_out"
 
 
 class Document(BeanieDocument):
@@ -44,21 +48,97 @@ class Document(BeanieDocument):
     file_path: str
     file_size: int
     content_type: str
+    content_hash: Optional[str] = None  # sha256 of the file bytes
+    # Where the bytes live (services.blob_storage); None for uploads from before blob storage,
+    # whose file_path is a local path. For remote stores file_path is the blob's URI.
+    storage_backend: Optional[str] = None
+    storage_key: Optional[str] = None
 
     # Ownership & lifecycle
     uploaded_by: str  # store user id as string; change to PydanticObjectId if you prefer
     upload_date: datetime = Field(default_factory=datetime.utcnow)
     processed_date: Optional[datetime] = None
+    extracted_date: Optional[datetime] = None  # when upload-time preprocessing finished
+    queued_date: Optional[datetime] = None  # when the current/last analysis was queued
+    analysis_attempts: int = 0
     status: DocumentStatus = DocumentStatus.UPLOADED
     analysis: Optional[Dict[str, Any]] = None  # <- store final analysis payload here
     error: Optional[str] = None 
+    metrics: Optional[Dict[str, Any]] = None  # regex-extracted headline figures, from preprocessing
+    boilerplate: Optional[Dict[str, Any]] = None  # repeated lines dropped at extraction (tools.boilerplate)
+    # LLM calls of the last run, with per-stage and total tokens, cost and latency (services.llm_usage)
+    llm_usage: Optional[Dict[str, Any]] = None
+    # stage -> {"input_hash", "output", "completed_at"}; lets a retry resume mid-pipeline
+    stage_outputs: Optional[Dict[str, Dict[str, Any]]] = None
 
     class Settings:
         name = "documents"  # collection name
+        indexes = [
+            [("uploaded_by", 1), ("upload_date", -1)],
+            [("status", 1)],
+            # Analytics: terminal outcomes in a processed_date window.
+            [("processed_date", -1), ("status", 1)],
+        ]
+
+
+class DocumentPage(BeanieDocument):
+    """Searchable unit: one extracted page, a chunk of unpaged text, or one analysis section (page_number None)."""
+    document_id: str
+    uploaded_by: str
+    page_number: Optional[int] = None
+    section: str = "page"  # "page", "chunk" (DOCX/TXT) or an analysis key (verification/analysis/risk/recommendation)
+    text: str
+
+    class Settings:
+        name = "document_pages"
+        indexes = [
+            # Owner prefix keeps every search scoped to one user's pages.
+            IndexModel([("uploaded_by", ASCENDING), ("text", TEXT)], name="owner_text"),
+            [("document_id", 1)],
+        ]
+
+
+class AnalysisCacheEntry(BeanieDocument):
+    """Stage outputs of one completed analysis, shared by every upload of the same file."""
+    key: str
+    content_hash: str
+    query: str  # normalised
+    model: str
+    prompt_version: str
+    stages: Dict[str, Any]
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime
+
+    class Settings:
+        name = "analysis_cache"
+        indexes = [
+            IndexModel([("key", ASCENDING)], unique=True),
+            # Mongo's TTL monitor drops entries once expires_at has passed.
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        ]
+
+
+class AnalyticsRollup(BeanieDocument):
+    """Per-day totals of finished analyses, maintained with $inc (see services.analytics_service)."""
+    day: str  # UTC, YYYY-MM-DD of processed_date
+    statuses: Dict[str, int] = Field(default_factory=dict)
+    users: Dict[str, Dict[str, int]] = Field(default_factory=dict)  # user id -> status -> count
+    durations: Dict[str, int] = Field(default_factory=dict)  # duration bucket index -> count
+    duration_total: float = 0.0
+    errors: Dict[str, Dict[str, Any]] = Field(default_factory=dict)  # key -> {"message", "count"}
+    llm: Dict[str, Any] = Field(default_factory=dict)  # "users"/"stages" -> name -> token, cost and call totals
+    updated_at: Optional[datetime] = None
+
+    class Settings:
+        name = "analytics_rollups"
+        indexes = [IndexModel([("day", ASCENDING)], unique=True)]
 
 
 __all__ = [
+    "AnalysisCacheEntry",
+    "AnalyticsRollup",
     "Document",
+    "DocumentPage",
     "DocumentStatus",
     "DocumentCreate",
     "DocumentOut",
@@ -17,6 +17,7 @@ class User(Document):
     is_active: bool = Field(default=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     last_login: Optional[datetime] = Field(default=None)
+    login_count: int = Field(default=0)
     
     class Settings:
         name = "users"
@@ -0,0 +1,169 @@
+# observability/metrics.py
+"""Prometheus metrics for HTTP, MongoDB, extraction, crew stages, LLM, tool calls and the CPU pool.
+
+Instruments are plain prometheus_client objects updated in-process; nothing is
+computed until `/metrics` is scraped. Route labels use the matched path template
+so label cardinality stays bounded.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Tuple
+
+from fastapi import FastAPI, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+_FAST = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_SLOW = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"], buckets=_FAST + (10.0,)
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ["command", "outcome"], buckets=_FAST
+)
+EXTRACTION_DURATION = Histogram(
+    "extraction_duration_seconds", "Document extraction time per extractor", ["extractor"], buckets=_SLOW
+)
+CREW_TASK_DURATION = Histogram(
+    "crew_task_duration_seconds", "Crew stage duration", ["stage", "outcome"], buckets=_SLOW
+)
+LLM_CALL_DURATION = Histogram(
+    "llm_call_duration_seconds", "LLM call latency", ["model", "outcome"], buckets=_SLOW
+)
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by model, stage and kind", ["model", "stage", "kind"])
+LLM_COST = Counter("llm_cost_usd_total", "Estimated LLM spend (LLM_PRICING)", ["model", "stage"])
+LLM_ROUTES = Counter(
+    "llm_route_decisions_total", "Model routing decisions by stage, model and outcome", ["stage", "model", "outcome"]
+)
+TOOL_CALL_DURATION = Histogram(
+    "tool_call_duration_seconds", "Crew tool call latency", ["tool"], buckets=_FAST + _SLOW[5:]
+)
+EXTERNAL_CALL_DURATION = Histogram(
+    "external_call_duration_seconds", "Outbound HTTP call latency", ["service", "outcome"], buckets=_FAST + (10.0,)
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "Delay between a scheduled event-loop wakeup and when it ran", buckets=_FAST
+)
+ANALYSES_QUEUED = Gauge("analyses_queued", "Analyses accepted but not yet started")
+ANALYSES_IN_FLIGHT = Gauge("analyses_in_flight", "Analyses currently running")
+CPU_TASK_DURATION = Histogram(
+    "cpu_task_duration_seconds", "CPU pool task latency including slot wait", ["task", "outcome"], buckets=_FAST + _SLOW[5:]
+)
+CPU_POOL_PENDING = Gauge("cpu_pool_pending", "CPU pool tasks submitted or waiting for a worker")
+CPU_POOL_RESTARTS = Counter("cpu_pool_restarts_total", "CPU pool worker replacements by cause", ["reason"])
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups", ["cache", "result"])
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+async def monitor_event_loop_lag(interval: float = 0.25) -> None:
+    """Sample event-loop scheduling delay until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - interval))
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Motor/PyMongo command listener feeding MONGO_COMMAND_DURATION."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        MONGO_COMMAND_DURATION.labels(event.command_name, "ok").observe(event.duration_micros / 1e6)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        MONGO_COMMAND_DURATION.labels(event.command_name, "error").observe(event.duration_micros / 1e6)
+
+
+def instrument_app(app: FastAPI) -> None:
+    """Add the request-latency middleware and the `/metrics` endpoint."""
+
+    @app.middleware("http")
+    async def _observe_request(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            if path != "/metrics":
+                HTTP_REQUEST_DURATION.labels(request.method, path, str(status)).observe(
+                    time.perf_counter() - start
+                )
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics() -> Response:
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+_crew_events_registered = False
+_llm_starts: Dict[int, float] = {}
+_task_starts: Dict[int, Tuple[str, float]] = {}
+_lock = threading.Lock()
+
+
+def register_crew_listeners() -> None:
+    """Time crew stages and LLM calls through the crewai event bus (idempotent)."""
+    global _crew_events_registered
+    if _crew_events_registered:
+        return
+    from crewai.utilities.events import (
+        LLMCallCompletedEvent,
+        LLMCallFailedEvent,
+        LLMCallStartedEvent,
+        TaskCompletedEvent,
+        TaskFailedEvent,
+        TaskStartedEvent,
+        crewai_event_bus,
+    )
+
+    # Crews run on worker threads and each thread issues its LLM calls sequentially,
+    # so the thread id pairs a start event with its completion.
+    def _llm_started(source, event) -> None:
+        with _lock:
+            _llm_starts[threading.get_ident()] = time.perf_counter()
+
+    def _llm_finished(outcome: str):
+        def handler(source, event) -> None:
+            with _lock:
+                start = _llm_starts.pop(threading.get_ident(), None)
+            if start is not None:
+                model = getattr(source, "model", None) or "unknown"
+                LLM_CALL_DURATION.labels(model, outcome).observe(time.perf_counter() - start)
+        return handler
+
+    def _task_started(source, event) -> None:
+        task = event.task or source
+        stage = getattr(task, "name", None) or getattr(getattr(task, "agent", None), "role", "unknown")
+        with _lock:
+            _task_starts[id(task)] = (stage, time.perf_counter())
+
+    def _task_finished(outcome: str):
+        def handler(source, event) -> None:
+            with _lock:
+                entry = _task_starts.pop(id(event.task or source), None)
+            if entry is not None:
+                stage, start = entry
+                CREW_TASK_DURATION.labels(stage, outcome).observe(time.perf_counter() - start)
+        return handler
+
+    crewai_event_bus.register_handler(LLMCallStartedEvent, _llm_started)
+    crewai_event_bus.register_handler(LLMCallCompletedEvent, _llm_finished("ok"))
+    crewai_event_bus.register_handler(LLMCallFailedEvent, _llm_finished("error"))
+    crewai_event_bus.register_handler(TaskStartedEvent, _task_started)
+    crewai_event_bus.register_handler(TaskCompletedEvent, _task_finished("ok"))
+    crewai_event_bus.register_handler(TaskFailedEvent, _task_finished("error"))
+    _crew_events_registered = True
@@ -0,0 +1,96 @@
+# services/analysis_cache.py
+"""Reuse completed analyses across re-runs and across users uploading the same file.
+
+Entries are keyed by (file content hash, normalised query, model and per-stage
+model chains, prompt version). The prompt version is derived from the task
+templates, so editing a prompt invalidates every entry without a manual bump.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from beanie.odm.operators.update.general import Set
+
+from config.settings import settings
+from crew.task import (
+    verification_task,
+    financial_analysis_task,
+    risk_analysis_task,
+    investment_recommendation_task,
+)
+from database.repositories import DocumentRepository
+from models.document import AnalysisCacheEntry, Document
+from observability.metrics import record_cache
+from services import blob_storage
+from services.stage_checkpoints import file_digest
+
+logger = logging.getLogger(__name__)
+
+
+def _prompt_version() -> str:
+    templates = (verification_task, financial_analysis_task, risk_analysis_task, investment_recommendation_task)
+    blob = json.dumps([[t.description, t.expected_output] for t in templates])
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+PROMPT_VERSION = _prompt_version()
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split()).rstrip(".!?")
+
+
+def cache_key(content_hash: str, query: str) -> str:
+    routes = json.dumps(settings.LLM_STAGE_MODELS, sort_keys=True)
+    parts = [content_hash, normalize_query(query), settings.LLM_MODEL, routes, PROMPT_VERSION]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+async def ensure_content_hash(doc: Document) -> str:
+    """Documents uploaded before hashing was added get hashed on first use."""
+    if not doc.content_hash:
+        path = await blob_storage.local_path(doc)
+        await DocumentRepository.update(doc, content_hash=await asyncio.to_thread(file_digest, path))
+    return doc.content_hash
+
+
+async def lookup(key: str) -> Optional[AnalysisCacheEntry]:
+    if settings.ANALYSIS_CACHE_TTL_SECONDS <= 0:
+        return None
+    entry = await AnalysisCacheEntry.find_one(AnalysisCacheEntry.key == key)
+    # The TTL monitor only runs about once a minute, so check expiry here too.
+    if entry is not None and entry.expires_at <= datetime.utcnow():
+        entry = None
+    record_cache("analysis", entry is not None)
+    return entry
+
+
+async def store(key: str, content_hash: str, query: str, stages: Dict[str, Any]) -> None:
+    ttl = settings.ANALYSIS_CACHE_TTL_SECONDS
+    if ttl <= 0:
+        return
+    now = datetime.utcnow()
+    fields = {
+        AnalysisCacheEntry.stages: stages,
+        AnalysisCacheEntry.created_at: now,
+        AnalysisCacheEntry.expires_at: now + timedelta(seconds=ttl),
+    }
+    try:
+        await AnalysisCacheEntry.find_one(AnalysisCacheEntry.key == key).upsert(
+            Set(fields),
+            on_insert=AnalysisCacheEntry(
+                key=key,
+                content_hash=content_hash,
+                query=normalize_query(query),
+                model=settings.LLM_MODEL,
+                prompt_version=PROMPT_VERSION,
+                stages=stages,
+                created_at=now,
+                expires_at=now + timedelta(seconds=ttl),
+            ),
+        )
+    except Exception as e:
+        logger.warning(f"Could not cache analysis {key[:12]}: {e}")
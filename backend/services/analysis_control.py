@@ -0,0 +1,119 @@
+# services/analysis_control.py
+"""Deadlines and cooperative cancellation for running analyses.
+
+The crew runs on a worker thread (``kickoff_async`` uses ``asyncio.to_thread``),
+which copies the caller's context, so the active RunControl is visible there
+through a ContextVar. ``checkpoint`` is installed as the agents' step callback
+and raises AnalysisAborted once the run is cancelled or past a deadline. The
+RunControl also carries the run's LLM usage ledger (see services.llm_usage).
+"""
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+from services.llm_usage import UsageLedger
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisAborted(TimeoutError):
+    """Raised inside the crew to stop a run. Subclasses TimeoutError so crewai does not retry it."""
+
+    def __init__(self, reason: str, stage: Optional[str]):
+        self.reason = reason  # "cancelled" | "timed_out"
+        self.stage = stage
+        where = f" during {stage}" if stage else ""
+        super().__init__(f"Analysis {reason.replace('_', ' ')}{where}")
+
+
+class RunControl:
+    def __init__(self, document_id: str, started_at: Optional[float] = None, user_id: Optional[str] = None):
+        self.document_id = document_id
+        self.user_id = user_id
+        self.usage = UsageLedger()
+        self.deadline = (started_at or time.time()) + settings.ANALYSIS_TIMEOUT_SECONDS
+        self.stage: Optional[str] = None
+        self.stage_deadline = self.deadline
+        self.aborted: Optional[str] = None
+        self.cancel_requested = asyncio.Event()
+
+    def enter_stage(self, stage: str) -> None:
+        self.stage = stage
+        budget = settings.STAGE_TIMEOUT_SECONDS.get(stage)
+        self.stage_deadline = min(self.deadline, time.time() + budget) if budget else self.deadline
+
+    def time_left(self) -> float:
+        return min(self.deadline, self.stage_deadline) - time.time()
+
+    def abort(self, reason: str) -> None:
+        if self.aborted is None:
+            self.aborted = reason
+
+    def check(self) -> None:
+        if self.aborted is None and self.time_left() <= 0:
+            self.abort("timed_out")
+        if self.aborted is not None:
+            raise AnalysisAborted(self.aborted, self.stage)
+
+
+_current: ContextVar[Optional[RunControl]] = ContextVar("analysis_run_control", default=None)
+_running: Dict[str, RunControl] = {}
+
+_CANCEL_POLL_SECONDS = 5.0
+
+
+def current_run() -> Optional[RunControl]:
+    """The RunControl of the analysis this thread is working for, if any."""
+    return _current.get()
+
+
+def checkpoint(*_: Any) -> None:
+    """Crew step callback: abort the current run if it was cancelled or ran out of time."""
+    control = current_run()
+    if control is not None:
+        control.check()
+
+
+def request_cancel(document_id: str) -> bool:
+    """Signal a run in this process; returns False when it is not running here."""
+    control = _running.get(document_id)
+    if control is None:
+        return False
+    control.abort("cancelled")
+    control.cancel_requested.set()
+    return True
+
+
+async def run_with_control(control: RunControl, kickoff, is_cancelled) -> Any:
+    """Await `kickoff()` under `control`, enforcing deadlines and cancellation.
+
+    `is_cancelled` is an async callable polled periodically so a cancel recorded
+    by another API worker is honoured too.
+    """
+    token = _current.set(control)
+    _running[control.document_id] = control
+    try:
+        job = asyncio.create_task(kickoff())
+    finally:
+        _current.reset(token)
+    waiter = asyncio.create_task(control.cancel_requested.wait())
+    try:
+        while True:
+            timeout = max(0.0, min(control.time_left(), _CANCEL_POLL_SECONDS))
+            done, _ = await asyncio.wait({job, waiter}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if job in done:
+                return job.result()
+            if waiter not in done and control.time_left() > 0:
+                if not await is_cancelled():
+                    continue
+            control.abort("cancelled" if waiter in done or control.time_left() > 0 else "timed_out")
+            # The worker thread stops at its next checkpoint; stop waiting for it now.
+            job.cancel()
+            logger.info(f"Analysis {control.document_id} {control.aborted} during {control.stage}")
+            raise AnalysisAborted(control.aborted, control.stage)
+    finally:
+        waiter.cancel()
+        _running.pop(control.document_id, None)
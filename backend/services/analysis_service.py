@@ -1,82 +1,268 @@
 # services/analysis_service.py
 import json
+import asyncio
+import logging
 from beanie import PydanticObjectId
 from datetime import datetime
-from crewai import Crew, Process, Task
+from typing import Any, Dict, Iterable, Optional
+from crewai import Task
+from crewai.tasks.task_output import TaskOutput
+from database.repositories import DocumentRepository
 from models.document import Document, DocumentStatus
-from crew.agents import financial_analyst, document_verifier, investment_advisor, risk_assessor
-from crew.task import (
-    verification_task,
-    financial_analysis_task,
-    risk_analysis_task,
-    investment_recommendation_task,
-)
-
-async def process_financial_document(query: str, file_path: str, user_id: str, document_id: str) -> str:
+from observability.metrics import ANALYSES_IN_FLIGHT, ANALYSES_QUEUED, record_cache
+from services import analysis_cache, blob_storage
+from services.analysis_control import AnalysisAborted, RunControl, run_with_control
+from services.llm_usage import record_run
+from services.preprocessing import extraction_error, wait_for_preprocessing
+from services.process_pool import SANDBOX_FAILURES, run_cpu
+from services.stage_checkpoints import CheckpointWriter, restorable_stages
+from services.search_service import safe_index_document
+from config.settings import settings
+from tools.document_verifier import verdict_of, verify_document
+from tools.document_extraction import FinancialDocumentTool
+from crew.factory import PIPELINE, STAGES, new_run
+
+logger = logging.getLogger(__name__)
+
+# Cache key -> future of the stage outputs, so concurrent requests for one filing share a crew run.
+_inflight: Dict[str, "asyncio.Future[Optional[Dict[str, Any]]]"] = {}
+
+
+async def process_financial_document(
+    query: str,
+    file_path: str,
+    user_id: str,
+    document_id: str,
+    queued_at: Optional[float] = None,
+    force: bool = False,
+) -> str:
+    ANALYSES_QUEUED.dec()
+    with ANALYSES_IN_FLIGHT.track_inprogress():
+        return await _run_analysis(query, file_path, user_id, document_id, queued_at, force)
+
+
+async def _run_analysis(
+    query: str, file_path: str, user_id: str, document_id: str, queued_at: Optional[float], force: bool
+) -> str:
     doc = await Document.get(PydanticObjectId(document_id))
     if not doc:
         return "NO_DOC"
+    if doc.status == DocumentStatus.CANCELLED:
+        return "CANCELLED"
+
+    # The overall deadline counts from when the job was queued; skip jobs that can no longer finish.
+    control = RunControl(document_id, started_at=queued_at, user_id=user_id)
+    if control.time_left() <= 0:
+        await _record_abort(doc, AnalysisAborted("timed_out", None))
+        return "TIMED_OUT"
+
+    async def _cancel_recorded() -> bool:
+        current = await Document.get(doc.id)
+        return current is not None and current.status == DocumentStatus.CANCELLED
 
+    running: Optional[asyncio.Future] = None
+    file_path: Optional[str] = None
     try:
-        # Create fresh tasks using the same descriptions & expected outputs, but reuse the agent objects.
-        vt = Task(
-            description=verification_task.description,
-            expected_output=verification_task.expected_output,
-            agent=document_verifier,
-        )
-        fat = Task(
-            description=financial_analysis_task.description,
-            expected_output=financial_analysis_task.expected_output,
-            agent=financial_analyst,
-        )
-        rt = Task(
-            description=risk_analysis_task.description,
-            expected_output=risk_analysis_task.expected_output,
-            agent=risk_assessor,
-        )
-        ir = Task(
-            description=investment_recommendation_task.description,
-            expected_output=investment_recommendation_task.expected_output,
-            agent=investment_advisor,
-        )
+        file_hash = await analysis_cache.ensure_content_hash(doc)
+        key = analysis_cache.cache_key(file_hash, query)
+        if not force:
+            stages = await _shared_result(key, control)
+            if stages is not None:
+                if not await finalize_analysis(doc, stages, query, cached=True):
+                    return "DISCARDED"
+                await index_analysis(doc)
+                return "CACHED"
+        if key not in _inflight:
+            running = _inflight[key] = asyncio.get_running_loop().create_future()
+        # Upload-time parsing still in progress fills the parse cache the agents' parse tool reads.
+        await wait_for_preprocessing(document_id)
+        # The agents and the CPU pool read a local file: this node's copy of the stored upload,
+        # pinned so another fetch cannot evict it while the tools still reopen it by path.
+        file_path = await blob_storage.local_path(doc, pin=True)
 
-        crew = Crew(
-            agents=[document_verifier, financial_analyst, risk_assessor, investment_advisor],
-            tasks=[vt, fat, rt, ir],
-            process=Process.sequential,
-            verbose=False,
-        )
+        restored = restorable_stages(doc, file_hash, query, [(t.name, t.task) for t in PIPELINE])
+        checkpoints = CheckpointWriter(doc, file_hash, query, asyncio.get_running_loop())
+        run = new_run()
+
+        def _output_only(template, output: str):
+            task = run.task(template.name)
+            task.output = TaskOutput(
+                name=template.name, description=template.task.description, raw=output, agent=template.agent.role
+            )
+            return task
+
+        # Completed stages become output-only tasks: they are passed as context but never run.
+        done_tasks = []
+        for template, (_, input_hash, output) in zip(PIPELINE, restored):
+            done_tasks.append(_output_only(template, output))
+            checkpoints.resume_after(input_hash, output)
+        record_cache("stage_checkpoint", bool(restored))
+        if restored:
+            logger.info(f"Resuming analysis {document_id} after {', '.join(s for s, _, _ in restored)}")
+
+        pending = list(PIPELINE[len(restored):])
+        if pending:
+            # Normally a parse-cache hit. A file that breaks the extraction sandbox fails the run here,
+            # with the reason, rather than inside an agent's tool call.
+            try:
+                await run_cpu(FinancialDocumentTool.read_document, file_path)
+            except SANDBOX_FAILURES as e:
+                raise RuntimeError(extraction_error(e)) from e
+
+        # A confident local verdict stands in for the LLM verifier.
+        if pending and pending[0].name == "verification" and settings.LOCAL_VERIFIER_ENABLED:
+            try:
+                local = await run_cpu(verify_document, file_path)
+            except Exception as e:
+                logger.warning(f"Local verification failed for document {document_id}: {e}")
+                local = None
+            if local is not None and local.confidence >= settings.VERIFIER_MIN_CONFIDENCE:
+                template = pending.pop(0)
+                report = local.report()
+                checkpoints.save(template.name, template.task, report)
+                done_tasks.append(_output_only(template, report))
+                logger.info(
+                    f"Local verifier: document {document_id} {local.status} "
+                    f"(confidence {local.confidence:.2f}); LLM verification skipped"
+                )
+
+        def _finish(stage: str, template: Task, next_stage: Optional[str]):
+            def callback(output) -> None:
+                checkpoints.save(stage, template, str(output))
+                if next_stage:
+                    control.enter_stage(next_stage)
+            return callback
+
+        def _verdict() -> Optional[str]:
+            verification = next((t for t in done_tasks if t.name == "verification"), None)
+            return verdict_of(str(verification.output)) if verification is not None else None
+
+        # Verification runs on its own so a REJECTED verdict stops the pipeline before the analysts start.
+        batches = [pending[:1], pending[1:]] if pending and pending[0].name == "verification" else [pending]
+        try:
+            for batch in filter(None, batches):
+                if _verdict() == "REJECTED":
+                    logger.info(f"Document {document_id} REJECTED at verification; skipping {len(pending)} stages")
+                    break
+                # Fresh tasks on this run's own agents; the templates are never executed.
+                run_tasks = []
+                for i, template in enumerate(batch):
+                    next_stage = batch[i + 1].name if i + 1 < len(batch) else None
+                    task = run.task(template.name, callback=_finish(template.name, template.task, next_stage))
+                    if done_tasks:
+                        # Same context the sequential process would build: every earlier stage's output.
+                        task.context = done_tasks + run_tasks
+                    run_tasks.append(task)
 
-        await crew.kickoff_async(inputs={"query": query, "file_path": file_path, "user_id": user_id})
-
-        def _clean(o):
-            if o is None: return None
-            if isinstance(o, (str, int, float, bool, dict, list)): return o
-            return str(o)
-
-        payload = {
-            "verification": _clean(vt.output),
-            "analysis": _clean(fat.output),
-            "risk": _clean(rt.output),
-            "recommendation": _clean(ir.output),
-            "query_used": query,
-            "source": file_path,
-            "generated_at": datetime.utcnow().isoformat() + "Z",
-        }
-
-        # ensure JSON-safe
-        json.loads(json.dumps(payload))
-
-        doc.analysis = payload
-        doc.status = DocumentStatus.COMPLETED
-        doc.processed_date = datetime.utcnow()
-        doc.error = None
-        await doc.save()
+                crew = run.crew(run_tasks)
+                control.enter_stage(batch[0].name)
+                await run_with_control(
+                    control,
+                    lambda: crew.kickoff_async(inputs={"query": query, "file_path": file_path, "user_id": user_id}),
+                    _cancel_recorded,
+                )
+                done_tasks.extend(run_tasks)
+                pending = pending[len(batch):]
+        finally:
+            await checkpoints.flush()
+            run.close()
+
+        stages = {task.name: _clean(task.output) for task in done_tasks}
+        finalized = await finalize_analysis(doc, stages, query)
+        await analysis_cache.store(key, file_hash, query, stages)
+        if running is not None:
+            running.set_result(stages)
+        if not finalized:
+            # Cancelled or expired while the crew ran; the result stays cached but the status is kept.
+            logger.info(f"Analysis {document_id} finished after it left PROCESSING; result not recorded")
+            return "DISCARDED"
+        await index_analysis(doc)
         return "OK"
 
+    except AnalysisAborted as e:
+        await _record_abort(doc, e)
+        return e.reason.upper()
+
     except Exception as e:
-        doc.status = DocumentStatus.FAILED
-        doc.processed_date = datetime.utcnow()
-        doc.error = str(e)
-        await doc.save()
+        await DocumentRepository.transition(
+            doc, DocumentStatus.FAILED, (DocumentStatus.PROCESSING,), processed_date=datetime.utcnow(), error=str(e)
+        )
         raise
+
+    finally:
+        if file_path is not None:
+            blob_storage.unpin(file_path)
+        if running is not None:
+            _inflight.pop(key, None)
+            if not running.done():
+                running.set_result(None)  # waiters fall back to running the crew themselves
+        await record_run(doc, user_id, control.usage)
+
+
+async def _shared_result(key: str, control: RunControl) -> Optional[Dict[str, Any]]:
+    """Stage outputs from the cache, or from an identical run already in flight."""
+    entry = await analysis_cache.lookup(key)
+    if entry is not None:
+        return entry.stages
+    pending = _inflight.get(key)
+    if pending is None:
+        return None
+    logger.info(f"Analysis {control.document_id} waiting for an identical run in flight")
+    try:
+        return await asyncio.wait_for(asyncio.shield(pending), timeout=max(0.0, control.time_left()))
+    except asyncio.TimeoutError:
+        raise AnalysisAborted("timed_out", None)
+
+
+def _clean(o):
+    if o is None: return None
+    if isinstance(o, (str, int, float, bool, dict, list)): return o
+    return str(o)
+
+
+async def finalize_analysis(
+    doc: Document,
+    stages: Dict[str, Any],
+    query: str,
+    cached: bool = False,
+    allowed_from: Iterable[DocumentStatus] = (DocumentStatus.PROCESSING,),
+) -> bool:
+    """Record the analysis as COMPLETED; False if the stored status is no longer in `allowed_from`."""
+    payload = {
+        **{stage: stages.get(stage) for stage in STAGES},
+        "query_used": query,
+        "source": doc.file_path,
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "cached": cached,
+        "verdict": verdict_of(stages.get("verification")),
+        # Stages not run because verification REJECTED the document.
+        "skipped_stages": [stage for stage in STAGES if stages.get(stage) is None],
+    }
+
+    # ensure JSON-safe
+    json.loads(json.dumps(payload))
+
+    return await DocumentRepository.transition(
+        doc, DocumentStatus.COMPLETED, allowed_from,
+        analysis=payload,
+        processed_date=datetime.utcnow(),
+        error=None,
+        stage_outputs=None,  # the payload now holds every stage
+    )
+
+
+async def index_analysis(doc: Document) -> None:
+    try:
+        text = await run_cpu(FinancialDocumentTool.read_document, await blob_storage.local_path(doc))
+    except Exception as e:
+        logger.warning(f"Could not extract {doc.file_path} for search indexing: {e}")
+        text = None
+    await safe_index_document(doc, text)
+
+
+async def _record_abort(doc: Document, e: AnalysisAborted) -> None:
+    # A user cancel has already moved the document to CANCELLED; that record is kept as-is.
+    status = DocumentStatus.CANCELLED if e.reason == "cancelled" else DocumentStatus.TIMED_OUT
+    await DocumentRepository.transition(
+        doc, status, (DocumentStatus.PROCESSING,), processed_date=datetime.utcnow(), error=str(e)
+    )
@@ -0,0 +1,245 @@
+# services/analytics_service.py
+"""Operational analytics: outcomes by status and user, processing-time percentiles, top errors.
+
+Dashboards read one rollup document per UTC day. Each rollup is updated with
+`$inc` when an analysis reaches a terminal status, so a week is seven small
+reads. The same figures can be computed live from `documents` with a single
+aggregation over the processed_date index, which is also how rollups are
+rebuilt if they drift.
+
+Durations are `processed_date - upload_date`, kept as a fixed-bucket
+histogram so rollups can be merged. Percentiles are interpolated inside the
+bucket that holds them.
+"""
+import hashlib
+import logging
+import re
+from bisect import bisect_right
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from models.document import AnalyticsRollup, Document, DocumentStatus
+
+logger = logging.getLogger(__name__)
+
+TERMINAL = (DocumentStatus.COMPLETED, DocumentStatus.FAILED, DocumentStatus.CANCELLED, DocumentStatus.TIMED_OUT)
+FAILURES = (DocumentStatus.FAILED, DocumentStatus.TIMED_OUT)
+# Lower edges (seconds) of the duration buckets; the last bucket is open-ended.
+DURATION_BOUNDS = (0, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 86400)
+_TOP_USERS = 20
+_TOP_ERRORS = 10
+_LIVE_ERROR_GROUPS = 200  # raw messages fetched before normalising and merging
+
+
+def _bucket(seconds: float) -> int:
+    return max(0, bisect_right(DURATION_BOUNDS, seconds) - 1)
+
+
+def _day(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+
+def error_key(message: Optional[str]) -> "tuple[str, str]":
+    """Group messages that differ only in numbers or ids; returns (key, normalised message)."""
+    first_line = (message or "").strip().splitlines()[0] if (message or "").strip() else "unknown"
+    normalised = re.sub(r'[0-9a-f]{24}|\d+', '#', first_line)[:200]
+    return hashlib.sha1(normalised.encode("utf-8")).hexdigest()[:16], normalised
+
+
+def _increments(status: str, user: str, seconds: Optional[float], error: Optional[str]) -> Dict[str, Any]:
+    inc: Dict[str, Any] = {f"statuses.{status}": 1, f"users.{user}.{status}": 1}
+    fields: Dict[str, Any] = {}
+    if seconds is not None:
+        inc[f"durations.{_bucket(seconds)}"] = 1
+        inc["duration_total"] = seconds
+    if status in {s.value for s in FAILURES}:
+        key, message = error_key(error)
+        inc[f"errors.{key}.count"] = 1
+        fields[f"errors.{key}.message"] = message
+    return {"$inc": inc, "$set": fields}
+
+
+async def record_finished(doc: Document) -> None:
+    """Fold one finished analysis into its day's rollup; never fails the caller."""
+    if doc.status not in TERMINAL or doc.processed_date is None:
+        return
+    seconds = max(0.0, (doc.processed_date - doc.upload_date).total_seconds())
+    update = _increments(doc.status.value, doc.uploaded_by, seconds, doc.error)
+    update["$set"]["updated_at"] = datetime.utcnow()
+    try:
+        await AnalyticsRollup.get_motor_collection().update_one(
+            {"day": _day(doc.processed_date)}, update, upsert=True
+        )
+    except Exception as e:
+        logger.warning(f"Could not update analytics rollup for document {doc.id}: {e}")
+
+
+class _Totals:
+    """Merge target shared by the rollup and live paths."""
+
+    def __init__(self):
+        self.statuses: Counter = Counter()
+        self.users: Dict[str, Counter] = {}
+        self.durations = [0] * len(DURATION_BOUNDS)
+        self.duration_total = 0.0
+        self.errors: Dict[str, Dict[str, Any]] = {}
+
+    def add_error(self, key: str, message: str, count: int) -> None:
+        entry = self.errors.setdefault(key, {"message": message, "count": 0})
+        entry["count"] += count
+
+    def add_rollup(self, raw: Dict[str, Any]) -> None:
+        self.statuses.update(raw.get("statuses") or {})
+        for user, counts in (raw.get("users") or {}).items():
+            self.users.setdefault(user, Counter()).update(counts)
+        for index, count in (raw.get("durations") or {}).items():
+            self.durations[int(index)] += count
+        self.duration_total += raw.get("duration_total") or 0.0
+        for key, entry in (raw.get("errors") or {}).items():
+            self.add_error(key, entry.get("message", ""), entry.get("count", 0))
+
+    def percentile(self, q: float) -> Optional[float]:
+        n = sum(self.durations)
+        if not n:
+            return None
+        rank = q * n
+        seen = 0
+        for i, count in enumerate(self.durations):
+            if count and seen + count >= rank:
+                lo = DURATION_BOUNDS[i]
+                if i + 1 == len(DURATION_BOUNDS):
+                    return float(lo)
+                hi = DURATION_BOUNDS[i + 1]
+                return lo + (hi - lo) * (rank - seen) / count
+            seen += count
+        return float(DURATION_BOUNDS[-1])
+
+    def report(self, since: datetime, until: datetime, source: str, in_progress: int) -> Dict[str, Any]:
+        finished = sum(self.statuses.values())
+        failures = sum(self.statuses.get(s.value, 0) for s in FAILURES)
+        timed = sum(self.durations)
+        users = sorted(self.users.items(), key=lambda kv: sum(kv[1].values()), reverse=True)[:_TOP_USERS]
+        errors = sorted(self.errors.values(), key=lambda e: e["count"], reverse=True)[:_TOP_ERRORS]
+        return {
+            "source": source,
+            "from": since,
+            "to": until,
+            "in_progress": in_progress,
+            "finished": finished,
+            "by_status": dict(self.statuses),
+            "by_user": [
+                {"user_id": user, "total": sum(counts.values()), "by_status": dict(counts)} for user, counts in users
+            ],
+            "duration_seconds": {
+                "count": timed,
+                "mean": self.duration_total / timed if timed else None,
+                "p50": self.percentile(0.50),
+                "p95": self.percentile(0.95),
+                "p99": self.percentile(0.99),
+            },
+            "failure_rate": failures / finished if finished else None,
+            "top_errors": errors,
+        }
+
+
+async def _in_progress() -> int:
+    return await Document.find({"status": DocumentStatus.PROCESSING.value}).count()
+
+
+async def summary_from_rollups(days: int) -> Dict[str, Any]:
+    until = datetime.utcnow()
+    since = (until - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    totals = _Totals()
+    async for raw in AnalyticsRollup.get_motor_collection().find({"day": {"$gte": _day(since)}}):
+        totals.add_rollup(raw)
+    return totals.report(since, until, "rollup", await _in_progress())
+
+
+def _live_pipeline(since: datetime) -> List[Dict[str, Any]]:
+    return [
+        {"$match": {
+            "processed_date": {"$gte": since},
+            "status": {"$in": [s.value for s in TERMINAL]},
+        }},
+        {"$facet": {
+            "by_status": [{"$group": {"_id": "$status", "n": {"$sum": 1}}}],
+            "by_user": [{"$group": {"_id": {"user": "$uploaded_by", "status": "$status"}, "n": {"$sum": 1}}}],
+            "durations": [
+                {"$project": {"seconds": {"$divide": [{"$subtract": ["$processed_date", "$upload_date"]}, 1000]}}},
+                {"$bucket": {
+                    "groupBy": "$seconds",
+                    "boundaries": list(DURATION_BOUNDS) + [float("inf")],
+                    "default": "negative",
+                    "output": {"n": {"$sum": 1}, "total": {"$sum": "$seconds"}},
+                }},
+            ],
+            "errors": [
+                {"$match": {"status": {"$in": [s.value for s in FAILURES]}}},
+                {"$group": {"_id": "$error", "n": {"$sum": 1}}},
+                {"$sort": {"n": -1}},
+                {"$limit": _LIVE_ERROR_GROUPS},
+            ],
+        }},
+    ]
+
+
+async def summary_live(days: int) -> Dict[str, Any]:
+    until = datetime.utcnow()
+    since = (until - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    totals = _Totals()
+    async for facets in Document.get_motor_collection().aggregate(_live_pipeline(since)):
+        for row in facets["by_status"]:
+            totals.statuses[row["_id"]] += row["n"]
+        for row in facets["by_user"]:
+            totals.users.setdefault(row["_id"]["user"], Counter())[row["_id"]["status"]] += row["n"]
+        for row in facets["durations"]:
+            index = 0 if row["_id"] == "negative" else DURATION_BOUNDS.index(row["_id"])  # clock skew -> first bucket
+            totals.durations[index] += row["n"]
+            totals.duration_total += max(0.0, row["total"])
+        for row in facets["errors"]:
+            key, message = error_key(row["_id"])
+            totals.add_error(key, message, row["n"])
+    return totals.report(since, until, "live", await _in_progress())
+
+
+async def rebuild_rollups(days: int) -> int:
+    """Recompute the last `days` daily rollups from `documents`; returns rollups written.
+
+    Increments recorded while the rebuild runs can be lost for those days, so run
+    it when the rollups are known to have drifted rather than on a schedule. LLM
+    usage totals (`llm`) have no other source and are left as they are.
+    """
+    since = (datetime.utcnow() - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    cursor = Document.get_motor_collection().find(
+        {"processed_date": {"$gte": since}, "status": {"$in": [s.value for s in TERMINAL]}},
+        {"status": 1, "uploaded_by": 1, "upload_date": 1, "processed_date": 1, "error": 1},
+    )
+    rollups: Dict[str, Dict[str, Any]] = {}
+    async for raw in cursor:
+        day = rollups.setdefault(_day(raw["processed_date"]), {
+            "statuses": Counter(), "users": {}, "durations": Counter(), "duration_total": 0.0, "errors": {},
+        })
+        status = raw["status"]
+        day["statuses"][status] += 1
+        day["users"].setdefault(raw["uploaded_by"], Counter())[status] += 1
+        seconds = max(0.0, (raw["processed_date"] - raw["upload_date"]).total_seconds())
+        day["durations"][str(_bucket(seconds))] += 1
+        day["duration_total"] += seconds
+        if status in {s.value for s in FAILURES}:
+            key, message = error_key(raw.get("error"))
+            day["errors"].setdefault(key, {"message": message, "count": 0})["count"] += 1
+
+    now = datetime.utcnow()
+    writes = [
+        UpdateOne({"day": day}, {"$set": {**values, "updated_at": now}}, upsert=True)
+        for day, values in rollups.items()
+    ]
+    empty = {"statuses": {}, "users": {}, "durations": {}, "duration_total": 0.0, "errors": {}, "updated_at": now}
+    collection = AnalyticsRollup.get_motor_collection()
+    await collection.update_many({"day": {"$gte": _day(since), "$nin": list(rollups)}}, {"$set": empty})
+    if writes:
+        await collection.bulk_write(writes, ordered=False)
+    return len(writes)
@@ -0,0 +1,521 @@
+# services/blob_storage.py
+"""Uploaded files in pluggable blob storage, with a read-through cache on each node.
+
+STORAGE_BACKEND picks where new uploads go:
+
+- "local": files under UPLOAD_DIR. Single node, or nodes sharing that mount.
+- "gridfs": the application's MongoDB, GridFS bucket GRIDFS_BUCKET.
+- "s3": any S3-compatible API (AWS, MinIO, ...), bucket S3_BUCKET, addressed
+  path-style and signed with SigV4 over httpx; `transport` lets tests and the
+  benchmarks use an in-process stand-in.
+
+Every store writes from an async iterator of chunks (S3 as a multipart upload
+in S3_PART_SIZE_MB parts), so an upload is never held in memory whole, and
+reads any byte range as a stream. A document records the backend and key it
+was written to (`storage_backend`, `storage_key`), so changing STORAGE_BACKEND
+never orphans older uploads; documents from before blob storage have neither
+and `file_path` is a local path.
+
+The parsers need a seekable local file. `local_path(doc)` returns one: the
+file itself for local storage, otherwise a copy in BLOB_CACHE_DIR fetched once
+per node, checked against the document's content hash and then reused by every
+parse, analysis and re-analysis on that node. Cached copies get the upload
+time as mtime, so the parse cache (keyed by path, size and mtime) survives
+eviction. The least recently used copies are evicted past BLOB_CACHE_MAX_MB,
+except those pinned with `local_path(doc, pin=True)`: an analysis reopens its
+file by path from its tools for minutes, so its copy stays until `unpin`.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import quote
+
+import aiofiles
+import httpx
+
+from config.settings import settings
+from models.document import Document
+from observability.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1 << 20
+
+
+class BlobNotFound(FileNotFoundError):
+    """No blob is stored under the key."""
+
+
+async def _read_file(path: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+    remaining = length
+    try:
+        f = await aiofiles.open(path, "rb")
+    except FileNotFoundError:
+        raise BlobNotFound(path) from None
+    try:
+        await f.seek(start)
+        while remaining is None or remaining > 0:
+            chunk = await f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not chunk:
+                return
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    finally:
+        await f.close()
+
+
+class BlobStore:
+    """Interface of a storage backend; keys are "/"-separated relative names."""
+
+    name = ""
+
+    async def write(self, key: str, chunks: AsyncIterator[bytes], content_type: str) -> int:
+        """Store `chunks` under `key` and return the size; nothing is left behind if `chunks` raises."""
+        raise NotImplementedError
+
+    def read(self, key: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream `length` bytes (default: to the end) from offset `start`."""
+        raise NotImplementedError
+
+    async def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        """Remove `key`; a missing key is not an error."""
+        raise NotImplementedError
+
+    def uri(self, key: str) -> str:
+        return f"{self.name}://{key}"
+
+    def local_path(self, key: str) -> Optional[str]:
+        """The blob as a local file, when the backend keeps it on this node's disk."""
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    async def write(self, key: str, chunks: AsyncIterator[bytes], content_type: str) -> int:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".part")
+        os.close(fd)
+        size = 0
+        try:
+            async with aiofiles.open(tmp, "wb") as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return size
+
+    def read(self, key: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        return _read_file(str(self._path(key)), start, length)
+
+    async def size(self, key: str) -> int:
+        try:
+            return self._path(key).stat().st_size
+        except FileNotFoundError:
+            raise BlobNotFound(key) from None
+
+    async def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return str(self._path(key))
+
+
+class GridFSBlobStore(BlobStore):
+    name = "gridfs"
+
+    def __init__(self, bucket_name: str):
+        self.bucket_name = bucket_name
+
+    def _bucket(self) -> Any:
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+        # The database Beanie was initialised with, so this follows MONGODB_URL (or a test stand-in).
+        return AsyncIOMotorGridFSBucket(Document.get_motor_collection().database, bucket_name=self.bucket_name)
+
+    async def write(self, key: str, chunks: AsyncIterator[bytes], content_type: str) -> int:
+        stream = self._bucket().open_upload_stream_with_id(
+            key, key.rsplit("/", 1)[-1], metadata={"content_type": content_type}
+        )
+        size = 0
+        try:
+            async for chunk in chunks:
+                await stream.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            await stream.abort()
+            raise
+        await stream.close()
+        return size
+
+    async def _open(self, key: str) -> Any:
+        from gridfs.errors import NoFile
+
+        try:
+            return await self._bucket().open_download_stream(key)
+        except NoFile:
+            raise BlobNotFound(key) from None
+
+    async def read(self, key: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        grid_out = await self._open(key)
+        grid_out.seek(start)
+        remaining = grid_out.length - start if length is None else min(length, grid_out.length - start)
+        while remaining > 0:
+            chunk = await grid_out.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+    async def size(self, key: str) -> int:
+        return (await self._open(key)).length
+
+    async def delete(self, key: str) -> None:
+        from gridfs.errors import NoFile
+
+        try:
+            await self._bucket().delete(key)
+        except NoFile:
+            pass
+
+
+_UPLOAD_ID = re.compile(r'<UploadId>([^<]+)</UploadId>')
+
+
+class S3BlobStore(BlobStore):
+    """S3-compatible object storage over httpx, path-style, SigV4-signed with unsigned payloads."""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        endpoint: str,
+        bucket: str,
+        region: str,
+        access_key: str,
+        secret_key: str,
+        part_size: int,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.endpoint = endpoint.rstrip("/")
+        self.bucket = bucket
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.part_size = part_size
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(transport=self.transport, timeout=settings.S3_TIMEOUT_SECONDS)
+        return self._client
+
+    def _signed(
+        self, method: str, key: str, query: Optional[Dict[str, str]] = None, headers: Optional[Dict[str, str]] = None,
+        content: Any = None,
+    ) -> httpx.Request:
+        path = f"/{quote(self.bucket, safe='')}/{quote(key, safe='/-_.~')}"
+        canonical_query = "&".join(
+            f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}" for k, v in sorted((query or {}).items())
+        )
+        url = f"{self.endpoint}{path}" + (f"?{canonical_query}" if canonical_query else "")
+        amz_date = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        signed_headers = {
+            **{k.lower(): v for k, v in (headers or {}).items()},
+            "host": httpx.URL(self.endpoint).netloc.decode("ascii"),
+            "x-amz-content-sha256": "UNSIGNED-PAYLOAD",
+            "x-amz-date": amz_date,
+        }
+        names = sorted(signed_headers)
+        canonical = "\n".join([
+            method,
+            path,
+            canonical_query,
+            "".join(f"{name}:{str(signed_headers[name]).strip()}\n" for name in names),
+            ";".join(names),
+            "UNSIGNED-PAYLOAD",
+        ])
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join(
+            ["AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical.encode("utf-8")).hexdigest()]
+        )
+        signing_key = f"AWS4{self.secret_key}".encode("utf-8")
+        for part in (amz_date[:8], self.region, "s3", "aws4_request"):
+            signing_key = hmac.new(signing_key, part.encode("utf-8"), hashlib.sha256).digest()
+        signature = hmac.new(signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+        signed_headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={';'.join(names)}, Signature={signature}"
+        )
+        return self._http().build_request(method, url, headers=signed_headers, content=content)
+
+    async def _send(self, request: httpx.Request, key: str, stream: bool = False) -> httpx.Response:
+        response = await self._http().send(request, stream=stream)
+        if response.status_code == 404:
+            await response.aclose()
+            raise BlobNotFound(key)
+        if response.status_code >= 400:
+            body = (await response.aread())[:500]
+            await response.aclose()
+            raise httpx.HTTPStatusError(
+                f"S3 {request.method} {key} failed with {response.status_code}: {body!r}",
+                request=request, response=response,
+            )
+        return response
+
+    async def write(self, key: str, chunks: AsyncIterator[bytes], content_type: str) -> int:
+        buffer = bytearray()
+        upload_id: Optional[str] = None
+        parts: List[str] = []
+        size = 0
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                while len(buffer) >= self.part_size:
+                    if upload_id is None:
+                        created = await self._send(
+                            self._signed("POST", key, {"uploads": ""}, {"content-type": content_type}), key
+                        )
+                        upload_id = _UPLOAD_ID.search(created.text).group(1)
+                    part, buffer = bytes(buffer[:self.part_size]), buffer[self.part_size:]
+                    parts.append(await self._upload_part(key, upload_id, len(parts) + 1, part))
+            if upload_id is None:
+                # Smaller than one part: a single PUT.
+                await self._send(self._signed("PUT", key, None, {"content-type": content_type}, bytes(buffer)), key)
+                return size
+            if buffer or not parts:
+                parts.append(await self._upload_part(key, upload_id, len(parts) + 1, bytes(buffer)))
+            manifest = "".join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+                for number, etag in enumerate(parts, start=1)
+            )
+            await self._send(self._signed(
+                "POST", key, {"uploadId": upload_id}, {"content-type": "application/xml"},
+                f"<CompleteMultipartUpload>{manifest}</CompleteMultipartUpload>".encode("utf-8"),
+            ), key)
+            return size
+        except BaseException:
+            if upload_id is not None:
+                try:
+                    await self._send(self._signed("DELETE", key, {"uploadId": upload_id}), key)
+                except Exception as e:
+                    logger.warning(f"Could not abort S3 multipart upload of {key}: {e}")
+            raise
+
+    async def _upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        response = await self._send(
+            self._signed("PUT", key, {"partNumber": str(number), "uploadId": upload_id}, None, data), key
+        )
+        return response.headers["etag"]
+
+    async def read(self, key: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        if length is not None and length <= 0:
+            return
+        end = "" if length is None else str(start + length - 1)
+        headers = {"range": f"bytes={start}-{end}"} if start or length is not None else None
+        response = await self._send(self._signed("GET", key, None, headers), key, stream=True)
+        try:
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def size(self, key: str) -> int:
+        response = await self._send(self._signed("HEAD", key), key)
+        return int(response.headers["content-length"])
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._send(self._signed("DELETE", key), key)
+        except BlobNotFound:
+            pass
+
+
+_stores: Dict[str, BlobStore] = {}
+
+
+def get_store(name: Optional[str] = None) -> BlobStore:
+    """The store called `name` (default STORAGE_BACKEND), built from settings on first use."""
+    name = name or settings.STORAGE_BACKEND
+    if name not in _stores:
+        if name == "local":
+            _stores[name] = LocalBlobStore(settings.UPLOAD_DIR)
+        elif name == "gridfs":
+            _stores[name] = GridFSBlobStore(settings.GRIDFS_BUCKET)
+        elif name == "s3":
+            _stores[name] = S3BlobStore(
+                settings.S3_ENDPOINT_URL,
+                settings.S3_BUCKET,
+                settings.S3_REGION,
+                settings.S3_ACCESS_KEY_ID,
+                settings.S3_SECRET_ACCESS_KEY,
+                settings.S3_PART_SIZE_MB * 1024 * 1024,
+            )
+        else:
+            raise ValueError(f"Unknown storage backend {name!r}")
+    return _stores[name]
+
+
+def use_store(store: BlobStore) -> None:
+    """Register `store` under its name, e.g. an S3 store on a stand-in transport."""
+    _stores[store.name] = store
+
+
+def new_key(filename: str) -> str:
+    """A unique key that keeps the (basename of the) uploaded filename and its extension."""
+    name = re.sub(r'[^\w.\- ]', "_", Path(filename).name).strip() or "upload"
+    return f"{uuid.uuid4().hex}/{name}"
+
+
+def read_document(doc: Document, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Stream a byte range of the document's file from wherever it is stored."""
+    if not doc.storage_key:
+        return _read_file(doc.file_path, start, length)
+    return get_store(doc.storage_backend).read(doc.storage_key, start, length)
+
+
+async def document_size(doc: Document) -> int:
+    if not doc.storage_key:
+        try:
+            return os.stat(doc.file_path).st_size
+        except FileNotFoundError:
+            raise BlobNotFound(doc.file_path) from None
+    return await get_store(doc.storage_backend).size(doc.storage_key)
+
+
+# Cache path -> lock, so concurrent requests on one node fetch a blob once.
+_fetching: Dict[str, asyncio.Lock] = {}
+# Cache path -> callers still reading it; `_evict` (in a worker thread) skips these.
+_pinned: Counter = Counter()
+_pin_lock = threading.Lock()
+
+
+def _cache_path(doc: Document) -> Path:
+    digest = hashlib.sha256(f"{doc.storage_backend}\x1f{doc.storage_key}".encode("utf-8")).hexdigest()
+    # The parsers dispatch on the extension, so the copy keeps it.
+    return Path(settings.BLOB_CACHE_DIR) / digest[:2] / f"{digest}{Path(doc.storage_key).suffix.lower()}"
+
+
+async def local_path(doc: Document, pin: bool = False) -> str:
+    """A local file with the document's bytes, fetched into the node's blob cache if need be.
+
+    With `pin`, a cached copy is not evicted until the caller passes the path to `unpin`.
+    """
+    if not doc.storage_key:
+        return doc.file_path
+    store = get_store(doc.storage_backend)
+    direct = store.local_path(doc.storage_key)
+    if direct is not None:
+        return direct
+    path = _cache_path(doc)
+    if not pin:
+        return await _cached(doc, store, path)
+    # Pinned before the existence check, so an eviction already under way cannot remove the copy we return.
+    with _pin_lock:
+        _pinned[str(path)] += 1
+    try:
+        return await _cached(doc, store, path)
+    except BaseException:
+        unpin(str(path))
+        raise
+
+
+def unpin(path: str) -> None:
+    """Release a `local_path(doc, pin=True)`; a no-op for paths that were never pinned."""
+    with _pin_lock:
+        if _pinned[path] > 1:
+            _pinned[path] -= 1
+        else:
+            _pinned.pop(path, None)
+
+
+async def _cached(doc: Document, store: BlobStore, path: Path) -> str:
+    lock = _fetching.setdefault(str(path), asyncio.Lock())
+    async with lock:
+        if path.exists():
+            # Recency for eviction lives in atime; mtime stays the upload time the parse cache keys on.
+            os.utime(path, (time.time(), path.stat().st_mtime))
+            record_cache("blob", True)
+            return str(path)
+        record_cache("blob", False)
+        await _fetch(doc, store, path)
+    _fetching.pop(str(path), None)
+    await asyncio.to_thread(_evict, path)
+    return str(path)
+
+
+async def _fetch(doc: Document, store: BlobStore, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".part")
+    os.close(fd)
+    start = time.perf_counter()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp, "wb") as f:
+            async for chunk in store.read(doc.storage_key):
+                digest.update(chunk)
+                size += len(chunk)
+                await f.write(chunk)
+        if doc.content_hash and digest.hexdigest() != doc.content_hash:
+            raise IOError(f"{store.uri(doc.storage_key)} does not match the document's content hash")
+        stamp = doc.upload_date.timestamp() if doc.upload_date else time.time()
+        os.utime(tmp, (time.time(), stamp))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    logger.info(f"Fetched {size} bytes of {store.uri(doc.storage_key)} in {time.perf_counter() - start:.2f}s")
+
+
+def _evict(keep: Path) -> None:
+    limit = settings.BLOB_CACHE_MAX_MB * 1024 * 1024
+    if limit <= 0:
+        return
+    entries = []
+    for path in Path(settings.BLOB_CACHE_DIR).glob("*/*"):
+        if path.suffix == ".part" or path == keep:
+            continue
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_atime, st.st_size, path))
+    total = sum(size for _, size, _ in entries) + (keep.stat().st_size if keep.exists() else 0)
+    for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if total <= limit:
+            break
+        # Checked and unlinked under the lock, so a copy pinned meanwhile is never removed.
+        # An open handle keeps working after the unlink, and a later access simply fetches again.
+        with _pin_lock:
+            if str(path) in _pinned:
+                continue
+            path.unlink(missing_ok=True)
+        total -= size
@@ -0,0 +1,133 @@
+# services/export_service.py
+"""Streaming bulk export of documents and their analyses.
+
+Rows come straight off a Mongo cursor in bounded batches and are encoded into
+~64 KB chunks, so memory stays flat regardless of how many documents match.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional
+
+from config.settings import settings
+from models.document import Document, DocumentStatus
+
+EXPORT_FIELDS = (
+    "id",
+    "original_filename",
+    "status",
+    "upload_date",
+    "processed_date",
+    "file_size",
+    "query_used",
+    "verification",
+    "analysis",
+    "risk",
+    "recommendation",
+    "error",
+)
+_ANALYSIS_FIELDS = ("query_used", "verification", "analysis", "risk", "recommendation")
+_PROJECTION = {
+    "original_filename": 1, "status": 1, "upload_date": 1, "processed_date": 1,
+    "file_size": 1, "analysis": 1, "error": 1,
+}
+_CHUNK_BYTES = 64 * 1024
+
+
+def build_filter(
+    owner: Optional[str],
+    status: Optional[DocumentStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    filt: Dict[str, Any] = {}
+    if owner is not None:
+        filt["uploaded_by"] = owner
+    if status is not None:
+        filt["status"] = status.value
+    if date_from or date_to:
+        filt["upload_date"] = {}
+        if date_from:
+            filt["upload_date"]["$gte"] = date_from
+        if date_to:
+            filt["upload_date"]["$lt"] = date_to
+    return filt
+
+
+def _row(raw: Dict[str, Any]) -> Dict[str, Any]:
+    analysis = raw.get("analysis") or {}
+    row = {
+        "id": str(raw["_id"]),
+        "original_filename": raw.get("original_filename"),
+        "status": raw.get("status"),
+        "upload_date": raw.get("upload_date"),
+        "processed_date": raw.get("processed_date"),
+        "file_size": raw.get("file_size"),
+        "error": raw.get("error"),
+    }
+    for key in _ANALYSIS_FIELDS:
+        row[key] = analysis.get(key)
+    return row
+
+
+async def iter_rows(filt: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    cursor = Document.get_motor_collection().find(
+        filt, _PROJECTION, sort=[("_id", 1)], batch_size=settings.EXPORT_BATCH_SIZE
+    )
+    async for raw in cursor:
+        yield _row(raw)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat() + "Z"
+    return str(value)
+
+
+async def ndjson_chunks(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    buf = []
+    size = 0
+    async for row in rows:
+        line = json.dumps(row, default=_json_default, ensure_ascii=False) + "\n"
+        buf.append(line)
+        size += len(line)
+        if size >= _CHUNK_BYTES:
+            yield "".join(buf).encode("utf-8")
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat() + "Z"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str, ensure_ascii=False)
+    return value
+
+
+async def csv_chunks(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_FIELDS)
+    async for row in rows:
+        writer.writerow([_csv_value(row[f]) for f in EXPORT_FIELDS])
+        if out.tell() >= _CHUNK_BYTES:
+            yield out.getvalue().encode("utf-8")
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue().encode("utf-8")
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,260 @@
+# services/llm_usage.py
+"""Token, latency and cost accounting for crew LLM calls.
+
+`crew.metering.MeteredLLM` reports every call to the `UsageLedger` of the run
+in progress (held by its RunControl). When the run ends the ledger's summary
+is stored on the document as `llm_usage` (calls, per-stage and total figures)
+and folded with `$inc` into that day's analytics rollup under `llm`, by user
+and by stage, which is what the usage and prompt-size reports read.
+
+The ledger also keeps the run's model routing decisions (crew.routing): one
+entry per model tried, with its outcome, and how far each stage has escalated
+along its fallback chain. They are stored with the summary and counted per
+stage, model and outcome in the rollup.
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from database.repositories import DocumentRepository
+from models.document import AnalyticsRollup, Document
+
+logger = logging.getLogger(__name__)
+
+_TOTALS = ("calls", "failed_calls", "retries", "prompt_tokens", "completion_tokens", "cost_usd", "latency_seconds")
+_TOP_USERS = 50
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD for one call from LLM_PRICING; the longest listed prefix of the model name wins."""
+    name = model.split("/")[-1]
+    for listed in sorted(settings.LLM_PRICING, key=len, reverse=True):
+        if name.startswith(listed):
+            price = settings.LLM_PRICING[listed]
+            return (prompt_tokens * price.get("prompt", 0.0) + completion_tokens * price.get("completion", 0.0)) / 1e6
+    return 0.0
+
+
+def _empty() -> Dict[str, Any]:
+    return {key: 0 for key in _TOTALS}
+
+
+def _add(totals: Dict[str, Any], call: Dict[str, Any]) -> None:
+    totals["calls"] += 1
+    totals["failed_calls"] += 0 if call["ok"] else 1
+    totals["retries"] += 1 if call["attempt"] > 1 else 0
+    totals["prompt_tokens"] += call["prompt_tokens"]
+    totals["completion_tokens"] += call["completion_tokens"]
+    totals["cost_usd"] += call["cost_usd"]
+    totals["latency_seconds"] += call["latency_seconds"]
+
+
+class UsageLedger:
+    """LLM calls of one analysis run; written from the crew's worker thread."""
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self._failures: Dict[str, int] = defaultdict(int)  # stage -> consecutive failed calls
+        self.routes: List[Dict[str, Any]] = []
+        self._escalated: Dict[str, int] = {}  # stage -> position in its fallback chain
+        self._lock = threading.Lock()
+
+    def record(
+        self, stage: str, model: str, prompt_tokens: int, completion_tokens: int, latency: float, ok: bool
+    ) -> Dict[str, Any]:
+        with self._lock:
+            attempt = self._failures[stage] + 1
+            self._failures[stage] = 0 if ok else attempt
+            call = {
+                "stage": stage,
+                "model": model,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost_usd": call_cost(model, prompt_tokens, completion_tokens),
+                "latency_seconds": round(latency, 4),
+                "ok": ok,
+                "attempt": attempt,
+                "at": datetime.utcnow(),
+            }
+            self.calls.append(call)
+        return call
+
+    def route(self, stage: str, model: str, outcome: str, latency: Optional[float], position: int) -> None:
+        """Record one routing decision; any outcome but "accepted" moves the stage past `position`."""
+        with self._lock:
+            self.routes.append({
+                "stage": stage,
+                "model": model,
+                "position": position,
+                "outcome": outcome,
+                "latency_seconds": None if latency is None else round(latency, 4),
+                "at": datetime.utcnow(),
+            })
+            if outcome != "accepted":
+                self._escalated[stage] = max(self._escalated.get(stage, 0), position + 1)
+
+    def chain_start(self, stage: str) -> int:
+        """Where this run's next call for `stage` starts in the fallback chain."""
+        with self._lock:
+            return self._escalated.get(stage, 0)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = list(self.calls)
+            routes = list(self.routes)
+        stages: Dict[str, Dict[str, Any]] = {}
+        total = _empty()
+        for call in calls:
+            stage = stages.setdefault(call["stage"], {**_empty(), "max_prompt_tokens": 0, "models": []})
+            _add(stage, call)
+            _add(total, call)
+            stage["max_prompt_tokens"] = max(stage["max_prompt_tokens"], call["prompt_tokens"])
+            if call["model"] not in stage["models"]:
+                stage["models"].append(call["model"])
+        return {"calls": calls, "stages": stages, "total": total, "routes": routes}
+
+
+def _field(name: str) -> str:
+    # Model names such as "gpt-4.1-nano" are used as rollup field names.
+    return name.replace(".", "_").replace("$", "_")
+
+
+def _rollup_update(user_id: str, summary: Dict[str, Any]) -> Dict[str, Any]:
+    inc: Dict[str, Any] = {}
+    peaks: Dict[str, int] = {}
+    for key in _TOTALS:
+        inc[f"llm.users.{user_id}.{key}"] = summary["total"][key]
+    for stage, figures in summary["stages"].items():
+        for key in _TOTALS:
+            inc[f"llm.stages.{stage}.{key}"] = figures[key]
+        peaks[f"llm.stages.{stage}.max_prompt_tokens"] = figures["max_prompt_tokens"]
+    for route in summary.get("routes", []):
+        path = f"llm.routing.{route['stage']}.{_field(route['model'])}.{route['outcome']}"
+        inc[path] = inc.get(path, 0) + 1
+    return {"$inc": inc, "$max": peaks, "$set": {"updated_at": datetime.utcnow()}}
+
+
+async def record_run(doc: Document, user_id: str, ledger: UsageLedger) -> None:
+    """Store a finished run's usage on its document and in today's rollup; never fails the caller."""
+    if not ledger.calls:
+        return
+    summary = ledger.summary()
+    total = summary["total"]
+    logger.info(
+        f"Analysis {doc.id} used {total['prompt_tokens']}+{total['completion_tokens']} tokens "
+        f"in {total['calls']} LLM calls (${total['cost_usd']:.4f})"
+    )
+    try:
+        await DocumentRepository.update(doc, llm_usage=summary)
+        await AnalyticsRollup.get_motor_collection().update_one(
+            {"day": datetime.utcnow().strftime("%Y-%m-%d")}, _rollup_update(user_id, summary), upsert=True
+        )
+    except Exception as e:
+        logger.warning(f"Could not record LLM usage for document {doc.id}: {e}")
+
+
+def _window(days: int, offset: int = 0) -> "tuple[str, str]":
+    """[first, last] UTC days of the `days`-day window ending `offset` windows ago."""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    last = today - timedelta(days=offset * days)
+    first = last - timedelta(days=days - 1)
+    return first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d")
+
+
+async def _rollups(first: str, last: str) -> List[Dict[str, Any]]:
+    cursor = AnalyticsRollup.get_motor_collection().find(
+        {"day": {"$gte": first, "$lte": last}, "llm": {"$exists": True}}, {"day": 1, "llm": 1}
+    ).sort("day", 1)
+    return await cursor.to_list(length=None)
+
+
+def _merge(into: Dict[str, Dict[str, Any]], source: Dict[str, Dict[str, Any]]) -> None:
+    for name, figures in (source or {}).items():
+        merged = into.setdefault(name, _empty())
+        for key in _TOTALS:
+            merged[key] += figures.get(key, 0)
+        if "max_prompt_tokens" in figures:
+            merged["max_prompt_tokens"] = max(merged.get("max_prompt_tokens", 0), figures["max_prompt_tokens"])
+
+
+def _per_call(figures: Dict[str, Any]) -> Optional[float]:
+    return figures["prompt_tokens"] / figures["calls"] if figures.get("calls") else None
+
+
+async def usage_report(days: int) -> Dict[str, Any]:
+    """Tokens, cost, calls and retries by user and by stage over the last `days` days.
+
+    `routing` counts routing decisions by stage, model and outcome.
+    """
+    first, last = _window(days)
+    users: Dict[str, Dict[str, Any]] = {}
+    stages: Dict[str, Dict[str, Any]] = {}
+    routing: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for raw in await _rollups(first, last):
+        _merge(users, raw["llm"].get("users"))
+        _merge(stages, raw["llm"].get("stages"))
+        for stage, models in (raw["llm"].get("routing") or {}).items():
+            for model, outcomes in models.items():
+                merged = routing.setdefault(stage, {}).setdefault(model, {})
+                for outcome, count in outcomes.items():
+                    merged[outcome] = merged.get(outcome, 0) + count
+    total = _empty()
+    for figures in stages.values():
+        for key in _TOTALS:
+            total[key] += figures[key]
+    ranked = sorted(users.items(), key=lambda kv: kv[1]["prompt_tokens"] + kv[1]["completion_tokens"], reverse=True)
+    return {
+        "from": first,
+        "to": last,
+        "total": total,
+        "by_stage": {
+            stage: {**figures, "mean_prompt_tokens": _per_call(figures)} for stage, figures in sorted(stages.items())
+        },
+        "by_user": [{"user_id": user, **figures} for user, figures in ranked[:_TOP_USERS]],
+        "routing": routing,
+    }
+
+
+async def prompt_size_report(days: int, threshold: float) -> Dict[str, Any]:
+    """Mean prompt tokens per call by stage, this window against the one before.
+
+    A stage is flagged when its mean grew by more than `threshold` (0.2 = 20%).
+    `daily` gives the per-day means of the current window to show the trend.
+    """
+    current_first, current_last = _window(days)
+    previous_first, previous_last = _window(days, offset=1)
+    current: Dict[str, Dict[str, Any]] = {}
+    previous: Dict[str, Dict[str, Any]] = {}
+    daily: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for raw in await _rollups(previous_first, current_last):
+        stages = raw["llm"].get("stages") or {}
+        if raw["day"] >= current_first:
+            _merge(current, stages)
+            for stage, figures in stages.items():
+                daily[stage].append({"day": raw["day"], "mean_prompt_tokens": _per_call(figures)})
+        else:
+            _merge(previous, stages)
+
+    rows = []
+    for stage in sorted(set(current) | set(previous)):
+        now = _per_call(current.get(stage, {}))
+        before = _per_call(previous.get(stage, {}))
+        growth = (now / before - 1) if now is not None and before else None
+        rows.append({
+            "stage": stage,
+            "mean_prompt_tokens": now,
+            "previous_mean_prompt_tokens": before,
+            "growth": growth,
+            "max_prompt_tokens": current.get(stage, {}).get("max_prompt_tokens"),
+            "flagged": growth is not None and growth > threshold,
+            "daily": daily.get(stage, []),
+        })
+    return {
+        "window": {"from": current_first, "to": current_last},
+        "previous_window": {"from": previous_first, "to": previous_last},
+        "threshold": threshold,
+        "stages": rows,
+    }
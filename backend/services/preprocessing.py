@@ -0,0 +1,83 @@
+# services/preprocessing.py
+"""Upload-time preprocessing: parse, index and extract metrics before any analysis is asked for.
+
+Queued by the upload route (EAGER_EXTRACTION_ENABLED). The parse runs in the
+CPU pool and lands in the parse cache, so every later read of the file (the
+agents' parse tool, search indexing) is a cache hit. Pages go into the search
+page store; the regex metrics and the boilerplate report go onto the document,
+which then moves from UPLOADED to EXTRACTED. A file that breaks the parser's
+sandbox (memory or CPU limit, timeout, worker crash; see services.process_pool)
+marks the document FAILED with the reason. Any other failure leaves it
+UPLOADED: an analysis will simply parse it on demand.
+
+An analysis started while preprocessing is still running waits for it rather
+than parsing the same file a second time.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict
+
+from beanie import PydanticObjectId
+
+from database.repositories import DocumentRepository
+from services import blob_storage
+from models.document import Document, DocumentStatus
+from services.process_pool import SANDBOX_FAILURES, run_cpu
+from services.search_service import safe_index_document
+from tools.document_extraction import FinancialDocumentTool
+
+logger = logging.getLogger(__name__)
+
+# Document id -> running preprocessing, so an analysis can wait for it.
+_inflight: Dict[str, "asyncio.Future[None]"] = {}
+
+
+async def preprocess_document(document_id: str) -> None:
+    """Background task; never raises."""
+    running = _inflight[document_id] = asyncio.get_running_loop().create_future()
+    try:
+        await _preprocess(document_id)
+    except SANDBOX_FAILURES as e:
+        logger.warning(f"Extraction of document {document_id} broke its sandbox: {e}")
+        doc = await Document.get(PydanticObjectId(document_id))
+        if doc is not None:
+            await DocumentRepository.transition(
+                doc, DocumentStatus.FAILED, (DocumentStatus.UPLOADED,), error=extraction_error(e)
+            )
+    except Exception as e:
+        logger.warning(f"Preprocessing failed for document {document_id}: {e}")
+    finally:
+        _inflight.pop(document_id, None)
+        running.set_result(None)
+
+
+async def _preprocess(document_id: str) -> None:
+    doc = await Document.get(PydanticObjectId(document_id))
+    if doc is None or doc.status != DocumentStatus.UPLOADED:
+        return
+    start = time.perf_counter()
+    path = await blob_storage.local_path(doc, pin=True)
+    try:
+        text, metrics, boilerplate = await run_cpu(FinancialDocumentTool.read_with_metrics, path)
+    finally:
+        blob_storage.unpin(path)
+    await safe_index_document(doc, text)
+
+    fields = {"extracted_date": datetime.utcnow(), "metrics": metrics, "boilerplate": boilerplate}
+    # An analysis may have been queued meanwhile; its status wins, the metrics are still recorded.
+    if not await DocumentRepository.transition(doc, DocumentStatus.EXTRACTED, (DocumentStatus.UPLOADED,), **fields):
+        await DocumentRepository.update(doc, **fields)
+    logger.info(f"Preprocessed document {document_id} in {time.perf_counter() - start:.2f}s")
+
+
+def extraction_error(e: BaseException) -> str:
+    return f"Extraction failed: {e}"
+
+
+async def wait_for_preprocessing(document_id: str) -> None:
+    """Return once any preprocessing of `document_id` has finished."""
+    running = _inflight.get(document_id)
+    if running is not None:
+        await asyncio.shield(running)
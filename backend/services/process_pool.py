@@ -0,0 +1,418 @@
+# services/process_pool.py
+"""Application-wide process pool for CPU-bound work (parsing, cleaning, metric regexes).
+
+Started and stopped by the app's lifecycle hooks. Coroutines await `run_cpu`;
+crew tools, which already run on kickoff_async's worker thread, call
+`run_cpu_sync`. Either way the GIL-heavy work happens in another process, so
+the event loop keeps serving requests while a large PDF is parsed.
+
+- Backpressure: at most CPU_POOL_WORKERS + CPU_POOL_MAX_QUEUED tasks are
+  submitted at once; further callers wait for a slot and get `CpuPoolBusy` if
+  none frees up within the task timeout.
+- Timeouts: a task running past CPU_TASK_TIMEOUT_SECONDS raises
+  `CpuTaskTimeout`. The clock starts when a worker picks the task up, so time
+  spent queued never counts. Only that worker is terminated and replaced;
+  tasks queued or running on the other workers are not affected.
+- Recycling: each worker is replaced after CPU_POOL_MAX_TASKS_PER_CHILD tasks
+  to bound leaks in the native PDF libraries.
+- Sandboxing: a malformed or hostile PDF can make pdfplumber/PyMuPDF allocate
+  gigabytes or spin. Workers run under an address-space limit
+  (CPU_WORKER_MEMORY_MB, RLIMIT_AS) and each task under a CPU-time limit
+  (CPU_TASK_CPU_SECONDS, RLIMIT_CPU, re-armed per task); going over either
+  raises `CpuTaskLimitExceeded` and leaves the worker usable. A worker that
+  dies outright (a native crash, the kernel's OOM killer) is replaced; its
+  task is retried once and then fails with `CpuWorkerCrashed`. Only the result
+  is sent back, pickled over the worker's pipe, so the API process never holds
+  the parser's working set.
+
+Each worker is a spawned process with its own pipe and a feeder thread in this
+process that hands it one task at a time from a shared queue. That is what
+lets a stuck worker be killed on its own: a ProcessPoolExecutor breaks as a
+whole when any of its processes dies, failing every caller's future.
+
+Without a started pool (scripts, benchmarks, CPU_POOL_WORKERS=0) work runs in
+the calling thread, or on a thread when called from a coroutine.
+"""
+import asyncio
+import logging
+import math
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+from config.settings import settings
+from observability.metrics import CPU_POOL_PENDING, CPU_POOL_RESTARTS, CPU_TASK_DURATION
+
+try:
+    import resource
+except ImportError:  # not available on Windows; workers then run without limits
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CpuPoolBusy(RuntimeError):
+    """No pool slot freed up within the task timeout."""
+
+
+class CpuTaskTimeout(TimeoutError):
+    """A task ran past its timeout; its worker was terminated."""
+
+
+class CpuTaskLimitExceeded(RuntimeError):
+    """A task went over its worker's memory or CPU-time limit."""
+
+
+class CpuWorkerCrashed(RuntimeError):
+    """The worker running a task died, and died again when the task was retried."""
+
+
+# What a task that breaks its sandbox raises; callers record these against the input.
+SANDBOX_FAILURES = (CpuTaskTimeout, CpuTaskLimitExceeded, CpuWorkerCrashed)
+
+
+# What a caller sees when the worker running its task died; retried once, then CpuWorkerCrashed.
+class _WorkerDied(RuntimeError):
+    pass
+
+
+# Raised from the SIGXCPU handler; a BaseException so parser code catching Exception cannot swallow it.
+class _CpuTimeExceeded(BaseException):
+    pass
+
+
+_worker_memory_mb = 0
+
+
+def _on_cpu_limit(signum: int, frame: Any) -> None:
+    raise _CpuTimeExceeded()
+
+
+def _init_worker(memory_mb: int = 0) -> None:
+    global _worker_memory_mb
+    # Ctrl-C reaches the whole process group; let the parent decide when workers stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is None:
+        return
+    if memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        _worker_memory_mb = memory_mb
+    signal.signal(signal.SIGXCPU, _on_cpu_limit)
+
+
+def _limited(fn: Callable[..., T], args: tuple, cpu_seconds: float) -> T:
+    """Runs in a worker: `fn(*args)` with at most `cpu_seconds` of CPU time."""
+    if resource is None:
+        return fn(*args)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if cpu_seconds > 0:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # RLIMIT_CPU counts the worker's whole life, so the limit is moved up before every task.
+        soft = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+    try:
+        return fn(*args)
+    except _CpuTimeExceeded:
+        raise CpuTaskLimitExceeded(f"CPU time limit of {cpu_seconds:g}s exceeded") from None
+    except MemoryError:
+        limit = f"memory limit of {_worker_memory_mb} MB" if _worker_memory_mb else "available memory"
+        raise CpuTaskLimitExceeded(f"{limit} exceeded") from None
+    finally:
+        if cpu_seconds > 0:
+            resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+def _worker_main(conn: Any, memory_mb: int) -> None:
+    """Worker process loop: run (fn, args, cpu_seconds) tasks from `conn` until told to stop."""
+    _init_worker(memory_mb)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        except Exception as e:  # the task's function could not be unpickled here (e.g. an import error)
+            conn.send(("error", e))
+            continue
+        if task is None:
+            return
+        fn, args, cpu_seconds = task
+        try:
+            reply = ("ok", _limited(fn, args, cpu_seconds))
+        except Exception as e:
+            reply = ("error", e)
+        try:
+            conn.send(reply)
+        except Exception as e:  # the result or exception does not pickle
+            conn.send(("error", RuntimeError(f"{_label(fn)}: {type(e).__name__}: {e}")))
+
+
+_Task = Tuple[Future, Callable[..., Any], tuple, float]
+
+
+class _Worker:
+    """One worker process and the feeder thread that gives it tasks from the shared queue."""
+
+    def __init__(self, workers: "_Workers", index: int):
+        self.workers = workers
+        self.name = f"cpu-worker-{index}"
+        self.process: Optional[Any] = None
+        self.conn: Optional[Any] = None
+        self.tasks_done = 0
+        self.thread = threading.Thread(target=self._serve, name=f"{self.name}-feeder", daemon=True)
+
+    def _spawn(self) -> None:
+        ctx = self.workers.ctx
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child, settings.CPU_WORKER_MEMORY_MB), name=self.name, daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.tasks_done = 0
+
+    def _discard(self, kill: bool) -> None:
+        """Stop this worker's process: killed when stuck, else asked to exit once idle."""
+        process, conn, self.process, self.conn = self.process, self.conn, None, None
+        if process is None:
+            return
+        if not kill:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            process.join(timeout=5)
+        if process.is_alive():
+            process.kill()
+            process.join(timeout=5)
+        conn.close()
+
+    def _serve(self) -> None:
+        try:
+            self._spawn()
+        except Exception as e:  # retried when the first task arrives
+            logger.error(f"Could not start {self.name}: {e}")
+        while True:
+            task = self.workers.queue.get()
+            if task is None:
+                break
+            future = task[0]
+            if not future.set_running_or_notify_cancel():
+                continue  # its caller gave up while it was queued
+            self._run(*task)
+        self._discard(kill=False)
+
+    def _run(self, future: Future, fn: Callable[..., Any], args: tuple, timeout: float) -> None:
+        if self.process is None or not self.process.is_alive():
+            self._discard(kill=True)
+            try:
+                self._spawn()
+            except Exception as e:
+                future.set_exception(_WorkerDied(f"could not start {self.name}: {e}"))
+                return
+        try:
+            self.conn.send((fn, args, settings.CPU_TASK_CPU_SECONDS))
+        except (OSError, EOFError) as e:
+            self._died(future, e)
+            return
+        except Exception as e:  # fn or args do not pickle; the worker never saw the task
+            future.set_exception(e)
+            return
+        # The timeout starts now, when this worker has the task, not when the caller queued it.
+        if not self.conn.poll(timeout):
+            # No per-task cancel exists for native code; a stuck worker only stops when killed.
+            self._discard(kill=True)
+            CPU_POOL_RESTARTS.labels("timeout").inc()
+            future.set_exception(CpuTaskTimeout(f"{_label(fn)} exceeded {timeout:g}s"))
+            return
+        try:
+            status, value = self.conn.recv()
+        except (OSError, EOFError) as e:
+            self._died(future, e)
+            return
+        if status == "ok":
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+        self.tasks_done += 1
+        if settings.CPU_POOL_MAX_TASKS_PER_CHILD and self.tasks_done >= settings.CPU_POOL_MAX_TASKS_PER_CHILD:
+            self._discard(kill=False)
+            self._spawn()
+
+    def _died(self, future: Future, error: BaseException) -> None:
+        exitcode = None
+        if self.process is not None:
+            self.process.join(timeout=1)
+            exitcode = self.process.exitcode
+        self._discard(kill=True)
+        CPU_POOL_RESTARTS.labels("crash").inc()
+        future.set_exception(_WorkerDied(f"{self.name} died (exit code {exitcode}): {error!r}"))
+
+
+class _Workers:
+    def __init__(self, size: int):
+        # spawn rather than fork: the parent runs Motor and crew threads that must not be copied mid-flight.
+        self.ctx = multiprocessing.get_context("spawn")
+        self.queue: "queue.SimpleQueue[Optional[_Task]]" = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.workers: List[_Worker] = [_Worker(self, i) for i in range(size)]
+        for worker in self.workers:
+            worker.thread.start()
+
+    def submit(self, fn: Callable[..., Any], args: tuple, timeout: float) -> Future:
+        future: Future = Future()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("CPU pool is not running")
+            self.queue.put((future, fn, args, timeout))
+        return future
+
+    def shutdown(self) -> None:
+        """Fail queued tasks, let running ones finish, then stop every worker."""
+        with self.lock:
+            self.closed = True
+        while True:
+            try:
+                task = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None:
+                try:
+                    task[0].set_exception(RuntimeError("CPU pool stopped"))
+                except InvalidStateError:
+                    pass  # cancelled by its caller
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.thread.join()
+
+
+class _Pool:
+    workers: Optional[_Workers] = None
+    slots: Optional[threading.BoundedSemaphore] = None
+    lock = threading.Lock()
+
+
+_pool = _Pool()
+
+
+def start_process_pool() -> None:
+    if settings.CPU_POOL_WORKERS <= 0:
+        logger.info("CPU pool disabled; CPU-bound work runs on threads")
+        return
+    with _pool.lock:
+        if _pool.workers is None:
+            _pool.slots = threading.BoundedSemaphore(settings.CPU_POOL_WORKERS + settings.CPU_POOL_MAX_QUEUED)
+            _pool.workers = _Workers(settings.CPU_POOL_WORKERS)
+            logger.info(f"CPU pool started with {settings.CPU_POOL_WORKERS} workers")
+
+
+async def stop_process_pool() -> None:
+    with _pool.lock:
+        workers, _pool.workers = _pool.workers, None
+    if workers is not None:
+        await asyncio.to_thread(workers.shutdown)
+        logger.info("CPU pool stopped")
+
+
+def _submit(fn: Callable[..., T], args: tuple, timeout: float) -> Future:
+    workers = _pool.workers
+    if workers is None:
+        raise RuntimeError("CPU pool is not running")
+    return workers.submit(fn, args, timeout)
+
+
+def _label(fn: Callable[..., Any]) -> str:
+    return getattr(fn, "__qualname__", None) or repr(fn)
+
+
+def _crashed(fn: Callable[..., Any]) -> CpuWorkerCrashed:
+    return CpuWorkerCrashed(f"worker process died running {_label(fn)} (native crash or out of memory)")
+
+
+def run_cpu_sync(fn: Callable[..., T], *args: Any, timeout: Optional[float] = None) -> T:
+    """Run `fn(*args)` in the pool and block the calling (non-loop) thread for the result."""
+    if _pool.workers is None:
+        return fn(*args)
+    timeout = timeout or settings.CPU_TASK_TIMEOUT_SECONDS
+    if not _pool.slots.acquire(timeout=timeout):
+        raise CpuPoolBusy(f"No CPU pool slot for {_label(fn)} within {timeout:g}s")
+    CPU_POOL_PENDING.inc()
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        for attempt in range(2):
+            future = _submit(fn, args, timeout)
+            try:
+                result = future.result()  # the worker's feeder enforces the timeout
+                outcome = "ok"
+                return result
+            except CpuTaskTimeout:
+                outcome = "timeout"
+                raise
+            except CpuTaskLimitExceeded:
+                outcome = "limit"
+                raise
+            except _WorkerDied as e:
+                if attempt:
+                    outcome = "crashed"
+                    raise _crashed(fn) from e
+                logger.warning(f"CPU pool worker died during {_label(fn)}; retrying once ({e})")
+    finally:
+        CPU_POOL_PENDING.dec()
+        _pool.slots.release()
+        CPU_TASK_DURATION.labels(_label(fn), outcome).observe(time.perf_counter() - start)
+
+
+async def _acquire_slot(timeout: float) -> bool:
+    # Polled rather than acquired on a helper thread, so a cancelled caller never leaks a slot.
+    deadline = time.monotonic() + timeout
+    delay = 0.005
+    while not _pool.slots.acquire(blocking=False):
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.25)
+    return True
+
+
+async def run_cpu(fn: Callable[..., T], *args: Any, timeout: Optional[float] = None) -> T:
+    """Awaitable form of `run_cpu_sync` for coroutines on the event loop."""
+    if _pool.workers is None:
+        return await asyncio.to_thread(fn, *args)
+    timeout = timeout or settings.CPU_TASK_TIMEOUT_SECONDS
+    if not await _acquire_slot(timeout):
+        raise CpuPoolBusy(f"No CPU pool slot for {_label(fn)} within {timeout:g}s")
+    CPU_POOL_PENDING.inc()
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        for attempt in range(2):
+            # Cancelling this coroutine cancels the task too if it is still queued.
+            future = _submit(fn, args, timeout)
+            try:
+                result = await asyncio.wrap_future(future)  # the worker's feeder enforces the timeout
+                outcome = "ok"
+                return result
+            except CpuTaskTimeout:
+                outcome = "timeout"
+                raise
+            except CpuTaskLimitExceeded:
+                outcome = "limit"
+                raise
+            except _WorkerDied as e:
+                if attempt:
+                    outcome = "crashed"
+                    raise _crashed(fn) from e
+                logger.warning(f"CPU pool worker died during {_label(fn)}; retrying once ({e})")
+    finally:
+        CPU_POOL_PENDING.dec()
+        _pool.slots.release()
+        CPU_TASK_DURATION.labels(_label(fn), outcome).observe(time.perf_counter() - start)
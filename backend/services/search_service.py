@@ -0,0 +1,122 @@
+# services/search_service.py
+import re
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from beanie import PydanticObjectId
+from models.document import Document, DocumentPage
+
+logger = logging.getLogger(__name__)
+
+_PAGE_MARKER = re.compile(r'\[Page (\d+)\]')
+_SNIPPET_RADIUS = 90
+_CHUNK_CHARS = 64 * 1024  # per search record; well under Mongo's 16 MB document limit
+_ANALYSIS_SECTIONS = ("verification", "analysis", "risk", "recommendation")
+
+
+def _bounded(body: str) -> Iterator[str]:
+    """Cut `body` into pieces of at most _CHUNK_CHARS, at a line break where there is one."""
+    while len(body) > _CHUNK_CHARS:
+        cut = body.rfind("\n", 0, _CHUNK_CHARS) + 1 or _CHUNK_CHARS
+        piece, body = body[:cut].strip(), body[cut:]
+        if piece:
+            yield piece
+    if body.strip():
+        yield body.strip()
+
+
+def split_pages(text: str) -> List[Tuple[str, int, str]]:
+    """Split extracted text into (section, number, text) search records.
+
+    PDF text is split on its `[Page N]` markers ("page"); a page longer than
+    _CHUNK_CHARS keeps its number across several records. Unpaged DOCX/TXT text
+    is cut into line-aligned chunks numbered from 1 ("chunk"), so no record
+    approaches Mongo's document size limit and a hit still points into the file.
+    """
+    parts = _PAGE_MARKER.split(text)
+    if len(parts) == 1:
+        return [("chunk", n, body) for n, body in enumerate(_bounded(text), start=1)]
+    pages = []
+    for number, body in zip(parts[1::2], parts[2::2]):
+        pages.extend(("page", int(number), piece) for piece in _bounded(body))
+    return pages
+
+
+async def index_document(doc: Document, text: str) -> int:
+    """(Re)index a processed document's pages and analysis sections; returns records written."""
+    await DocumentPage.find(DocumentPage.document_id == str(doc.id)).delete()
+
+    records = [
+        DocumentPage(
+            document_id=str(doc.id), uploaded_by=doc.uploaded_by, section=section, page_number=n, text=body,
+        )
+        for section, n, body in split_pages(text)
+    ]
+    for section in _ANALYSIS_SECTIONS:
+        value = (doc.analysis or {}).get(section)
+        if value:
+            records.append(DocumentPage(
+                document_id=str(doc.id), uploaded_by=doc.uploaded_by, section=section, text=str(value),
+            ))
+    if records:
+        await DocumentPage.insert_many(records)
+    return len(records)
+
+
+def _snippet(text: str, query: str) -> str:
+    terms = [t for t in re.findall(r'\w+', query.lower()) if len(t) > 1]
+    lowered = text.lower()
+    hit = min((i for i in (lowered.find(t) for t in terms) if i >= 0), default=0)
+    start = max(0, hit - _SNIPPET_RADIUS)
+    end = min(len(text), hit + _SNIPPET_RADIUS)
+    snippet = " ".join(text[start:end].split())
+    return f"{'…' if start else ''}{snippet}{'…' if end < len(text) else ''}"
+
+
+async def search_documents(owner: str, query: str, limit: int = 20, skip: int = 0) -> Dict[str, Any]:
+    """Ranked text-index hits over one owner's pages and analysis sections."""
+    collection = DocumentPage.get_motor_collection()
+    cursor = (
+        collection.find(
+            {"uploaded_by": owner, "$text": {"$search": query}},
+            {"score": {"$meta": "textScore"}, "document_id": 1, "page_number": 1, "section": 1, "text": 1},
+        )
+        .sort([("score", {"$meta": "textScore"})])
+        .skip(skip)
+        .limit(limit)
+    )
+    hits = await cursor.to_list(length=limit)
+
+    names: Dict[str, str] = {}
+    doc_ids = {h["document_id"] for h in hits}
+    if doc_ids:
+        docs = await Document.find({"_id": {"$in": [PydanticObjectId(i) for i in doc_ids]}}).to_list()
+        names = {str(d.id): d.original_filename for d in docs}
+
+    return {
+        "query": query,
+        "hits": [
+            {
+                "document_id": h["document_id"],
+                "original_filename": names.get(h["document_id"]),
+                "page_number": h.get("page_number"),
+                "section": h.get("section", "page"),
+                "score": h["score"],
+                "snippet": _snippet(h["text"], query),
+            }
+            for h in hits
+        ],
+        "skip": skip,
+        "limit": limit,
+    }
+
+
+async def safe_index_document(doc: Document, text: Optional[str]) -> None:
+    """Index without letting a search failure affect the analysis result."""
+    if text is None:
+        return
+    try:
+        count = await index_document(doc, text)
+        logger.info(f"Indexed {count} search records for document {doc.id}")
+    except Exception as e:
+        logger.warning(f"Search indexing failed for document {doc.id}: {e}")
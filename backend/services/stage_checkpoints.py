@@ -0,0 +1,108 @@
+# services/stage_checkpoints.py
+"""Per-stage checkpoints so a retried analysis resumes where the last run stopped.
+
+Each finished stage is stored on the document under ``stage_outputs.<stage>``
+with a hash of everything that fed into it: the file contents, the query, the
+stage's model chain, its prompt, and the previous stage's hash and output. On a
+re-run the longest prefix of stages whose stored hash still matches is reused.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from crewai import Task
+
+from config.settings import settings
+from models.document import Document
+
+logger = logging.getLogger(__name__)
+
+_CHUNK = 1 << 20
+
+
+def file_digest(file_path: str) -> str:
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def stage_input_hash(
+    stage: str, file_hash: str, query: str, template: Task, prev_hash: Optional[str], prev_output: Optional[str]
+) -> str:
+    blob = json.dumps(
+        {
+            "file": file_hash,
+            "query": query,
+            "models": settings.models_for(stage),
+            "description": template.description,
+            "expected_output": template.expected_output,
+            "prev_hash": prev_hash,
+            "prev_output": prev_output,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def restorable_stages(
+    doc: Document, file_hash: str, query: str, stages: Sequence[Tuple[str, Task]]
+) -> List[Tuple[str, str, str]]:
+    """Leading stages whose checkpoint is still valid, as (stage, input_hash, output)."""
+    saved = doc.stage_outputs or {}
+    restored: List[Tuple[str, str, str]] = []
+    prev_hash = prev_output = None
+    for stage, template in stages:
+        expected = stage_input_hash(stage, file_hash, query, template, prev_hash, prev_output)
+        entry = saved.get(stage)
+        if not entry or entry.get("input_hash") != expected:
+            break
+        restored.append((stage, expected, entry["output"]))
+        prev_hash, prev_output = expected, entry["output"]
+    return restored
+
+
+class CheckpointWriter:
+    """Persists stage outputs from the crew's worker thread onto the event loop.
+
+    Writes are partial ``$set`` updates so they never clobber concurrent changes
+    to other fields; the in-memory document is updated too so a later full save
+    keeps them.
+    """
+
+    def __init__(self, doc: Document, file_hash: str, query: str, loop: asyncio.AbstractEventLoop):
+        self.doc = doc
+        self.file_hash = file_hash
+        self.query = query
+        self.loop = loop
+        self.prev_hash: Optional[str] = None
+        self.prev_output: Optional[str] = None
+        self._pending: List[Future] = []
+
+    def resume_after(self, input_hash: str, output: str) -> None:
+        self.prev_hash, self.prev_output = input_hash, output
+
+    def save(self, stage: str, template: Task, output: str) -> None:
+        """Called from the worker thread when `stage` finishes."""
+        input_hash = stage_input_hash(stage, self.file_hash, self.query, template, self.prev_hash, self.prev_output)
+        self.resume_after(input_hash, output)
+        entry = {"input_hash": input_hash, "output": output, "completed_at": datetime.utcnow()}
+        self._pending.append(asyncio.run_coroutine_threadsafe(self._write(stage, entry), self.loop))
+
+    async def _write(self, stage: str, entry: Dict[str, Any]) -> None:
+        self.doc.stage_outputs = {**(self.doc.stage_outputs or {}), stage: entry}
+        await Document.find_one(Document.id == self.doc.id).update({"$set": {f"stage_outputs.{stage}": entry}})
+
+    async def flush(self) -> None:
+        """Wait for outstanding writes; a failed write only costs a re-run of that stage."""
+        pending, self._pending = self._pending, []
+        for future in pending:
+            try:
+                await asyncio.wrap_future(future)
+            except Exception as e:
+                logger.warning(f"Could not checkpoint a stage of document {self.doc.id}: {e}")
@@ -0,0 +1,5 @@
+# tests/conftest.py
+import os
+
+# Settings refuse to load without a key; no test talks to OpenAI.
+os.environ.setdefault("OPENAI_API_KEY", "offline-tests")
@@ -0,0 +1,64 @@
+# tests/test_blob_storage.py
+"""Blob cache eviction never removes a copy a run has pinned."""
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from typing import AsyncIterator, Dict, Optional
+
+import pytest
+
+from config.settings import settings
+from services import blob_storage
+
+_SIZE = 700 * 1024  # two copies overflow a 1 MB cache
+
+
+class _MemoryStore(blob_storage.BlobStore):
+    name = "memory"
+
+    def __init__(self) -> None:
+        self.blobs: Dict[str, bytes] = {}
+
+    async def read(self, key: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        yield self.blobs[key]
+
+    def uri(self, key: str) -> str:
+        return f"memory://{key}"
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "BLOB_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "BLOB_CACHE_MAX_MB", 1)
+    memory = _MemoryStore()
+    blob_storage.use_store(memory)
+    yield memory
+    blob_storage._stores.pop(memory.name, None)
+
+
+def _doc(store: _MemoryStore, key: str) -> SimpleNamespace:
+    store.blobs[key] = key.encode() * (_SIZE // len(key))
+    return SimpleNamespace(
+        storage_backend=store.name, storage_key=key, file_path=key, content_hash=None, upload_date=None,
+    )
+
+
+def test_pinned_copy_survives_eviction_until_unpinned(store):
+    async def run():
+        pinned = await blob_storage.local_path(_doc(store, "a/report.pdf"), pin=True)
+        await blob_storage.local_path(_doc(store, "b/other.pdf"))
+        survived = Path(pinned).exists()
+        blob_storage.unpin(pinned)
+        await blob_storage.local_path(_doc(store, "c/third.pdf"))
+        return survived, Path(pinned).exists()
+
+    assert asyncio.run(run()) == (True, False)
+
+
+def test_unpinned_copy_is_evicted(store):
+    async def run():
+        first = await blob_storage.local_path(_doc(store, "a/report.pdf"))
+        await blob_storage.local_path(_doc(store, "b/other.pdf"))
+        return Path(first).exists()
+
+    assert asyncio.run(run()) is False
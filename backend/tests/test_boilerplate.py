@@ -0,0 +1,45 @@
+# tests/test_boilerplate.py
+"""Boilerplate filter: decided on a bounded window of leading pages, then streamed."""
+from typing import Iterator, List
+
+from tools.boilerplate import BoilerplateFilter
+from tools.document_extraction import PageRecord
+
+_HEAD = "Acme Corp | Annual Report on Form 10-K | {page}"
+_DISCLAIMER = "Forward-looking statements are subject to risks and uncertainties described herein."
+
+
+def _pages(count: int, pulled: List[int]) -> Iterator[PageRecord]:
+    for page in range(1, count + 1):
+        pulled.append(page)
+        body = f"Segment revenue for unit {page} was $ {page * 7},{page:03d} million."
+        yield PageRecord(page, "\n".join([_HEAD.format(page=page), body, _DISCLAIMER]), [])
+
+
+def test_first_page_comes_out_after_the_window_not_the_document():
+    pulled: List[int] = []
+    pages = BoilerplateFilter(min_share=0.5, min_pages=4, window_pages=8).filter(_pages(500, pulled))
+    first = next(pages)
+    assert len(pulled) == 8
+    assert first.text.count("\n") == 2  # the first copy of each repeated line stays
+    pages.close()
+
+
+def test_lines_found_in_the_window_are_dropped_from_streamed_pages():
+    boilerplate = BoilerplateFilter(min_share=0.5, min_pages=4, window_pages=8)
+    records = list(boilerplate.filter(_pages(40, [])))
+    assert [record.text.count(_DISCLAIMER) for record in records] == [1] + [0] * 39
+    assert all(record.text.startswith("Segment revenue") for record in records[1:])
+    assert boilerplate.report["pages"] == 40
+    assert boilerplate.report["window_pages"] == 8
+    assert boilerplate.report["lines_removed"] == 2 * 39
+
+
+def test_running_line_whose_number_stops_tracking_the_page_is_kept():
+    def pages() -> Iterator[PageRecord]:
+        for page in range(1, 21):
+            number = page if page <= 10 else 3 * page
+            yield PageRecord(page, f"{_HEAD.format(page=number)}\nBody text {page}", [])
+
+    records = list(BoilerplateFilter(min_share=0.5, min_pages=4, window_pages=8).filter(pages()))
+    assert [record.text.startswith("Acme") for record in records] == [True] + [False] * 9 + [True] * 10
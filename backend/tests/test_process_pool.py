@@ -0,0 +1,59 @@
+# tests/test_process_pool.py
+"""CPU pool timeouts: counted from when a worker starts the task, and fatal only to that worker.
+
+Tasks are stdlib functions (`time.sleep`), so spawned workers need nothing from
+this module.
+"""
+import asyncio
+import time
+
+import pytest
+
+from config.settings import settings
+from services import process_pool
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    def start(workers: int) -> None:
+        monkeypatch.setattr(settings, "CPU_POOL_WORKERS", workers)
+        process_pool.start_process_pool()
+
+    yield start
+    asyncio.run(process_pool.stop_process_pool())
+
+
+async def _outcome(seconds: float, timeout: float) -> str:
+    try:
+        await process_pool.run_cpu(time.sleep, seconds, timeout=timeout)
+        return "ok"
+    except BaseException as e:  # CancelledError included: no caller may see one
+        return type(e).__name__
+
+
+def test_queue_time_does_not_count_towards_the_timeout(pool):
+    pool(1)
+
+    async def run():
+        return await asyncio.gather(*[_outcome(1, 10) for _ in range(3)], _outcome(0.1, 1.5))
+
+    assert asyncio.run(run()) == ["ok", "ok", "ok", "ok"]
+
+
+def _restarts(reason: str) -> float:
+    return process_pool.CPU_POOL_RESTARTS.labels(reason)._value.get()
+
+
+def test_a_hanging_task_only_takes_down_its_own_worker(pool):
+    pool(3)
+    timeouts, crashes = _restarts("timeout"), _restarts("crash")
+
+    async def run():
+        hang = _outcome(60, 1)
+        return await asyncio.gather(hang, _outcome(2, 10), _outcome(2, 10), _outcome(0.5, 10))
+
+    started = time.monotonic()
+    assert asyncio.run(run()) == ["CpuTaskTimeout", "ok", "ok", "ok"]
+    assert time.monotonic() - started < 10
+    assert _restarts("timeout") == timeouts + 1
+    assert _restarts("crash") == crashes
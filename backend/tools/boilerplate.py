@@ -0,0 +1,180 @@
+# tools/boilerplate.py
+"""Cross-page boilerplate removal for paged (PDF) extraction.
+
+Filings repeat running heads, footers and legal disclaimers on every page, and
+every agent that reads the document pays for each copy. A line is treated as
+boilerplate when it recurs on at least BOILERPLATE_MIN_PAGE_SHARE of the pages:
+
+- among the first/last `_EDGE_LINES` non-blank lines of a page, compared with
+  page numbers masked, so "Acme Corp | 2024 Form 10-K | 37" matches on every
+  page. Only standalone integers are masked, never amounts with a currency
+  sign, commas or decimals, and a masked line only counts as boilerplate when
+  each masked number is fixed (a year) or rises with the page index (a page
+  number); footers ending in per-page figures are content and stay;
+- anywhere else only verbatim, and only when it is at least `_MIN_BODY_CHARS`
+  long, so short repeated captions inside the body are left alone.
+
+Either way the line must have `_MIN_LETTERS` letters, so rows of years or
+figures never qualify. Lines are compared by the hash of their
+whitespace-collapsed, lowercased text. The first copy of each boilerplate line
+is kept and later ones are dropped, so no text disappears from the document
+outright. Tables are never touched, and unpaged (DOCX/TXT) records pass
+through unchanged without being buffered.
+
+The decision is made on the first BOILERPLATE_WINDOW_PAGES pages only: those
+are buffered, and the rest stream through one at a time and lose the lines
+already found to repeat. A 500-page filing therefore holds no more pages in
+memory than a short one, and its first page comes out after the window rather
+than after the whole parse. A line that only starts repeating after the window
+is kept, and a running line whose page number stops tracking the page index
+stops matching.
+"""
+import itertools
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config.settings import settings
+
+_EDGE_LINES = 3
+_MIN_BODY_CHARS = 40
+_MIN_LETTERS = 4
+_MIN_REPEATS = 3
+_REPORTED_LINES = 20
+# A standalone integer of up to 4 digits: not part of a word, an amount ($ 1,234.5) or a date (12/31).
+_PAGE_NUMBER = re.compile(r'(?<![\w$€£.,/])(?<![$€£] )\d{1,4}(?![\w%/]|[.,]\d)')
+_LETTER = re.compile(r'[^\W\d_]')
+
+_Keys = Tuple[Optional[int], Optional[int]]
+# Per masked number: (tracks the page index, offset from it) or (False, fixed value).
+_Pattern = Tuple[Tuple[bool, int], ...]
+
+
+def _line_keys(line: str, edge: bool) -> Tuple[_Keys, Tuple[int, ...]]:
+    """(masked key, verbatim key) of a line, None where not eligible, and the numbers the mask hid."""
+    norm = " ".join(line.split()).lower()
+    if len(_LETTER.findall(norm)) < _MIN_LETTERS:
+        return (None, None), ()
+    masked = hash(("edge", _PAGE_NUMBER.sub("#", norm))) if edge else None
+    verbatim = hash(("line", norm)) if edge or len(norm) >= _MIN_BODY_CHARS else None
+    numbers = tuple(int(n) for n in _PAGE_NUMBER.findall(norm)) if edge else ()
+    return (masked, verbatim), numbers
+
+
+def _page_lines(text: str) -> List[Tuple[str, _Keys, Tuple[int, ...]]]:
+    lines = text.split("\n")
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    edges = set(filled[:_EDGE_LINES] + filled[-_EDGE_LINES:])
+    return [
+        (line, *(_line_keys(line, i in edges) if line.strip() else ((None, None), ())))
+        for i, line in enumerate(lines)
+    ]
+
+
+def _pattern(seen: List[Tuple[int, Tuple[int, ...]]]) -> Optional[_Pattern]:
+    """How each masked number behaves across (page index, numbers) sightings; None unless each is fixed or tracks the page index."""
+    pattern = []
+    for position in zip(*(numbers for _, numbers in seen)):
+        offsets = {n - index for (index, _), n in zip(seen, position)}
+        if len(set(position)) == 1:
+            pattern.append((False, position[0]))
+        elif len(offsets) == 1:
+            pattern.append((True, offsets.pop()))
+        else:
+            return None
+    return tuple(pattern)
+
+
+def _fits(pattern: _Pattern, index: int, numbers: Tuple[int, ...]) -> bool:
+    return len(numbers) == len(pattern) and all(
+        n == (index + value if per_page else value) for (per_page, value), n in zip(pattern, numbers)
+    )
+
+
+class BoilerplateFilter:
+    """Drops repeated lines from a stream of page records; `report` says what went."""
+
+    def __init__(
+        self, min_share: Optional[float] = None, min_pages: Optional[int] = None, window_pages: Optional[int] = None,
+    ):
+        self.min_share = settings.BOILERPLATE_MIN_PAGE_SHARE if min_share is None else min_share
+        self.min_pages = settings.BOILERPLATE_MIN_PAGES if min_pages is None else min_pages
+        self.window_pages = settings.BOILERPLATE_WINDOW_PAGES if window_pages is None else window_pages
+        self.report: Optional[Dict[str, Any]] = None
+
+    def filter(self, pages: Iterable[Any]) -> Iterator[Any]:
+        """Yield `pages` with boilerplate removed from their text (PageRecord in, PageRecord out)."""
+        pages = iter(pages)
+        first = next(pages, None)
+        if first is None:
+            return
+        if first.page_number is None or self.min_pages <= 0:
+            yield first
+            yield from pages
+            return
+        window = [first, *itertools.islice(pages, max(self.window_pages, self.min_pages) - 1)]
+        if len(window) < self.min_pages:
+            yield from window
+            return
+        yield from self._strip(window, pages)
+
+    def _strip(self, window: List[Any], rest: Iterator[Any]) -> Iterator[Any]:
+        parsed = [_page_lines(record.text) for record in window]
+        seen_on: Counter = Counter()
+        masked_numbers: Dict[int, List[Tuple[int, Tuple[int, ...]]]] = {}
+        for index, lines in enumerate(parsed):
+            seen_on.update({key for _, keys, _ in lines for key in keys if key is not None})
+            for _, (masked, _), numbers in lines:
+                if masked is not None:
+                    masked_numbers.setdefault(masked, []).append((index, numbers))
+        threshold = max(_MIN_REPEATS, math.ceil(self.min_share * len(window)))
+        patterns: Dict[int, _Pattern] = {}
+        verbatim = set()
+        for key, count in seen_on.items():
+            if count < threshold:
+                continue
+            if key not in masked_numbers:
+                verbatim.add(key)
+            elif (pattern := _pattern(masked_numbers[key])) is not None:
+                patterns[key] = pattern
+
+        kept: Dict[int, str] = {}
+        found_on: Counter = Counter()
+        removed: Counter = Counter()
+        removed_chars: Counter = Counter()
+        pages = itertools.chain(zip(window, parsed), ((record, _page_lines(record.text)) for record in rest))
+        total = 0
+        for index, (record, lines) in enumerate(pages):
+            total += 1
+            out = []
+            found = set()
+            for line, (masked, plain), numbers in lines:
+                if masked in patterns and _fits(patterns[masked], index, numbers):
+                    key = masked
+                elif plain in verbatim:
+                    key = plain
+                else:
+                    out.append(line)
+                    continue
+                found.add(key)
+                if key not in kept:
+                    kept[key] = line.strip()
+                    out.append(line)
+                else:
+                    removed[key] += 1
+                    removed_chars[key] += len(line) + 1
+            found_on.update(found)
+            yield record._replace(text="\n".join(out)) if len(out) < len(lines) else record
+
+        self.report = {
+            "pages": total,
+            "window_pages": min(total, max(self.window_pages, self.min_pages)),
+            "threshold_pages": threshold,
+            "lines_removed": sum(removed.values()),
+            "chars_removed": sum(removed_chars.values()),
+            "lines": [
+                {"text": kept[key][:200], "pages": found_on[key], "removed": removed[key]}
+                for key, _ in removed_chars.most_common(_REPORTED_LINES)
+            ],
+        }
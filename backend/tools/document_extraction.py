@@ -0,0 +1,470 @@
+# tools/document_extraction.py
+"""Document parsing, cleaning and metric extraction, free of crewai and LangChain.
+
+Everything here runs in the CPU pool's spawned workers (`run_cpu`), which import
+only this module's dependencies. A worker that also imported crewai would spend
+seconds on its first task, and again after every recycle or pool restart. The crew
+tools in `tools.financial_tools` wrap these functions.
+"""
+import re
+import time
+import zipfile
+import logging
+from enum import Enum
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Any
+from pathlib import Path
+import PyPDF2
+import pdfplumber
+import fitz  # PyMuPDF
+from lxml import etree
+
+from config.settings import settings
+from observability.metrics import EXTRACTION_DURATION, record_cache
+from tools import parse_cache
+from tools.boilerplate import BoilerplateFilter
+from tools.text_normalizer import normalize_chunks, normalize_financial_text
+
+logger = logging.getLogger(__name__)
+
+class PageKind(str, Enum):
+    NARRATIVE = "narrative"
+    TABLE = "table"
+    EMPTY = "empty"  # scanned or blank; no text layer to extract
+
+# Triage heuristics (PyMuPDF text/drawing statistics)
+_NUMERIC_LINE = re.compile(r'^[\s$€£(]*-?[\d][\d,.]*\s*%?\)?\s*$|^[\s$]*[—–-]+\s*$')
+_STATEMENT_HINTS = re.compile(
+    r'balance\s+sheets?|statements?\s+of\s+(?:operations|income|cash\s+flows?|financial\s+position)|'
+    r'income\s+statement|cash\s+flows?|total\s+assets|total\s+liabilities|'
+    r'in\s+(?:millions|thousands|billions)',
+    flags=re.IGNORECASE,
+)
+_MIN_PAGE_CHARS = 20
+_TABLE_NUMERIC_RATIO = 0.35
+_TABLE_RULED_NUMERIC_RATIO = 0.15
+_TABLE_MIN_RULES = 4
+
+_DOCX_PARAGRAPHS_PER_CHUNK = 200
+_TXT_CHUNK_CHARS = 64 * 1024
+
+
+class PageRecord(NamedTuple):
+    """One unit of extracted content; page_number is None for unpaged formats (DOCX/TXT).
+
+    PDF tables are numbered per page. Unpaged tables are numbered across the whole
+    document, so those records carry the number of their first table.
+    """
+    page_number: Optional[int]
+    text: str
+    tables: List[List[List[str]]]
+    first_table: int = 1
+
+
+def _timed_pages(label: str, pages: Iterator[PageRecord]) -> Iterator[PageRecord]:
+    """Record extraction time spent inside the generator only, not in its consumer."""
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                page = next(pages)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield page
+    finally:
+        EXTRACTION_DURATION.labels(label).observe(elapsed)
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY, _W_P, _W_TBL, _W_TR, _W_TC = (_W + t for t in ("body", "p", "tbl", "tr", "tc"))
+_W_R, _W_HYPERLINK, _W_SDT_CONTENT = _W + "r", _W + "hyperlink", _W + "sdtContent"
+# Run content as python-docx renders it; <w:br> depends on its type.
+_W_RUN_TEXT = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+
+
+def _docx_paragraph_text(p: Any) -> str:
+    parts: List[str] = []
+    for child in p:
+        if child.tag == _W_HYPERLINK:
+            runs = child.iterchildren(_W_R)
+        elif child.tag == _W_R:
+            runs = (child,)
+        else:
+            continue
+        for run in runs:
+            for item in run:
+                if item.tag == _W + "t":
+                    parts.append(item.text or "")
+                elif item.tag == _W + "br":
+                    parts.append("\n" if item.get(_W + "type", "textWrapping") == "textWrapping" else "")
+                else:
+                    parts.append(_W_RUN_TEXT.get(item.tag, ""))
+    return "".join(parts)
+
+
+def _docx_table_rows(tbl: Any) -> List[List[str]]:
+    """Table rows as cell strings; a cell spanning columns is padded with empty cells like pdfplumber."""
+    rows: List[List[str]] = []
+    for tr in tbl.iterchildren(_W_TR):
+        row: List[str] = []
+        for tc in tr.iterchildren(_W_TC):
+            row.append("\n".join(_docx_paragraph_text(p) for p in tc.iterchildren(_W_P)))
+            span = tc.find(f"{_W}tcPr/{_W}gridSpan")
+            if span is not None:
+                row.extend([""] * (int(span.get(_W + "val", "1")) - 1))
+        rows.append(row)
+    return rows
+
+
+def _is_docx_block(elem: Any) -> bool:
+    """Body-level paragraphs and tables, including those wrapped in a body-level content control."""
+    parent = elem.getparent()
+    if parent.tag == _W_BODY:
+        return True
+    if parent.tag == _W_SDT_CONTENT:
+        sdt = parent.getparent()
+        return sdt is not None and sdt.getparent() is not None and sdt.getparent().tag == _W_BODY
+    return False
+
+
+def _iter_docx_blocks(file_path: str) -> Iterator[Tuple[str, Any]]:
+    """Yield ("paragraph", text) and ("table", rows) from word/document.xml as they close.
+
+    Paragraphs inside tables are left for their table. Each block is cleared once
+    rendered, together with the body-level siblings before it, so memory stays
+    bounded by the largest single block.
+    """
+    with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml:
+        for _, elem in etree.iterparse(xml, events=("end",), tag=(_W_P, _W_TBL), huge_tree=True):
+            if not _is_docx_block(elem):
+                continue
+            if elem.tag == _W_TBL:
+                yield "table", _docx_table_rows(elem)
+            else:
+                yield "paragraph", _docx_paragraph_text(elem)
+            elem.clear()
+            parent = elem.getparent()
+            while elem.getprevious() is not None:
+                del parent[0]
+
+
+_DOLLAR_AMOUNT = re.compile(r'\$\s*(\d[\d,]*(?:\.\d+)?)\s*(million|billion|thousand)?', re.IGNORECASE)
+_BARE_NUMBER = re.compile(
+    r'(?<![\w.,])(\d[\d,]*(?:\.\d+)?)(?![\d])(\s*%|\s*(?:million|billion|thousand)\b)?', re.IGNORECASE
+)
+_YEAR = re.compile(r'(?:19|20)\d\d')
+
+
+def _metric_amount(rest: str) -> Optional[Tuple[str, str]]:
+    """(value, unit) after a metric label on its line.
+
+    The `$` amount when there is one ("revenue for fiscal 2024 was $4.5 billion");
+    otherwise the first number that is neither a year nor a percentage, as in
+    statement rows ("Total assets | 12,345 | 11,870").
+    """
+    dollar = _DOLLAR_AMOUNT.search(rest)
+    if dollar is not None:
+        return dollar.group(1), dollar.group(2) or ""
+    for number in _BARE_NUMBER.finditer(rest):
+        value, suffix = number.group(1), (number.group(2) or "").strip()
+        if suffix == "%" or _YEAR.fullmatch(value):
+            continue
+        return value, suffix
+    return None
+
+
+class FinancialDocumentTool:
+    """Enhanced financial document processing with multiple extractors."""
+
+    @staticmethod
+    def read_document(file_path: str) -> str:
+        """Extract text from financial documents with fallback methods."""
+        return FinancialDocumentTool.read_with_report(file_path)[0]
+
+    @staticmethod
+    def read_with_report(file_path: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Cleaned text, and the boilerplate report (None when nothing was checked)."""
+        cached = parse_cache.get(file_path)
+        record_cache("parse", cached is not None)
+        if cached is not None:
+            text, meta = cached
+            return text, (meta or {}).get("boilerplate")
+        boilerplate = BoilerplateFilter()
+        pages = boilerplate.filter(FinancialDocumentTool.iter_pages(file_path))
+        text = normalize_chunks(FinancialDocumentTool.join_pages([page]) for page in pages)
+        if boilerplate.report and boilerplate.report["lines_removed"]:
+            logger.info(
+                f"Dropped {boilerplate.report['lines_removed']} repeated lines "
+                f"({boilerplate.report['chars_removed']} chars) from {file_path}"
+            )
+        parse_cache.put(file_path, text, {"boilerplate": boilerplate.report})
+        return text, boilerplate.report
+
+    @staticmethod
+    def read_with_metrics(file_path: str) -> Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Text, metrics and boilerplate report in one pool task, for upload-time preprocessing."""
+        text, boilerplate = FinancialDocumentTool.read_with_report(file_path)
+        return text, FinancialDocumentTool.extract_financial_metrics(text), boilerplate
+
+    @staticmethod
+    def iter_pages(file_path: str) -> Iterator[PageRecord]:
+        """Yield a document's pages one at a time as they are parsed.
+
+        PDF records carry their page number and tables; DOCX and TXT content is
+        unpaged (page_number None) and arrives in bounded chunks.
+        """
+        path = Path(file_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Document not found: {file_path}")
+
+        if path.stat().st_size > settings.MAX_FILE_SIZE:
+            raise ValueError(f"File too large: {path.stat().st_size} bytes")
+
+        ext = path.suffix.lower()
+
+        try:
+            if ext == ".pdf":
+                yield from FinancialDocumentTool._iter_pdf_pages(file_path)
+            elif ext == ".docx":
+                yield from _timed_pages("docx", FinancialDocumentTool._iter_docx_pages(file_path))
+            elif ext == ".txt":
+                yield from _timed_pages("txt", FinancialDocumentTool._iter_txt_pages(file_path))
+            else:
+                raise ValueError(f"Unsupported file type: {ext}")
+        except Exception as e:
+            logger.error(f"Document extraction failed for {file_path}: {e}")
+            raise
+
+    @staticmethod
+    def join_pages(pages: Iterable[PageRecord]) -> str:
+        """Render page records as the `[Page N]` / `[Table k]` text the agents read."""
+        parts: List[str] = []
+        for page in pages:
+            if page.page_number is None:
+                parts.append(page.text)
+            else:
+                parts.append(f"\n[Page {page.page_number}]\n{page.text}\n")
+            for table_num, table in enumerate(page.tables, start=page.first_table):
+                table_text = FinancialDocumentTool._format_table_text(table)
+                parts.append(f"\n[Table {table_num}]\n{table_text}\n")
+        return "".join(parts)
+
+    @staticmethod
+    def _iter_pdf_pages(file_path: str) -> Iterator[PageRecord]:
+        """Stream PDF pages, falling back to the next extractor while output is not yet viable."""
+        extractors = [
+            FinancialDocumentTool._iter_with_pdfplumber,
+            FinancialDocumentTool._iter_with_pymupdf,
+            FinancialDocumentTool._iter_with_pypdf2,
+        ]
+        if settings.PDF_TRIAGE_ENABLED:
+            extractors.insert(0, FinancialDocumentTool._iter_with_triage)
+
+        for extractor in extractors:
+            name = extractor.__name__.replace("_iter_with_", "")
+            pages = _timed_pages(name, extractor(file_path))
+            # Hold pages back until there is minimum viable content, so a failing or empty
+            # extractor can still be swapped for the next one without emitting duplicates.
+            held: List[PageRecord] = []
+            rendered = ""
+            try:
+                for page in pages:
+                    held.append(page)
+                    rendered += FinancialDocumentTool.join_pages([page])
+                    if len(rendered.strip()) > 50:  # Minimum viable content
+                        break
+            except Exception as e:
+                logger.debug(f"{name} extraction failed: {e}")
+                continue
+            if len(rendered.strip()) <= 50:
+                pages.close()
+                continue
+            yield from held
+            yield from pages
+            return
+
+        raise RuntimeError(f"All PDF extractors failed for: {file_path}")
+
+    @staticmethod
+    def _iter_with_pdfplumber(file_path: str) -> Iterator[PageRecord]:
+        """Extract using pdfplumber with table support."""
+        with pdfplumber.open(file_path) as pdf:
+            for page_num, page in enumerate(pdf.pages, start=1):
+                text = page.extract_text() or ""
+                try:
+                    tables = page.extract_tables() or []
+                except Exception as e:
+                    logger.debug(f"Table extraction failed on page {page_num - 1}: {e}")
+                    tables = []
+                page.close()
+                yield PageRecord(page_num, text, tables)
+
+    @staticmethod
+    def _classify_page(page: "fitz.Page", text: str) -> PageKind:
+        """Decide whether a page needs table extraction."""
+        if len(text.strip()) < _MIN_PAGE_CHARS:
+            return PageKind.EMPTY
+
+        lines = [ln for ln in text.splitlines() if ln.strip()]
+        numeric = sum(1 for ln in lines if _NUMERIC_LINE.match(ln))
+        ratio = numeric / len(lines) if lines else 0.0
+        if ratio >= _TABLE_NUMERIC_RATIO:
+            return PageKind.TABLE
+
+        # Ruled tables: horizontal/vertical line segments and thin filled rectangles
+        if ratio >= _TABLE_RULED_NUMERIC_RATIO or _STATEMENT_HINTS.search(text):
+            rules = 0
+            for path in page.get_cdrawings():
+                rect = fitz.Rect(path["rect"])
+                if rect.height <= 2 or rect.width <= 2:
+                    rules += 1
+                    if rules >= _TABLE_MIN_RULES:
+                        return PageKind.TABLE
+            if _STATEMENT_HINTS.search(text) and ratio >= _TABLE_RULED_NUMERIC_RATIO:
+                return PageKind.TABLE
+        return PageKind.NARRATIVE
+
+    @staticmethod
+    def _iter_with_triage(file_path: str) -> Iterator[PageRecord]:
+        """Extract with PyMuPDF everywhere and pdfplumber tables only on table pages."""
+        doc = fitz.open(file_path)
+        plumber = None
+        try:
+            for page_num, page in enumerate(doc, start=1):
+                text = page.get_text()
+                tables: List[List[List[str]]] = []
+                if FinancialDocumentTool._classify_page(page, text) == PageKind.TABLE:
+                    # Pages are already streaming out, so a pdfplumber failure here can no longer fall
+                    # back to another extractor; keep PyMuPDF's text for this page instead.
+                    try:
+                        if plumber is None:
+                            plumber = pdfplumber.open(file_path)
+                        plumbed = plumber.pages[page_num - 1]
+                        try:
+                            text = plumbed.extract_text() or ""
+                            try:
+                                tables = plumbed.extract_tables() or []
+                            except Exception as e:
+                                logger.debug(f"Table extraction failed on page {page_num - 1}: {e}")
+                        finally:
+                            plumbed.close()
+                    except Exception as e:
+                        logger.warning(f"pdfplumber failed on page {page_num} of {file_path}; using PyMuPDF text: {e}")
+                yield PageRecord(page_num, text, tables)
+        finally:
+            if plumber is not None:
+                plumber.close()
+            doc.close()
+
+    @staticmethod
+    def _iter_with_pymupdf(file_path: str) -> Iterator[PageRecord]:
+        """Extract using PyMuPDF."""
+        doc = fitz.open(file_path)
+        try:
+            for page_num, page in enumerate(doc, start=1):
+                yield PageRecord(page_num, page.get_text(), [])
+        finally:
+            doc.close()
+
+    @staticmethod
+    def _iter_with_pypdf2(file_path: str) -> Iterator[PageRecord]:
+        """Extract using PyPDF2."""
+        with open(file_path, "rb") as file:
+            reader = PyPDF2.PdfReader(file)
+            for page_num, page in enumerate(reader.pages, start=1):
+                yield PageRecord(page_num, page.extract_text() or "", [])
+
+    @staticmethod
+    def _iter_docx_pages(file_path: str) -> Iterator[PageRecord]:
+        """Stream DOCX paragraphs and tables in document order without building the DOM.
+
+        A record is cut after every _DOCX_PARAGRAPHS_PER_CHUNK paragraphs and before
+        any paragraph that follows a table, so joining the records keeps tables in place.
+        """
+        batch: List[str] = []
+        tables: List[List[List[str]]] = []
+        first_table = 1
+        for kind, content in _iter_docx_blocks(file_path):
+            if kind == "table":
+                tables.append(content)
+                continue
+            if tables or len(batch) >= _DOCX_PARAGRAPHS_PER_CHUNK:
+                yield PageRecord(None, "".join(batch), tables, first_table)
+                first_table += len(tables)
+                batch, tables = [], []
+            if content.strip():
+                batch.append(content + "\n")
+        if batch or tables:
+            yield PageRecord(None, "".join(batch), tables, first_table)
+
+    @staticmethod
+    def _iter_txt_pages(file_path: str) -> Iterator[PageRecord]:
+        """Extract plain text in line-aligned chunks."""
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
+            while True:
+                chunk = file.read(_TXT_CHUNK_CHARS)
+                if not chunk:
+                    return
+                chunk += file.readline()
+                yield PageRecord(None, chunk, [])
+
+    @staticmethod
+    def _format_table_text(table: List[List[str]]) -> str:
+        """Format table data as text."""
+        if not table:
+            return ""
+        formatted_rows = []
+        for row in table:
+            if row:
+                cells = [str(cell).strip() if cell else "" for cell in row]
+                formatted_rows.append(" | ".join(cells))
+        return "\n".join(formatted_rows)
+
+    @staticmethod
+    def _clean_financial_text(text: str) -> str:
+        """Clean and normalize financial document text."""
+        return normalize_financial_text(text)
+
+    @staticmethod
+    def extract_financial_metrics(text: str) -> Dict[str, Any]:
+        """Extract key financial metrics from text."""
+        metrics: Dict[str, Any] = {}
+        if not text:
+            return metrics
+
+        def extract_values(patterns: List[str], key: str) -> None:
+            for pattern in patterns:
+                matches = []
+                for label in re.finditer(pattern + r'([^\n]*)', text, flags=re.IGNORECASE):
+                    amount = _metric_amount(label.group(1))
+                    if amount is not None:
+                        matches.append(amount)
+                        if len(matches) == 3:
+                            break
+                if matches:
+                    metrics[key] = matches
+                    return
+
+        revenue_patterns = [
+            r'(?:total\s+)?(?:net\s+)?(?:revenue|sales)',
+            r'revenues?',
+        ]
+        profit_patterns = [
+            r'net\s+income',
+            r'net\s+earnings',
+        ]
+        asset_patterns = [
+            r'total\s+assets',
+        ]
+        liability_patterns = [
+            r'total\s+liabilities(?!\s+and)',
+        ]
+
+        extract_values(revenue_patterns, "revenue")
+        extract_values(profit_patterns, "net_income")
+        extract_values(asset_patterns, "total_assets")
+        extract_values(liability_patterns, "total_liabilities")
+
+        return metrics
@@ -0,0 +1,187 @@
+# tools/document_verifier.py
+"""Deterministic first pass of the verification stage.
+
+Answers the verifier agent's questions from the extracted text alone: does it
+read like a financial document, what type and reporting period is it, which
+key metrics are present (`FinancialDocumentTool.extract_financial_metrics`),
+and are they consistent with each other. Consistency is only checked on
+statement rows (`label | value | ...` as tables are rendered), since the first
+figure after a label in prose is often a percentage or a year. Each answer
+adds evidence to a score. Enough evidence makes the document VERIFIED, with the
+score as its confidence. A low score only means little was found (a short
+earnings release scores low), so it goes to the LLM verifier as NEEDS_REVIEW,
+as does any anomaly. The one local rejection is a document with no extractable
+text.
+
+The analysis pipeline uses the local report in place of the LLM verifier when
+its confidence reaches VERIFIER_MIN_CONFIDENCE, and stops after verification
+whenever the verdict (local or LLM) is REJECTED.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from tools.document_extraction import FinancialDocumentTool
+
+# Most specific first; the first match names the document.
+_DOC_TYPES: List[Tuple[str, "re.Pattern[str]"]] = [
+    (label, re.compile(pattern, re.IGNORECASE)) for label, pattern in (
+        ("Form 10-K annual report", r'\bform\s+10-?k\b'),
+        ("Form 10-Q quarterly report", r'\bform\s+10-?q\b'),
+        ("Form 20-F annual report", r'\bform\s+20-?f\b'),
+        ("Form 8-K current report", r'\bform\s+8-?k\b'),
+        ("Earnings release", r'\b(?:earnings|results)\s+(?:release|announcement)\b'),
+        ("Investor update", r'\b(?:investor\s+(?:update|presentation|letter)|shareholder\s+letter)\b'),
+        ("Annual report", r'\bannual\s+report\b'),
+        ("Quarterly report", r'\bquarterly\s+report\b'),
+        ("Financial statements", r'\b(?:balance\s+sheets?|statements?\s+of\s+(?:operations|income|cash\s+flows))\b'),
+    )
+]
+_PERIODS = [
+    re.compile(r'\b(?:year|quarter|period|(?:three|six|nine|twelve)\s+months)\s+ended\s+[A-Z][a-z]+\s+\d{1,2},?\s+\d{4}',
+               re.IGNORECASE),
+    re.compile(r'\b(?:Q[1-4]|FY)\s*\d{4}\b'),
+    re.compile(r'\bfiscal\s+(?:year\s+)?\d{4}\b', re.IGNORECASE),
+]
+_FINANCIAL_TERMS = re.compile(
+    r'\b(?:revenues?|net\s+(?:income|loss|sales)|gross\s+(?:profit|margin)|operating\s+(?:income|expenses)'
+    r'|total\s+(?:assets|liabilities)|(?:stock|share)holders\W?\s+equity|cash\s+flows?|balance\s+sheets?'
+    r'|earnings\s+per\s+share|ebitda|diluted|fiscal)\b',
+    re.IGNORECASE,
+)
+_STATEMENT_ROWS = {
+    "revenue": re.compile(r'(?:total\s+)?(?:net\s+)?(?:revenues?|sales)', re.IGNORECASE),
+    "net_income": re.compile(r'net\s+(?:income|earnings)(?:\s+\(loss\))?', re.IGNORECASE),
+    "total_assets": re.compile(r'total\s+assets', re.IGNORECASE),
+    "total_liabilities": re.compile(r'total\s+liabilities', re.IGNORECASE),
+}
+_CELL_NUMBER = re.compile(r'^\(?\$?\s*(\d[\d,]*(?:\.\d+)?)\)?$')
+_MARKERS = re.compile(r'\[(?:Page|Table) \d+\]')
+_LETTER = re.compile(r'[^\W\d_]')
+_STATUS = re.compile(r'Status\W{0,4}(VERIFIED|NEEDS_REVIEW|REJECTED)\b', re.IGNORECASE)
+_KEY_METRICS = ("revenue", "net_income", "total_assets", "total_liabilities")
+
+_MIN_TEXT_LETTERS = 20  # below this (page markers aside) there is nothing to verify
+_TERMS_FOR_FULL_CREDIT = 20
+_VERIFIED_SCORE = 0.7
+_REVIEW_CONFIDENCE = 0.5  # NEEDS_REVIEW is never confident enough to skip the LLM verifier
+
+
+def verdict_of(report: Optional[str]) -> Optional[str]:
+    """The Status line of a verification report (local or LLM), upper-cased."""
+    matches = _STATUS.findall(report or "")
+    return matches[-1].upper() if matches else None
+
+
+def _first_amount(values: List[Any]) -> Optional[Tuple[float, str]]:
+    for value, unit in values:
+        digits = value.replace(",", "")
+        try:
+            return float(digits), unit.lower()
+        except ValueError:
+            continue
+    return None
+
+
+@dataclass
+class VerificationResult:
+    status: str
+    confidence: float
+    doc_type: Optional[str] = None
+    period: Optional[str] = None
+    metrics: Dict[str, Tuple[float, str]] = field(default_factory=dict)
+    financial_terms: int = 0
+    anomalies: List[str] = field(default_factory=list)
+
+    def report(self) -> str:
+        """Same shape as the verifier agent's expected output."""
+        metrics = ", ".join(
+            f"{name.replace('_', ' ')} {value:,.2f}{' ' + unit if unit else ''}"
+            for name, (value, unit) in self.metrics.items()
+        )
+        return "\n".join([
+            "Verification Report:",
+            f"- Document type & period: {self.doc_type or 'not identified'}; {self.period or 'period not stated'}",
+            f"- Key metrics extracted: {metrics or 'none found'}",
+            f"- Data quality assessment (with confidence): {self.financial_terms} financial terms found; "
+            f"local verifier confidence {self.confidence:.2f}",
+            f"- Anomalies/inconsistencies: {'; '.join(self.anomalies) or 'none detected'}",
+            f"- Status: {self.status}",
+        ])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "confidence": self.confidence,
+            "doc_type": self.doc_type,
+            "period": self.period,
+            "metrics": {name: list(amount) for name, amount in self.metrics.items()},
+            "financial_terms": self.financial_terms,
+            "anomalies": self.anomalies,
+        }
+
+
+def _statement_values(text: str) -> Dict[str, float]:
+    """First value of the first statement row for each key metric."""
+    values: Dict[str, float] = {}
+    for line in text.split("\n"):
+        if "|" not in line:
+            continue
+        label, *cells = [cell.strip() for cell in line.split("|")]
+        for name, pattern in _STATEMENT_ROWS.items():
+            if name in values or not pattern.fullmatch(label):
+                continue
+            number = next((m.group(1) for m in map(_CELL_NUMBER.match, cells) if m), None)
+            if number is not None:
+                values[name] = float(number.replace(",", ""))
+        if len(values) == len(_STATEMENT_ROWS):
+            break
+    return values
+
+
+def _anomalies(values: Dict[str, float]) -> List[str]:
+    found = []
+    pairs = (
+        ("net_income", "revenue", "net income exceeds revenue"),
+        ("total_liabilities", "total_assets", "total liabilities exceed total assets"),
+    )
+    for smaller, larger, message in pairs:
+        if smaller in values and larger in values and values[smaller] > values[larger] > 0:
+            found.append(message)
+    return found
+
+
+def verify_text(text: str) -> VerificationResult:
+    if len(_LETTER.findall(_MARKERS.sub("", text))) < _MIN_TEXT_LETTERS:
+        return VerificationResult("REJECTED", 0.95, anomalies=["no extractable text"])
+
+    doc_type = next((label for label, pattern in _DOC_TYPES if pattern.search(text)), None)
+    period = next((m.group(0) for m in (p.search(text) for p in _PERIODS) if m), None)
+    if period:
+        period = " ".join(period.split())
+    terms = len(_FINANCIAL_TERMS.findall(text))
+    metrics: Dict[str, Tuple[float, str]] = {}
+    for name, values in FinancialDocumentTool.extract_financial_metrics(text).items():
+        amount = _first_amount(values)
+        if amount is not None:
+            metrics[name] = amount
+    statements = _statement_values(text)
+    metrics.update((name, (value, "")) for name, value in statements.items())  # rows beat prose matches
+    anomalies = _anomalies(statements)
+
+    score = (
+        0.3 * min(1.0, terms / _TERMS_FOR_FULL_CREDIT)
+        + 0.2 * (doc_type is not None)
+        + 0.2 * (period is not None)
+        + 0.3 * len(set(metrics) & set(_KEY_METRICS)) / len(_KEY_METRICS)
+    )
+    if anomalies or score < _VERIFIED_SCORE:
+        status, confidence = "NEEDS_REVIEW", _REVIEW_CONFIDENCE
+    else:
+        status, confidence = "VERIFIED", score
+    return VerificationResult(status, round(confidence, 3), doc_type, period, metrics, terms, anomalies)
+
+
+def verify_document(file_path: str) -> VerificationResult:
+    """Verify a stored document; its text normally comes from the parse cache."""
+    return verify_text(FinancialDocumentTool.read_document(file_path))
@@ -0,0 +1,83 @@
+# tools/parse_cache.py
+"""On-disk cache of extracted document text, shared by every parse of a file.
+
+An analysis reads the same file several times: the parse tool of each agent
+that calls it, and search indexing afterwards. Upload-time preprocessing fills
+the cache, so an analysis never parses at all.
+
+Entries are keyed by the file's absolute path, size and mtime (plus
+`_FORMAT`, bumped when extraction output changes), so a lookup costs one
+stat and an upload that overwrites a file never serves stale text. An entry
+may carry a small JSON sidecar of extraction metadata (the boilerplate report).
+Writes go to a temp file and are renamed into place, sidecar first, so the API
+process and the CPU pool workers can share the directory without locking.
+PARSE_CACHE_DIR="" disables it.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_FORMAT = "2"
+
+
+def _entry_path(file_path: str) -> Optional[Path]:
+    if not settings.PARSE_CACHE_DIR:
+        return None
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    key = "\x1f".join([_FORMAT, os.path.abspath(file_path), str(st.st_size), str(st.st_mtime_ns)])
+    return Path(settings.PARSE_CACHE_DIR) / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.txt"
+
+
+def _write(path: Path, data: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def get(file_path: str) -> Optional[Tuple[str, Optional[Dict[str, Any]]]]:
+    """(text, metadata) for `file_path`, or None on a miss."""
+    entry = _entry_path(file_path)
+    if entry is None:
+        return None
+    try:
+        text = entry.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.warning(f"Could not read parse cache entry for {file_path}: {e}")
+        return None
+    try:
+        meta = json.loads(entry.with_suffix(".json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        meta = None
+    return text, meta
+
+
+def put(file_path: str, text: str, meta: Optional[Dict[str, Any]] = None) -> None:
+    """Store `text` (and `meta`) for `file_path`; a failed write only costs a later re-parse."""
+    entry = _entry_path(file_path)
+    if entry is None:
+        return
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        if meta is not None:
+            _write(entry.with_suffix(".json"), json.dumps(meta))
+        _write(entry, text)
+    except OSError as e:
+        logger.warning(f"Could not write parse cache entry for {file_path}: {e}")
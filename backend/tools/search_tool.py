@@ -1,4 +1,5 @@
 import json
+import time
 from typing import Any, Optional
 
 import requests
@@ -12,6 +13,7 @@ import httpx
 from pydantic import BaseModel, Field
 
 from config.settings import settings
+from observability.metrics import EXTERNAL_CALL_DURATION, TOOL_CALL_DURATION
 
 logger = logging.getLogger(__file__)
 
@@ -40,6 +42,10 @@ class SerperSearchTool(BaseTool):
         super().__init__()
 
     def _run(self, **kwargs) -> dict[str, Any]:
+        with TOOL_CALL_DURATION.labels(self.name).time():
+            return self._search(**kwargs)
+
+    def _search(self, **kwargs) -> dict[str, Any]:
         try:
             payload = {
                 "q": kwargs.get("query"),
@@ -60,10 +66,16 @@ class SerperSearchTool(BaseTool):
             base_url = "https://google.serper.dev/search"
             # THIS BLOCK IS FOR REGULATING NUMBER OF RETRIES (DEFAULT is 10)
             session = requests.Session()
-            response = session.post(
-                base_url, headers=headers, data=json.dumps(payload), timeout=10
-            )
-            response.raise_for_status()
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                response = session.post(
+                    base_url, headers=headers, data=json.dumps(payload), timeout=10
+                )
+                response.raise_for_status()
+                outcome = "ok"
+            finally:
+                EXTERNAL_CALL_DURATION.labels("serper", outcome).observe(time.perf_counter() - start)
             raw_data = response.json()
             # logger.info(f"raw results are {raw_data}")
             return raw_data
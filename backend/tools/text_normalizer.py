@@ -0,0 +1,145 @@
+# tools/text_normalizer.py
+"""Single-pass normaliser for extracted financial text.
+
+Produces exactly what the old chain of seven ``re.sub`` passes produced:
+
+    \\r\\n? -> \\n;  [ \\t]+ -> ' ';  \\n\\s*\\n\\s*\\n -> \\n\\n;  \\$\\s+ -> $;
+    (\\d)\\s+,\\s*(\\d) -> \\1,\\2;  'Page N of M' -> '';  \\n\\s*\\n -> \\n\\n;  strip()
+
+Every rule only touches whitespace, '$', digit/comma pairs and page footers, so
+one regex finds all the places that can change and a small callback rewrites
+each of them with the rules applied in their original order. Removing a footer
+can join the whitespace on either side of it before the blank-line rule runs,
+so a whitespace run is matched together with any footers inside it.
+
+sre only skips ahead quickly over characters that cannot start a match, so the
+start set is kept as small as the text allows. Plain spaces are only needed as
+match starts when the text has double spaces, tabs or carriage returns, and
+digits only when some comma follows whitespace. Two substring checks choose
+the narrowest pattern for each chunk.
+
+``FinancialTextNormalizer`` applies the same rules to page-sized chunks. It only
+emits text up to the last character that cannot be part of any rule, and
+carries the rest into the next chunk.
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, List
+
+_FOOTER = r'(?i:page)[ \t]+\d+[ \t]+(?i:of)[ \t]+\d+'
+_FOOTER_REST = r'(?i:age)[ \t]+\d+[ \t]+(?i:of)[ \t]+\d+'  # after a consumed 'p'
+_RUN = rf'(?:\s|{_FOOTER})'
+# Runs the old passes leave untouched are ' ', '\n', ' \n', '\n ' and ' \n '; checked after the first char.
+_NOT_TRIVIAL = rf'(?!(?<= )(?:\n ?)?(?!\s|{_FOOTER})|(?<=\n) ?(?!\s|{_FOOTER}))'
+# Cheap rejection right after the first char, before any branch is tried.
+_PLAUSIBLE = (
+    r'(?:(?<=[ \n])(?=[\spP])|(?<=[^\S \n])|(?<=\$)(?=\s)|(?<=\d)(?=\s)|(?<=[pP])(?=(?i:age)))'
+)
+_BODY = (
+    rf'(?:(?P<dollar>(?<=\$)\s+)'                                                 # $ formatting
+    rf'|(?P<comma>(?<=\d)\s+,\s*\d)'                                              # spaced commas
+    rf'|(?:(?<=[pP]){_FOOTER_REST}(?:{_RUN}*{_FOOTER})?|(?<=\s){_RUN}*{_FOOTER})'
+    rf'(?P<tail>\s+,\s*\d)'                                                       # footer whose last digit takes a spaced comma
+    rf'|(?<=[pP]){_FOOTER_REST}{_RUN}*'                                           # run starting with a footer
+    rf'|(?<=\s){_NOT_TRIVIAL}{_RUN}*)'                                            # whitespace run
+)
+
+# Everything \s matches except the plain space, as a character-class body.
+_OTHER_SPACES = r'\t\n\x0b\x0c\r\x1c-\x1f\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000'
+_SPACES_NEEDED = re.compile(r'  |[\t\r]')
+_WS_COMMA = re.compile(r',(?<=\s,)')
+
+
+@lru_cache(maxsize=None)
+def _pattern(spaces: bool, digits: bool) -> "re.Pattern[str]":
+    starts = (" " if spaces else "") + _OTHER_SPACES + r"$pP" + (r"\d" if digits else "")
+    return re.compile(rf'[{starts}]{_PLAUSIBLE}{_BODY}')
+
+
+_FOOTER_SPLIT = re.compile(_FOOTER)
+_CR = re.compile(r'\r\n?')
+_BLANKS = re.compile(r'[ \t]+')
+
+# Characters that can take part in a rule; a chunk is only cut after anything else.
+_UNSAFE_LETTERS = frozenset("pageofPAGEOF")
+
+
+def _normalize_run(run: str) -> str:
+    """Whitespace run with any footers inside it, as the old passes leave it."""
+    segments = _FOOTER_SPLIT.split(run) if ("p" in run or "P" in run) else [run]
+    ws = "".join(_BLANKS.sub(" ", _CR.sub("\n", seg)) for seg in segments)
+    first = ws.find("\n")
+    last = ws.rfind("\n")
+    if first != last:
+        ws = ws[:first] + "\n\n" + ws[last + 1:]
+    return ws
+
+
+def _replace(m: "re.Match[str]") -> str:
+    if m.group("dollar") is not None:
+        return "$"
+    text = m.group()
+    if m.group("comma") is not None:
+        return f"{text[0]},{text[-1]}"
+    if m.group("tail") is not None:
+        return _normalize_run(text[:m.start("tail") - m.start()]) + "," + text[-1]
+    return _normalize_run(text)
+
+
+def _sub(text: str) -> str:
+    # Plain spaces can be skipped as match starts unless the text has something
+    # the space rules would rewrite; a lone space before a run is kept as-is.
+    pattern = _pattern(_SPACES_NEEDED.search(text) is not None, _WS_COMMA.search(text) is not None)
+    return pattern.sub(_replace, text)
+
+
+def normalize_financial_text(text: str) -> str:
+    """Normalise a whole document in one pass."""
+    if not text:
+        return ""
+    return _sub(text).strip()
+
+
+def _safe_cut(text: str) -> int:
+    """Index just after the last character no rule can span; 0 if there is none."""
+    for i in range(len(text) - 1, -1, -1):
+        c = text[i]
+        if not (c.isspace() or c.isdecimal() or c in "$," or c in _UNSAFE_LETTERS):
+            return i + 1
+    return 0
+
+
+class FinancialTextNormalizer:
+    """Incremental form of `normalize_financial_text` for page-sized chunks.
+
+    ``"".join(n.feed(c) for c in chunks) + n.finish()`` equals
+    ``normalize_financial_text("".join(chunks))``.
+    """
+
+    def __init__(self):
+        self._carry = ""
+        self._started = False
+
+    def feed(self, chunk: str) -> str:
+        buf = self._carry + chunk
+        cut = _safe_cut(buf)
+        self._carry = buf[cut:]
+        if not cut:
+            return ""
+        out = _sub(buf[:cut])
+        if not self._started:
+            out = out.lstrip()
+            self._started = True  # the head ends with a kept, non-space character
+        return out
+
+    def finish(self) -> str:
+        out = _sub(self._carry).rstrip()
+        self._carry = ""
+        return out if self._started else out.lstrip()
+
+
+def normalize_chunks(chunks: Iterable[str]) -> str:
+    normalizer = FinancialTextNormalizer()
+    parts: List[str] = [normalizer.feed(chunk) for chunk in chunks]
+    parts.append(normalizer.finish())
+    return "".join(parts)